@@ -1,5 +1,130 @@
-from django.contrib import admin
-from .models import Question, GameAttempt
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+
+from . import question_pool, tournament
+from .models import AttemptQuestion, GameAttempt, Question, Tournament
+
+# ----------------------------------------------------------------------
+# Changelist para tablas grandes (JUEGO_ADMIN_SCALABLE)
+# ----------------------------------------------------------------------
+
+DESDE_VAR = "desde"       # id del último intento de la página anterior (keyset)
+CONTEO_MAXIMO = 10000     # con filtros se cuenta hasta aquí, no toda la tabla
+
+
+def estimated_count(model, using="default"):
+    """
+    Filas de la tabla según las estadísticas del motor (MySQL/PostgreSQL),
+    sin recorrerla. None si el motor no las tiene.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == "mysql":
+        sql = ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+               "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s")
+    elif connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        fila = cursor.fetchone()
+    if not fila or fila[0] is None or fila[0] < 0:
+        return None
+    return int(fila[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Sin filtros, el total sale de las estadísticas de la tabla; con filtros
+    (o si la tabla es chica) se cuenta con un tope de ``CONTEO_MAXIMO``.
+    Nunca hace ``COUNT(*)`` de toda la tabla.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not qs.query.where:
+            estimado = estimated_count(qs.model, qs.db)
+            if estimado is not None and estimado > CONTEO_MAXIMO:
+                return estimado
+        return qs.order_by()[:CONTEO_MAXIMO].count()
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Paginación keyset por id descendente: cada página es
+    ``WHERE id < desde ORDER BY id DESC LIMIT n``, sin OFFSET. Solo hay
+    "siguiente" y "primera"; no hay saltos a la página N.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        try:
+            self.desde = int(request.GET.get(DESDE_VAR, ""))
+        except ValueError:
+            self.desde = None
+        self.siguiente_id = None
+        super().__init__(request, *args, **kwargs)
+        # Cambiar un filtro o la búsqueda vuelve a la primera página
+        self.params.pop(DESDE_VAR, None)
+        self.filter_params.pop(DESDE_VAR, None)
+        self.primera_url = self.get_query_string() if self.desde else None
+        self.siguiente_url = (
+            self.get_query_string({DESDE_VAR: self.siguiente_id}) if self.siguiente_id else None
+        )
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(DESDE_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        qs = self.queryset
+        if self.desde:
+            qs = qs.filter(pk__lt=self.desde)
+        # Una fila de más para saber si hay página siguiente
+        filas = list(qs[:self.list_per_page + 1])
+        if len(filas) > self.list_per_page:
+            filas = filas[:self.list_per_page]
+            self.siguiente_id = filas[-1].pk
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = filas
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = paginator
+
+
+class AttemptQuestionInline(admin.TabularInline):
+    """
+    Preguntas del intento, solo lectura. Se cargan únicamente al pedirlas
+    (``?preguntas=1``, ver ``GameAttemptAdmin.get_inlines``).
+    """
+    model = AttemptQuestion
+    fields = ("question_number", "question", "is_spare", "replaced", "selected_option", "is_correct", "response_ms")
+    readonly_fields = fields
+    ordering = ("question_number", "is_spare")
+    extra = 0
+    can_delete = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("question")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Question)
@@ -7,14 +132,131 @@ class QuestionAdmin(admin.ModelAdmin):
     list_display = ("text_short", "difficulty", "is_active")
     list_filter = ("difficulty", "is_active")
     search_fields = ("text",)
+    actions = ("activar", "desactivar")
 
     def text_short(self, obj):
         return obj.text[:60]
     text_short.short_description = "Pregunta"
 
+    def _cambiar_activas(self, request, queryset, activa):
+        # Un solo UPDATE; update() no dispara post_save, así que el pool de
+        # preguntas se invalida aquí (el texto no cambia: los fragmentos siguen)
+        cantidad = queryset.update(is_active=activa)
+        question_pool.invalidate()
+        estado = "activadas" if activa else "desactivadas"
+        self.message_user(request, f"{cantidad} preguntas {estado}.", messages.SUCCESS)
+
+    @admin.action(description="Activar las preguntas seleccionadas", permissions=["change"])
+    def activar(self, request, queryset):
+        self._cambiar_activas(request, queryset, True)
+
+    @admin.action(description="Desactivar las preguntas seleccionadas", permissions=["change"])
+    def desactivar(self, request, queryset):
+        self._cambiar_activas(request, queryset, False)
+
 
 @admin.register(GameAttempt)
 class GameAttemptAdmin(admin.ModelAdmin):
     list_display = ("name", "document", "created_at", "max_reached_question", "current_prize", "finished_reason")
     list_filter = ("finished", "finished_reason", "created_at")
-    search_fields = ("name", "document")
\ No newline at end of file
+    search_fields = ("name", "document")
+    readonly_fields = ("preguntas",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if settings.JUEGO_ADMIN_SCALABLE:
+            # Orden fijo por id (el de la paginación keyset), sin conteo total
+            # ni facetas, y búsqueda por prefijo del documento (usa su índice)
+            self.ordering = ("-id",)
+            self.sortable_by = ()
+            self.show_full_result_count = False
+            self.show_facets = admin.ShowFacets.NEVER
+            self.search_fields = ("^document",)
+            self.search_help_text = "Busca por el comienzo del documento."
+
+    def get_changelist(self, request, **kwargs):
+        if settings.JUEGO_ADMIN_SCALABLE:
+            return KeysetChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if settings.JUEGO_ADMIN_SCALABLE:
+            return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_inlines(self, request, obj):
+        if obj is not None and "preguntas" in request.GET:
+            return [AttemptQuestionInline]
+        return []
+
+    @admin.display(description="Preguntas")
+    def preguntas(self, obj):
+        if obj is None or obj.pk is None:
+            return "-"
+        return format_html('<a href="?preguntas=1">Ver las preguntas del intento</a>')
+
+
+@admin.register(Tournament)
+class TournamentAdmin(admin.ModelAdmin):
+    """
+    Consola del presentador del torneo en vivo (ver juego/tournament.py):
+    se crea el torneo, los jugadores entran por el enlace de la sala y las
+    preguntas se abren y cierran con las acciones.
+    """
+    list_display = ("name", "status", "current_question_number", "question_deadline", "created_at")
+    list_filter = ("status",)
+    fields = ("name", "sala", "status", "current_question_number", "question", "question_deadline", "publico")
+    readonly_fields = ("sala", "status", "current_question_number", "question", "question_deadline", "publico")
+    actions = ("abrir_pregunta", "cerrar_pregunta")
+
+    def get_readonly_fields(self, request, obj=None):
+        # El nombre se fija al crearlo: la sala lo lee de la ronda publicada
+        if obj is not None:
+            return ("name", *self.readonly_fields)
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return  # no hay nada editable
+        # crear() guarda el torneo y publica su ronda al confirmar
+        obj.__dict__.update(tournament.crear(obj.name).__dict__)
+
+    @admin.display(description="Sala")
+    def sala(self, obj):
+        if obj is None or obj.pk is None:
+            return "-"
+        url = reverse("torneo", args=[obj.pk])
+        return format_html('<a href="{}" target="_blank">{}</a>', url, url)
+
+    @admin.display(description="Respuestas de la sala")
+    def publico(self, obj):
+        if obj is None or not obj.current_question_number:
+            return "-"
+        datos = tournament.porcentajes(obj.pk, obj.current_question_number)
+        detalle = ", ".join(
+            f"{letra}: {porcentaje}%" for letra, porcentaje in zip(tournament.OPCIONES, datos["porcentajes"])
+        )
+        return f"{datos['total']} respuestas ({detalle})"
+
+    def _por_torneo(self, request, queryset, accion):
+        for obj in queryset:
+            try:
+                mensaje = accion(obj)
+            except ValueError as exc:
+                self.message_user(request, f"{obj.name}: {exc}", messages.ERROR)
+            else:
+                self.message_user(request, f"{obj.name}: {mensaje}", messages.SUCCESS)
+
+    @admin.action(description="Abrir la pregunta siguiente", permissions=["change"])
+    def abrir_pregunta(self, request, queryset):
+        def abrir(obj):
+            datos = tournament.abrir_pregunta(obj.pk)
+            return f"pregunta {datos['numero']} abierta para {datos['jugadores']} jugadores."
+        self._por_torneo(request, queryset, abrir)
+
+    @admin.action(description="Cerrar la pregunta y eliminar a quienes fallaron", permissions=["change"])
+    def cerrar_pregunta(self, request, queryset):
+        def cerrar(obj):
+            pasan, eliminados = tournament.cerrar_pregunta(obj.pk)
+            return f"{pasan} siguen en juego, {eliminados} eliminados."
+        self._por_torneo(request, queryset, cerrar)
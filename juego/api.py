@@ -0,0 +1,180 @@
+# juego/api.py
+"""
+API JSON del juego. Cada acción (iniciar, responder, ayuda) devuelve el
+estado nuevo en la misma respuesta, sin el POST/redirect/GET de las vistas
+HTML: un clic = una petición. Las reglas son las mismas de juego/game.py.
+"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from . import game, game_state, lifelines, tournament
+from .game import PREMIOS
+from .models import GameAttempt
+
+
+def _error(mensaje, status):
+    return JsonResponse({"error": mensaje}, status=status)
+
+
+def _estado(attempt, question=None, extra=None):
+    """Estado serializable del intento y de su pregunta actual."""
+    data = {
+        "attempt": {
+            "id": attempt.id,
+            "name": attempt.name,
+            "document": attempt.document,
+            "current_question_number": attempt.current_question_number,
+            "max_reached_question": attempt.max_reached_question,
+            "current_prize": attempt.current_prize,
+            "premio_nivel": game.premio_nivel(attempt),
+            "total_preguntas": len(PREMIOS),
+            "finished": attempt.finished,
+            "finished_reason": attempt.finished_reason,
+            "finished_reason_display": attempt.get_finished_reason_display() if attempt.finished else None,
+            "question_deadline": attempt.question_deadline,
+            "ayudas": {
+                "5050": attempt.used_5050,
+                "publico": attempt.used_public,
+                "amigo": attempt.used_friend,
+                "cambiar": attempt.used_switch,
+            },
+        },
+        "question": None,
+    }
+    if question is not None:
+        data["question"] = {
+            "number": attempt.current_question_number,
+            "text": question.text,
+            "options": {
+                "A": question.option_a,
+                "B": question.option_b,
+                "C": question.option_c,
+                "D": question.option_d,
+            },
+            "disabled": game.disabled_letters(attempt),
+        }
+        # Resultados del público/amigo visibles en esta pregunta (recalculados)
+        data.update(lifelines.resultados(attempt, question.id, question.correct_option))
+    data.update(extra or {})
+    return data
+
+
+def _intento_en_curso(request):
+    attempt_id = game_state.get_attempt_id(request)
+    if not attempt_id:
+        return None
+    return GameAttempt.objects.filter(id=attempt_id).first()
+
+
+def _respuesta_estado(attempt, extra=None, status=200):
+    question = None
+    if not game.expirar_si_vencido(attempt):
+        question = game.cargar_pregunta(attempt)
+        if question is not None:
+            game_state.mark_shown(attempt.id, attempt.current_question_number, question.id)
+    return JsonResponse(_estado(attempt, question, extra), status=status)
+
+
+@require_POST
+def iniciar(request):
+    name = request.POST.get("name", "").strip()
+    document = request.POST.get("document", "").strip()
+    if not name or not document:
+        return _error("El nombre y el documento son obligatorios.", 400)
+
+    attempt = game.iniciar_intento(name, document)
+    response = _respuesta_estado(attempt, status=201)
+    return game_state.set_attempt_cookie(response, attempt.id)
+
+
+@require_GET
+def estado(request):
+    attempt = _intento_en_curso(request)
+    if not attempt:
+        return _error("No hay un juego en curso.", 404)
+    return _respuesta_estado(attempt, game_state.pop_flash(attempt.id))
+
+
+@require_POST
+def responder(request):
+    attempt_id = game_state.get_attempt_id(request)
+    if not attempt_id:
+        return _error("No hay un juego en curso.", 404)
+    try:
+        numero = int(request.POST.get("question_number", ""))
+    except ValueError:
+        return _error("Falta el número de la pregunta.", 400)
+
+    resultado, attempt = game.responder(attempt_id, numero, request.POST.get("option"))
+    if resultado == game.RESPUESTA_INVALIDA:
+        return _error("Pregunta inválida.", 400)
+
+    if attempt is None:
+        attempt = GameAttempt.objects.get(id=attempt_id)
+    extra = {"resultado": resultado}
+    if resultado == game.RESPUESTA_REPETIDA:
+        # El estado actual le dice al cliente dónde está realmente el juego
+        return _respuesta_estado(attempt, extra, status=409)
+    return _respuesta_estado(attempt, extra)
+
+
+@require_POST
+def ayuda(request, nombre):
+    if nombre not in lifelines.AYUDAS:
+        return _error("Ayuda desconocida.", 404)
+    attempt_id = game_state.get_attempt_id(request)
+    if not attempt_id:
+        return _error("No hay un juego en curso.", 404)
+
+    extra = lifelines.usar(nombre, attempt_id)
+    attempt = GameAttempt.objects.filter(id=attempt_id).first()
+    if not attempt:
+        return _error("No hay un juego en curso.", 404)
+    if attempt.finished:
+        return _error("El juego ya terminó.", 409)
+    return _respuesta_estado(attempt, extra)
+
+
+# ----------------------------------------------------------------------
+# Torneo en vivo (juego/tournament.py)
+# ----------------------------------------------------------------------
+
+@require_GET
+def torneo_estado(request, torneo_id):
+    """
+    Ronda actual del torneo (desde la caché) y el estado del jugador. Una
+    vez respondida la pregunta, o cuando se cierra, incluye lo que respondió
+    la sala (``publico``).
+    """
+    attempt_id = game_state.get_tournament_attempt_id(request, torneo_id)
+    if not attempt_id:
+        return _error("No estás inscrito en este torneo.", 404)
+    attempt = GameAttempt.objects.filter(id=attempt_id).values(
+        "current_question_number", "max_reached_question", "current_prize", "finished", "finished_reason"
+    ).first()
+    ronda = tournament.ronda(torneo_id)
+    if attempt is None or ronda is None:
+        return _error("No estás inscrito en este torneo.", 404)
+
+    respondida = tournament.respuesta(torneo_id, ronda["numero"], attempt_id)
+    data = {"ronda": tournament.ronda_publica(ronda), "attempt": attempt, "respondida": respondida}
+    if "publico" not in ronda and respondida:
+        data["ronda"]["publico"] = tournament.porcentajes(torneo_id, ronda["numero"])
+    return JsonResponse(data)
+
+
+@require_POST
+def torneo_responder(request, torneo_id):
+    attempt_id = game_state.get_tournament_attempt_id(request, torneo_id)
+    if not attempt_id:
+        return _error("No estás inscrito en este torneo.", 404)
+    try:
+        numero = int(request.POST.get("question_number", ""))
+    except ValueError:
+        return _error("Falta el número de la pregunta.", 400)
+
+    resultado = tournament.responder(torneo_id, attempt_id, numero, request.POST.get("option"))
+    if resultado == game.RESPUESTA_INVALIDA:
+        return _error("Pregunta inválida.", 400)
+    status = 200 if resultado == tournament.RESPUESTA_REGISTRADA else 409
+    return JsonResponse({"resultado": resultado}, status=status)
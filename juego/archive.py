@@ -0,0 +1,179 @@
+# juego/archive.py
+"""
+Archivo de intentos terminados.
+
+``archive`` saca de la base los intentos terminados antes de una fecha
+(``GameAttempt`` y sus ``AttemptQuestion``) y los escribe en un archivo
+JSONL comprimido con gzip, una línea por intento. Trabaja por lotes con
+iteración keyset sobre el id: cada lote es una transacción corta y el lote
+se escribe (y se baja a disco) antes de borrarlo de la base.
+
+Las entradas del ranking (``LeaderboardEntry``) no se borran: se marcan
+``archived`` y el intento conserva su lugar. ``restore`` hace el camino
+inverso a partir del archivo.
+"""
+import gzip
+import json
+import os
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from . import leaderboard
+from .models import AttemptQuestion, GameAttempt, LeaderboardEntry, Question, Tournament
+
+BATCH_SIZE = 500
+
+ATTEMPT_FIELDS = (
+    "id", "name", "document", "created_at", "current_question_number",
+    "max_reached_question", "current_prize", "lifeline_flags",
+    "finished_reason", "finished", "question_deadline", "tournament_id",
+)
+QUESTION_FIELDS = (
+    "id", "question_id", "question_number", "is_spare", "replaced", "asked_at",
+    "selected_option", "is_correct", "response_ms",
+)
+
+
+def _isoformat(valor):
+    # Con microsegundos (DjangoJSONEncoder los recorta a milisegundos y el
+    # intento restaurado no volvería a su mismo lugar en el ranking)
+    return valor.isoformat()
+
+
+def _candidatos(cutoff):
+    return GameAttempt.objects.filter(finished__in=[True], created_at__lt=cutoff)
+
+
+def count(cutoff):
+    return _candidatos(cutoff).count()
+
+
+def _lotes_de_ids(cutoff, batch_size):
+    """IDs a archivar, por lotes y en orden de id (keyset, sin OFFSET)."""
+    ultimo = 0
+    while True:
+        ids = list(
+            _candidatos(cutoff).filter(id__gt=ultimo).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield ids
+        ultimo = ids[-1]
+
+
+def archive(cutoff, path, batch_size=BATCH_SIZE):
+    """
+    Archiva en ``path`` (.jsonl.gz, que no debe existir) los intentos
+    terminados creados antes de ``cutoff``. Es un generador: devuelve la
+    cantidad archivada en cada lote.
+    """
+    with gzip.open(path, "xt", encoding="utf-8") as salida:
+        for ids in _lotes_de_ids(cutoff, batch_size):
+            with transaction.atomic():
+                intentos = list(
+                    GameAttempt.objects.select_for_update().filter(id__in=ids).values(*ATTEMPT_FIELDS)
+                )
+                preguntas = {}
+                for fila in AttemptQuestion.objects.filter(attempt_id__in=ids).order_by("id").values(
+                    "attempt_id", *QUESTION_FIELDS
+                ):
+                    preguntas.setdefault(fila.pop("attempt_id"), []).append(fila)
+
+                for intento in intentos:
+                    intento["questions"] = preguntas.get(intento["id"], [])
+                    salida.write(json.dumps(intento, default=_isoformat, ensure_ascii=False) + "\n")
+                # Lo archivado tiene que estar en disco antes de borrarlo
+                salida.flush()
+                os.fsync(salida.fileno())
+
+                _asegurar_ranking(ids)
+                LeaderboardEntry.objects.filter(attempt_id__in=ids).update(archived=True)
+                AttemptQuestion.objects.filter(attempt_id__in=ids).delete()
+                GameAttempt.objects.filter(id__in=ids).delete()
+            yield len(intentos)
+    leaderboard.invalidate_first_page()
+
+
+def _asegurar_ranking(ids):
+    # Intentos terminados sin entrada (anteriores al ranking materializado
+    # o por un fallo al terminar): se crean para que no pierdan su lugar
+    existentes = set(
+        LeaderboardEntry.objects.filter(attempt_id__in=ids).values_list("attempt_id", flat=True)
+    )
+    faltantes = [i for i in ids if i not in existentes]
+    for attempt in GameAttempt.objects.filter(id__in=faltantes):
+        leaderboard.record_finished(attempt)
+
+
+def _leer(path):
+    with gzip.open(path, "rt", encoding="utf-8") as entrada:
+        for linea in entrada:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+def restore(path, batch_size=BATCH_SIZE):
+    """
+    Devuelve a la base los intentos de un archivo de ``archive``. Los que ya
+    existen se saltan. Es un generador: devuelve la cantidad restaurada en
+    cada lote.
+    """
+    lote = []
+    for intento in _leer(path):
+        lote.append(intento)
+        if len(lote) >= batch_size:
+            yield _restaurar_lote(lote)
+            lote = []
+    if lote:
+        yield _restaurar_lote(lote)
+    leaderboard.invalidate_first_page()
+
+
+def _restaurar_lote(lote):
+    ids = [i["id"] for i in lote]
+    existentes = set(GameAttempt.objects.filter(id__in=ids).values_list("id", flat=True))
+    lote = [i for i in lote if i["id"] not in existentes]
+    if not lote:
+        return 0
+
+    # Las preguntas borradas desde entonces se pierden (igual que con el
+    # CASCADE de AttemptQuestion.question)
+    question_ids = {q["question_id"] for i in lote for q in i["questions"]}
+    vigentes = set(Question.objects.filter(id__in=question_ids).values_list("id", flat=True))
+    # Y los torneos borrados quedan en NULL (igual que con el SET_NULL)
+    tournament_ids = {i["tournament_id"] for i in lote if i.get("tournament_id")}
+    torneos = set(Tournament.objects.filter(id__in=tournament_ids).values_list("id", flat=True))
+
+    # Los campos que no están en archivos de versiones anteriores quedan con
+    # el valor por defecto del modelo
+    intentos, preguntas = [], []
+    for datos in lote:
+        campos = {f: datos[f] for f in ATTEMPT_FIELDS if f in datos}
+        campos["created_at"] = parse_datetime(campos["created_at"])
+        if campos.get("question_deadline"):
+            campos["question_deadline"] = parse_datetime(campos["question_deadline"])
+        if campos.get("tournament_id") not in torneos:
+            campos["tournament_id"] = None
+        intentos.append(GameAttempt(**campos))
+        for q in datos["questions"]:
+            if q["question_id"] in vigentes:
+                campos = {f: q[f] for f in QUESTION_FIELDS if f in q}
+                campos["asked_at"] = parse_datetime(campos["asked_at"])
+                preguntas.append(AttemptQuestion(attempt_id=datos["id"], **campos))
+
+    # bulk_create pisa los campos auto_now_add con la hora actual; se
+    # devuelven las fechas originales con bulk_update, que no los toca
+    creados = [a.created_at for a in intentos]
+    preguntados = [q.asked_at for q in preguntas]
+    with transaction.atomic():
+        GameAttempt.objects.bulk_create(intentos)
+        AttemptQuestion.objects.bulk_create(preguntas)
+        for attempt, fecha in zip(intentos, creados):
+            attempt.created_at = fecha
+        for aq, fecha in zip(preguntas, preguntados):
+            aq.asked_at = fecha
+        GameAttempt.objects.bulk_update(intentos, ["created_at"])
+        AttemptQuestion.objects.bulk_update(preguntas, ["asked_at"])
+        LeaderboardEntry.objects.filter(attempt_id__in=[a.id for a in intentos]).update(archived=False)
+    return len(intentos)
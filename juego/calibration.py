@@ -0,0 +1,126 @@
+# juego/calibration.py
+"""
+Calibración de la dificultad de las preguntas a partir de la telemetría de
+las respuestas (``AttemptQuestion.selected_option/is_correct/response_ms``,
+ver juego/telemetry.py).
+
+``rebuild`` recorre las respuestas en streaming, ordenadas por pregunta
+(``.iterator(chunk_size=...)``), y guarda por pregunta una fila
+``QuestionStats``: tasa de acierto e histograma de tiempos de respuesta con
+percentiles aproximados. La memoria no depende de cuántas respuestas haya:
+solo se acumula la pregunta en curso (contadores y un histograma de tamaño
+fijo) y un lote de filas por escribir.
+
+Una pregunta queda ``miscalibrated`` cuando tiene al menos ``min_answers``
+respuestas y su tasa de acierto cae en la banda de otra dificultad.
+"""
+from bisect import bisect_left
+
+from django.utils import timezone
+
+from .models import AttemptQuestion, Difficulty, QuestionStats
+
+BATCH_SIZE = 1000
+MIN_ANSWERS = 30
+
+# Límite superior (ms, inclusive) de cada rango del histograma; el último
+# rango junta todo lo que pase de 60 s
+LATENCY_BUCKETS_MS = (1000, 2000, 3000, 5000, 8000, 13000, 21000, 34000, 60000)
+
+# Tasa de acierto mínima de cada dificultad, de la más fácil a la más difícil
+ACCURACY_FLOOR = (
+    (Difficulty.EASY, 0.70),
+    (Difficulty.MEDIUM, 0.40),
+    (Difficulty.HARD, 0.0),
+)
+
+
+def difficulty_for_accuracy(accuracy):
+    """Dificultad que corresponde a una tasa de acierto."""
+    for dificultad, minimo in ACCURACY_FLOOR:
+        if accuracy >= minimo:
+            return dificultad
+    return Difficulty.HARD
+
+
+def _percentil(histograma, total, fraccion):
+    """Límite del rango del histograma donde cae el percentil (aproximado)."""
+    objetivo = fraccion * total
+    acumulado = 0
+    for i, cantidad in enumerate(histograma):
+        acumulado += cantidad
+        if acumulado >= objetivo:
+            if i < len(LATENCY_BUCKETS_MS):
+                return LATENCY_BUCKETS_MS[i]
+            return LATENCY_BUCKETS_MS[-1]
+    return None
+
+
+class _Acumulado:
+    """Contadores de una pregunta mientras se recorren sus respuestas."""
+
+    def __init__(self, question_id, difficulty):
+        self.question_id = question_id
+        self.difficulty = difficulty
+        self.answers = 0
+        self.correct = 0
+        self.timed = 0
+        self.total_ms = 0
+        self.histograma = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, is_correct, response_ms):
+        self.answers += 1
+        self.correct += is_correct
+        if response_ms is not None:
+            self.timed += 1
+            self.total_ms += response_ms
+            self.histograma[bisect_left(LATENCY_BUCKETS_MS, response_ms)] += 1
+
+    def stats(self, min_answers, now):
+        accuracy = self.correct / self.answers
+        sugerida = difficulty_for_accuracy(accuracy)
+        return QuestionStats(
+            question_id=self.question_id,
+            answers=self.answers,
+            correct=self.correct,
+            accuracy=accuracy,
+            timed_answers=self.timed,
+            mean_ms=round(self.total_ms / self.timed) if self.timed else None,
+            p50_ms=_percentil(self.histograma, self.timed, 0.5) if self.timed else None,
+            p90_ms=_percentil(self.histograma, self.timed, 0.9) if self.timed else None,
+            latency_histogram=self.histograma,
+            suggested_difficulty=sugerida,
+            miscalibrated=self.answers >= min_answers and sugerida != self.difficulty,
+            computed_at=now,
+        )
+
+
+def rebuild(min_answers=MIN_ANSWERS, batch_size=BATCH_SIZE):
+    """
+    Recalcula ``QuestionStats`` desde cero. Devuelve ``(preguntas, mal
+    calibradas)``.
+    """
+    now = timezone.now()
+    total = mal = 0
+    QuestionStats.objects.all().delete()
+
+    batch = []
+    actual = None
+    filas = AttemptQuestion.objects.filter(is_correct__isnull=False).order_by("question_id").values_list(
+        "question_id", "question__difficulty", "is_correct", "response_ms"
+    )
+    for question_id, difficulty, is_correct, ms in filas.iterator(chunk_size=batch_size):
+        if actual is None or actual.question_id != question_id:
+            if actual is not None:
+                batch.append(actual.stats(min_answers, now))
+            actual = _Acumulado(question_id, difficulty)
+        actual.add(is_correct, ms)
+        if len(batch) >= batch_size:
+            QuestionStats.objects.bulk_create(batch)
+            total += len(batch)
+            mal += sum(s.miscalibrated for s in batch)
+            batch = []
+    if actual is not None:
+        batch.append(actual.stats(min_answers, now))
+    QuestionStats.objects.bulk_create(batch)
+    return total + len(batch), mal + sum(s.miscalibrated for s in batch)
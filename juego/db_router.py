@@ -0,0 +1,93 @@
+# juego/db_router.py
+"""
+Lecturas en la réplica.
+
+Con una réplica configurada (``settings.JUEGO_READ_REPLICA``, ver
+settings.py) las lecturas de los modelos de ``juego`` que no necesitan estar
+al día salen de la réplica y no compiten con las escrituras de la primaria:
+
+- las vistas de ``REPLICA_VIEWS`` (ranking) y los listados del admin, que
+  ``ReadReplicaMiddleware`` marca al resolver la URL;
+- los comandos de reportes y estadísticas, dentro de ``lecturas_en_replica()``.
+
+Todo lo demás, empezando por el ciclo de juego, se queda en la primaria.
+Las escrituras siempre van a la primaria y, después de escribir un modelo,
+las lecturas de ese modelo en la misma request vuelven a la primaria
+("read-your-writes"). Entre requests, ``ReadReplicaMiddleware`` deja una
+cookie corta que manda a la primaria a quien acaba de escribir un modelo
+de ``juego`` (guardar la sesión no cuenta: no cambia lo que sale de la
+réplica).
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Vistas (nombre de la URL) que leen de la réplica
+REPLICA_VIEWS = {"ranking", "ranking_api", "ranking_cache_stats"}
+
+PRIMARY_COOKIE = "juego_primaria"
+
+_estado = contextvars.ContextVar("juego_db_estado", default=None)
+
+
+class _Estado:
+    def __init__(self, replica):
+        self.replica = replica
+        self.escritos = set()  # modelos escritos en esta request o comando
+
+    @property
+    def escribio_juego(self):
+        """Si se escribió algún modelo de ``juego`` (no cuentan sesiones ni usuarios)."""
+        return any(label.startswith("juego.") for label in self.escritos)
+
+
+def replica_alias():
+    """Alias de la réplica, o None si no hay."""
+    return settings.JUEGO_READ_REPLICA or None
+
+
+@contextmanager
+def lecturas_en_replica(activa=True):
+    """
+    Las lecturas de ``juego`` dentro del bloque van a la réplica (si hay y
+    ``activa``). Devuelve el estado, para saber qué se escribió.
+    """
+    estado = _Estado(activa)
+    token = _estado.set(estado)
+    try:
+        yield estado
+    finally:
+        _estado.reset(token)
+
+
+def usar_replica(activa=True):
+    """Cambia el destino de las lecturas del bloque actual (para el middleware)."""
+    estado = _estado.get()
+    if estado is not None:
+        estado.replica = activa
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        estado = _estado.get()
+        if not alias or estado is None or not estado.replica:
+            return None
+        # Sesiones, usuarios y el resto de Django siempre en la primaria
+        if model._meta.app_label != "juego":
+            return None
+        if model._meta.label in estado.escritos:
+            return "default"
+        return alias
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado.escritos.add(model._meta.label)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica es una copia de la primaria
+        return True
@@ -0,0 +1,120 @@
+# juego/fragments.py
+"""
+Caché del bloque HTML de la pregunta (texto + cuatro opciones) de jugar.
+
+La clave combina el id de la pregunta, un contador de versión que se
+incrementa cada vez que se guarda o borra la ``Question`` (señales en
+juego.signals) y las letras deshabilitadas por el 50:50. Un acierto en la
+caché evita tanto leer la fila ``Question`` como renderizar el bloque.
+
+La escalera de premios no depende de la base: su HTML se renderiza una vez
+por proceso para cada pregunta actual (``escalera``) y se guarda en memoria.
+"""
+import functools
+import time
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import game
+from .models import Question
+
+FRAGMENT_TIMEOUT = 60 * 60
+VERSION_TIMEOUT = None  # las versiones no deben expirar antes que los fragmentos
+
+
+def _version_key(question_id):
+    return f"juego:pregunta:{question_id}:version"
+
+
+def _nueva_version():
+    # Si la versión se pierde de la caché (desalojo, reinicio) no puede
+    # volver a un número ya usado, o se servirían fragmentos viejos.
+    return time.time_ns()
+
+
+def question_version(question_id):
+    key = _version_key(question_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _nueva_version(), VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+async def aquestion_version(question_id):
+    key = _version_key(question_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _nueva_version(), VERSION_TIMEOUT)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(question_id):
+    """Invalida todos los fragmentos de la pregunta."""
+    key = _version_key(question_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _nueva_version(), VERSION_TIMEOUT)
+
+
+def _fragment_key(question_id, version, disabled_letters):
+    letras = "".join(sorted(disabled_letters)) or "-"
+    return f"juego:bloque:{question_id}:v{version}:d{letras}"
+
+
+def question_block(question_id, disabled_letters=()):
+    """
+    Devuelve ``{"text": ..., "opciones": html, "correct_option": ...}`` para
+    la pregunta, desde la caché si es posible. La opción correcta no se
+    muestra; sirve para recalcular los resultados de las ayudas
+    (juego/lifelines.py) sin leer la pregunta. Solo en un fallo se lee la ``Question`` y se
+    renderiza ``juego/_opciones.html``.
+    """
+    key = _fragment_key(question_id, question_version(question_id), disabled_letters)
+    bloque = cache.get(key)
+    if bloque is None:
+        bloque = _render(Question.objects.get(id=question_id), disabled_letters)
+        cache.set(key, bloque, FRAGMENT_TIMEOUT)
+    return {**bloque, "opciones": mark_safe(bloque["opciones"])}
+
+
+async def aquestion_block(question_id, disabled_letters=()):
+    key = _fragment_key(question_id, await aquestion_version(question_id), disabled_letters)
+    bloque = await cache.aget(key)
+    if bloque is None:
+        bloque = _render(await Question.objects.aget(id=question_id), disabled_letters)
+        await cache.aset(key, bloque, FRAGMENT_TIMEOUT)
+    return {**bloque, "opciones": mark_safe(bloque["opciones"])}
+
+
+def _render(question, disabled_letters):
+    return {
+        "text": question.text,
+        "correct_option": question.correct_option,
+        "opciones": render_to_string("juego/_opciones.html", {
+            "question": question,
+            "disabled_letters": list(disabled_letters),
+        }),
+    }
+
+
+def escalera(numero_actual):
+    """
+    HTML de la escalera de premios con ``numero_actual`` marcada. Hay a lo
+    sumo 16 (ver ``game.ESCALERAS``); cada una se renderiza la primera vez
+    que se pide y queda en memoria hasta reiniciar el proceso.
+    """
+    if numero_actual not in game.ESCALERAS:
+        numero_actual = 0
+    return _escalera_html(numero_actual)
+
+
+@functools.cache
+def _escalera_html(numero_actual):
+    return mark_safe(render_to_string("juego/_escalera.html", {
+        "escalera": game.escalera(numero_actual),
+    }))
@@ -0,0 +1,417 @@
+# juego/game.py
+"""
+Reglas del juego compartidas por las vistas HTML (juego/views.py) y la API
+JSON (juego/api.py): creación del intento, pregunta actual, respuestas y
+ayudas (estas en juego/lifelines.py). Aquí no se habla de requests ni de
+respuestas HTTP.
+
+Las funciones con prefijo ``a`` (``aresponder``, ``acargar_pregunta_id``...)
+son las versiones para las vistas async de juego/views_async.py y usan el
+ORM async.
+Lo que necesita ``transaction.atomic`` (que no tiene versión async) pasa por
+``sync_to_async``.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from . import game_state, leaderboard, question_pool, telemetry
+from .models import AttemptQuestion, GameAttempt, Question
+
+PREMIOS = [100, 200, 300, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 125000, 250000, 500000, 1000000 ]
+
+# Números de pregunta de cada dificultad, en el mismo orden que
+# GameAttempt.get_current_difficulty: {EASY: [1..5], MEDIUM: [6..10], HARD: [11..15]}
+NIVELES = {}
+for _numero in range(1, len(PREMIOS) + 1):
+    NIVELES.setdefault(GameAttempt.difficulty_for(_numero), []).append(_numero)
+
+# Escalera de premios de jugar, de la pregunta 15 a la 1. Solo hay una por
+# pregunta actual, así que se arman todas al importar y las vistas las
+# comparten (son tuplas: nadie puede modificarlas). La 0 no marca ninguna.
+Peldano = namedtuple("Peldano", "numero premio es_actual")
+ESCALERAS = {
+    actual: tuple(
+        Peldano(numero, PREMIOS[numero - 1], numero == actual)
+        for numero in range(len(PREMIOS), 0, -1)
+    )
+    for actual in range(len(PREMIOS) + 1)
+}
+
+
+def escalera(numero_actual):
+    """Escalera precalculada con ``numero_actual`` marcada."""
+    return ESCALERAS.get(numero_actual, ESCALERAS[0])
+
+# Resultado de responder()
+RESPUESTA_INVALIDA = "invalida"      # no hay pregunta con ese número
+RESPUESTA_REPETIDA = "repetida"      # doble envío, otra pestaña o juego terminado
+RESPUESTA_CORRECTA = "correcta"
+RESPUESTA_INCORRECTA = "incorrecta"
+RESPUESTA_TIEMPO = "tiempo"          # llegó después del plazo: el intento terminó
+
+# Margen sobre el plazo para la latencia de la red
+PLAZO_GRACIA = timedelta(seconds=2)
+
+
+def nuevo_plazo():
+    """Plazo para responder una pregunta que se muestra ahora."""
+    return timezone.now() + timedelta(seconds=settings.JUEGO_ANSWER_SECONDS)
+
+
+def vencido(deadline, now=None):
+    return deadline is not None and (now or timezone.now()) > deadline + PLAZO_GRACIA
+
+
+def _sortear_escalera(attempt):
+    """
+    Sortea de una vez las preguntas de todo el intento: una por número de
+    la escalera más una de repuesto por dificultad para "Cambiar de
+    pregunta". Todo se guarda en un único bulk_create de AttemptQuestion.
+    """
+    sorteo = {}
+    for _ in range(2):
+        sorteo = {
+            dificultad: question_pool.sample_ids(dificultad, len(numeros) + 1)
+            for dificultad, numeros in NIVELES.items()
+        }
+        ids = [qid for qids in sorteo.values() for qid in qids]
+        activas = set(
+            Question.objects.filter(id__in=ids, is_active=True).values_list("id", flat=True)
+        )
+        if len(activas) == len(ids):
+            break
+        # El pool de este proceso estaba desactualizado; se recarga y se
+        # vuelve a sortear una vez. Si aun así falla, se descartan las malas.
+        question_pool.invalidate()
+        sorteo = {d: [q for q in qids if q in activas] for d, qids in sorteo.items()}
+
+    filas = []
+    for dificultad, numeros in NIVELES.items():
+        qids = sorteo[dificultad]
+        for numero, qid in zip(numeros, qids):
+            filas.append(AttemptQuestion(attempt=attempt, question_id=qid, question_number=numero))
+        if len(qids) > len(numeros):
+            filas.append(AttemptQuestion(
+                attempt=attempt,
+                question_id=qids[len(numeros)],
+                question_number=numeros[0],
+                is_spare=True,
+            ))
+    AttemptQuestion.objects.bulk_create(filas)
+
+
+def iniciar_intento(name, document):
+    """Crea el intento y sortea toda su escalera de preguntas."""
+    with transaction.atomic():
+        attempt = GameAttempt.objects.create(
+            name=name,
+            document=document,
+            current_question_number=1,
+            max_reached_question=0,
+            current_prize=0,
+            question_deadline=nuevo_plazo(),
+        )
+        _sortear_escalera(attempt)
+    return attempt
+
+
+async def ainiciar_intento(name, document):
+    return await sync_to_async(iniciar_intento)(name, document)
+
+
+def _fila_actual(attempt):
+    return AttemptQuestion.objects.filter(
+        attempt=attempt,
+        question_number=attempt.current_question_number,
+        is_spare=False
+    )
+
+
+def pregunta_actual(attempt):
+    """Pregunta sorteada para el número actual del intento (o None)."""
+    fila = _fila_actual(attempt).select_related("question").first()
+    return fila.question if fila else None
+
+
+def pregunta_actual_id(attempt):
+    """Solo el id de la pregunta actual, sin leer la fila ``Question``."""
+    return _fila_actual(attempt).values_list("question_id", flat=True).first()
+
+
+async def apregunta_actual_id(attempt):
+    return await _fila_actual(attempt).values_list("question_id", flat=True).afirst()
+
+
+def _terminar_sin_preguntas(attempt):
+    # No alcanzaron las preguntas de esta dificultad al sortear
+    attempt.finished = True
+    attempt.finished_reason = "WIN"
+    attempt.save()
+    leaderboard.record_finished(attempt)
+
+
+def cargar_pregunta(attempt):
+    """
+    Devuelve la pregunta actual. Si no alcanzaron las preguntas de esta
+    dificultad al sortear, el intento termina (como ganador) y devuelve None.
+    """
+    question = pregunta_actual(attempt)
+    if question is None:
+        _terminar_sin_preguntas(attempt)
+    return question
+
+
+def cargar_pregunta_id(attempt):
+    """Igual que ``cargar_pregunta`` pero devuelve solo el id."""
+    question_id = pregunta_actual_id(attempt)
+    if question_id is None:
+        _terminar_sin_preguntas(attempt)
+    return question_id
+
+
+async def acargar_pregunta_id(attempt):
+    question_id = await apregunta_actual_id(attempt)
+    if question_id is None:
+        await sync_to_async(_terminar_sin_preguntas)(attempt)
+    return question_id
+
+
+def _expirar(attempt_id, numero):
+    """
+    UPDATE condicional que termina el intento por tiempo si sigue en la
+    pregunta ``numero``. Como ``_registrar_respuesta``, devuelve el queryset
+    sin ejecutar y los cambios.
+    """
+    qs = GameAttempt.objects.filter(id=attempt_id, current_question_number=numero, finished=False)
+    return qs, {"finished": True, "finished_reason": "TIME"}
+
+
+def expirar_si_vencido(attempt):
+    """
+    Chequeo perezoso del plazo con el intento ya leído (sin consultas si no
+    venció). Si venció lo termina por tiempo y lo pasa al ranking; devuelve
+    True si el intento quedó terminado.
+    """
+    if attempt.finished or not vencido(attempt.question_deadline):
+        return attempt.finished
+    qs, cambios = _expirar(attempt.id, attempt.current_question_number)
+    if qs.update(**cambios):
+        for campo, valor in cambios.items():
+            setattr(attempt, campo, valor)
+    else:
+        # Otra request lo cambió entre medio
+        attempt.refresh_from_db()
+    leaderboard.record_finished(attempt)
+    return attempt.finished
+
+
+async def aexpirar_si_vencido(attempt):
+    if attempt.finished or not vencido(attempt.question_deadline):
+        return attempt.finished
+    qs, cambios = _expirar(attempt.id, attempt.current_question_number)
+    if await qs.aupdate(**cambios):
+        for campo, valor in cambios.items():
+            setattr(attempt, campo, valor)
+    else:
+        await attempt.arefresh_from_db()
+    await sync_to_async(leaderboard.record_finished)(attempt)
+    return attempt.finished
+
+
+# ----------------------------------------------------------------------
+# Barrido de intentos vencidos (comando expire_attempts)
+# ----------------------------------------------------------------------
+
+# Intentos sin plazo (anteriores a question_deadline) que se dan por
+# abandonados después de este tiempo
+ABANDONO = timedelta(hours=24)
+BARRIDO_BATCH_SIZE = 500
+
+
+def vencidos(now=None, abandono=ABANDONO):
+    """
+    Intentos en juego con el plazo vencido o abandonados. Los de un torneo
+    no tienen plazo propio y los termina ``tournament.cerrar_pregunta``.
+    """
+    now = now or timezone.now()
+    # finished__in: con finished=False Django compila "NOT finished" y el
+    # motor no usa juego_attempt_plazo_idx (ver leaderboard.live_queryset)
+    return GameAttempt.objects.filter(finished__in=[False]).filter(
+        Q(question_deadline__lt=now - PLAZO_GRACIA)
+        | Q(question_deadline__isnull=True, tournament__isnull=True, created_at__lt=now - abandono)
+    )
+
+
+def expirar_vencidos(now=None, abandono=ABANDONO, batch_size=BARRIDO_BATCH_SIZE):
+    """
+    Termina los intentos de ``vencidos``: ``TIME`` si tenían plazo, ``QUIT``
+    si no. Cada lote es un único UPDATE sobre un rango de ids (keyset) y un
+    alta en bloque en el ranking. Es un generador: devuelve la cantidad
+    terminada en cada lote.
+    """
+    now = now or timezone.now()
+    ultimo = 0
+    while True:
+        with transaction.atomic():
+            # skip_locked: los intentos que alguien está respondiendo ahora
+            # se dejan para la próxima pasada
+            ids = list(
+                vencidos(now, abandono).select_for_update(skip_locked=True)
+                .filter(id__gt=ultimo).order_by("id").values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return
+            terminados = vencidos(now, abandono).filter(id__in=ids).update(
+                finished=True,
+                finished_reason=Case(
+                    When(question_deadline__isnull=True, then=Value("QUIT")),
+                    default=Value("TIME"),
+                ),
+            )
+            leaderboard.record_finished_many(list(GameAttempt.objects.filter(id__in=ids, finished=True)))
+        ultimo = ids[-1]
+        yield terminados
+
+
+def premio_nivel(attempt):
+    idx = attempt.current_question_number - 1
+    if 0 <= idx < len(PREMIOS):
+        return PREMIOS[idx]
+    return 0
+
+
+def disabled_letters(attempt):
+    return attempt.disabled_letters
+
+
+def _opcion_correcta(attempt_id, numero):
+    """
+    (id de la fila AttemptQuestion, id de la pregunta, opción correcta,
+    plazo del intento), en una consulta.
+    """
+    return AttemptQuestion.objects.filter(
+        attempt_id=attempt_id,
+        question_number=numero,
+        is_spare=False
+    ).values_list("id", "question_id", "question__correct_option", "attempt__question_deadline")
+
+
+def _registrar_respuesta(attempt_id, numero, correcta):
+    """
+    Aplica la respuesta a la pregunta ``numero`` con un único UPDATE
+    condicional: solo afecta al intento si sigue en esa pregunta y no ha
+    terminado. El queryset se devuelve sin ejecutar junto con los cambios,
+    para llamar ``update`` o ``aupdate``; el resultado es la cantidad de
+    filas actualizadas (0 = respuesta repetida o vieja, por ejemplo un doble
+    envío o una segunda pestaña).
+    """
+    cambios = {
+        "max_reached_question": numero,
+        # El 50:50 y los resultados visibles eran de esta pregunta
+        "lifeline_flags": F("lifeline_flags").bitand(GameAttempt.LIFELINE_USED_MASK),
+    }
+    if correcta:
+        cambios["current_prize"] = PREMIOS[numero - 1]
+        cambios["current_question_number"] = F("current_question_number") + 1
+        cambios["question_deadline"] = nuevo_plazo()
+        if numero >= len(PREMIOS):
+            cambios["finished"] = True
+            cambios["finished_reason"] = "WIN"
+    else:
+        cambios["finished"] = True
+        cambios["finished_reason"] = "LOSE"
+
+    qs = GameAttempt.objects.filter(
+        id=attempt_id,
+        current_question_number=numero,
+        finished=False
+    )
+    return qs, cambios
+
+
+def _resultado(correcta):
+    return RESPUESTA_CORRECTA if correcta else RESPUESTA_INCORRECTA
+
+
+def _termina(numero, correcta):
+    return not correcta or numero >= len(PREMIOS)
+
+
+def responder(attempt_id, numero, selected):
+    """
+    Responde la pregunta ``numero`` del intento con la opción ``selected``.
+
+    Devuelve ``(resultado, attempt)``: ``attempt`` solo se lee de la base
+    cuando el juego termina (para el ranking); en otro caso es None. La
+    respuesta queda en la telemetría (``juego.telemetry``). Si llega después
+    del plazo de la pregunta, el intento termina por tiempo
+    (``RESPUESTA_TIEMPO``) sin contar la respuesta.
+    """
+    if not 1 <= numero <= len(PREMIOS):
+        return RESPUESTA_INVALIDA, None
+
+    fila = _opcion_correcta(attempt_id, numero).first()
+    if fila is None:
+        return RESPUESTA_INVALIDA, None
+    aq_id, question_id, correct_option, deadline = fila
+
+    if vencido(deadline):
+        # El UPDATE que termina por tiempo reemplaza al de la respuesta
+        qs, cambios = _expirar(attempt_id, numero)
+        if not qs.update(**cambios):
+            return RESPUESTA_REPETIDA, None
+        attempt = GameAttempt.objects.get(id=attempt_id)
+        leaderboard.record_finished(attempt)
+        return RESPUESTA_TIEMPO, attempt
+
+    correcta = selected == correct_option
+    qs, cambios = _registrar_respuesta(attempt_id, numero, correcta)
+    if not qs.update(**cambios):
+        return RESPUESTA_REPETIDA, None
+    # Telemetría: al buffer, sin otra consulta (ver juego/telemetry.py)
+    shown = game_state.shown_at(attempt_id, numero, question_id)
+    telemetry.record(aq_id, selected, correcta, telemetry.response_ms(shown))
+    if not _termina(numero, correcta):
+        return _resultado(correcta), None
+
+    attempt = GameAttempt.objects.get(id=attempt_id)
+    leaderboard.record_finished(attempt)
+    return _resultado(correcta), attempt
+
+
+async def aresponder(attempt_id, numero, selected):
+    """Versión async de ``responder``."""
+    if not 1 <= numero <= len(PREMIOS):
+        return RESPUESTA_INVALIDA, None
+
+    fila = await _opcion_correcta(attempt_id, numero).afirst()
+    if fila is None:
+        return RESPUESTA_INVALIDA, None
+    aq_id, question_id, correct_option, deadline = fila
+
+    if vencido(deadline):
+        qs, cambios = _expirar(attempt_id, numero)
+        if not await qs.aupdate(**cambios):
+            return RESPUESTA_REPETIDA, None
+        attempt = await GameAttempt.objects.aget(id=attempt_id)
+        await sync_to_async(leaderboard.record_finished)(attempt)
+        return RESPUESTA_TIEMPO, attempt
+
+    correcta = selected == correct_option
+    qs, cambios = _registrar_respuesta(attempt_id, numero, correcta)
+    if not await qs.aupdate(**cambios):
+        return RESPUESTA_REPETIDA, None
+    shown = await game_state.ashown_at(attempt_id, numero, question_id)
+    telemetry.record(aq_id, selected, correcta, telemetry.response_ms(shown))
+    if not _termina(numero, correcta):
+        return _resultado(correcta), None
+
+    attempt = await GameAttempt.objects.aget(id=attempt_id)
+    await sync_to_async(leaderboard.record_finished)(attempt)
+    return _resultado(correcta), attempt
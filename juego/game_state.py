@@ -0,0 +1,157 @@
+# juego/game_state.py
+"""
+Estado del juego fuera de ``django_session``.
+
+- El intento en curso se identifica con una cookie firmada (sin tocar la
+  base de datos para leerla).
+- El estado transitorio de cada intento (resultado de las ayudas, mensajes
+  informativos) vive en la caché de Django bajo una clave por intento y se
+  consume una sola vez en ``jugar``.
+
+- El momento en que se mostró cada pregunta, para medir en el servidor el
+  tiempo de respuesta (ver juego/telemetry.py).
+
+Lo único durable es la fila ``GameAttempt``. Con esto el ciclo
+responder/redirigir/jugar no lee ni escribe la sesión.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signing import BadSignature
+
+ATTEMPT_COOKIE = "juego_intento"
+ATTEMPT_COOKIE_SALT = "juego.game_state.intento"
+ATTEMPT_COOKIE_MAX_AGE = 60 * 60 * 24  # un día
+
+# Jugador de un torneo en vivo: "torneo:intento", aparte de la cookie del
+# juego individual (ver juego/tournament.py)
+TOURNAMENT_COOKIE = "juego_torneo"
+TOURNAMENT_COOKIE_SALT = "juego.game_state.torneo"
+
+STATE_TIMEOUT = 60 * 60  # segundos que se conserva el estado transitorio
+
+
+def get_attempt_id(request):
+    """ID del intento en curso según la cookie firmada, o None."""
+    try:
+        value = request.get_signed_cookie(
+            ATTEMPT_COOKIE,
+            default=None,
+            salt=ATTEMPT_COOKIE_SALT,
+            max_age=ATTEMPT_COOKIE_MAX_AGE,
+        )
+    except BadSignature:
+        return None
+    if not value or not value.isdigit():
+        return None
+    return int(value)
+
+
+def set_attempt_cookie(response, attempt_id):
+    response.set_signed_cookie(
+        ATTEMPT_COOKIE,
+        str(attempt_id),
+        salt=ATTEMPT_COOKIE_SALT,
+        max_age=ATTEMPT_COOKIE_MAX_AGE,
+        httponly=True,
+        samesite="Lax",
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+    return response
+
+
+def get_tournament_attempt_id(request, tournament_id):
+    """ID del intento del jugador en el torneo ``tournament_id``, o None."""
+    try:
+        value = request.get_signed_cookie(
+            TOURNAMENT_COOKIE,
+            default=None,
+            salt=TOURNAMENT_COOKIE_SALT,
+            max_age=ATTEMPT_COOKIE_MAX_AGE,
+        )
+    except BadSignature:
+        return None
+    torneo, _, attempt_id = (value or "").partition(":")
+    if torneo != str(tournament_id) or not attempt_id.isdigit():
+        return None
+    return int(attempt_id)
+
+
+def set_tournament_cookie(response, tournament_id, attempt_id):
+    response.set_signed_cookie(
+        TOURNAMENT_COOKIE,
+        f"{tournament_id}:{attempt_id}",
+        salt=TOURNAMENT_COOKIE_SALT,
+        max_age=ATTEMPT_COOKIE_MAX_AGE,
+        httponly=True,
+        samesite="Lax",
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+    return response
+
+
+def _state_key(attempt_id):
+    return f"juego:estado:{attempt_id}"
+
+
+def flash(attempt_id, **values):
+    """Guarda valores que ``jugar`` mostrará una sola vez."""
+    key = _state_key(attempt_id)
+    state = cache.get(key) or {}
+    state.update(values)
+    cache.set(key, state, STATE_TIMEOUT)
+
+
+def pop_flash(attempt_id):
+    """Devuelve (y borra) el estado transitorio del intento."""
+    key = _state_key(attempt_id)
+    state = cache.get(key)
+    if state:
+        cache.delete(key)
+    return state or {}
+
+
+async def aflash(attempt_id, **values):
+    key = _state_key(attempt_id)
+    state = await cache.aget(key) or {}
+    state.update(values)
+    await cache.aset(key, state, STATE_TIMEOUT)
+
+
+async def apop_flash(attempt_id):
+    key = _state_key(attempt_id)
+    state = await cache.aget(key)
+    if state:
+        await cache.adelete(key)
+    return state or {}
+
+
+# ----------------------------------------------------------------------
+# Momento en que se mostró cada pregunta (para la telemetría)
+# ----------------------------------------------------------------------
+
+def _shown_key(attempt_id, numero, question_id):
+    # Con el id de la pregunta: "Cambiar de pregunta" reinicia el tiempo
+    return f"juego:mostrada:{attempt_id}:{numero}:{question_id}"
+
+
+def mark_shown(attempt_id, numero, question_id):
+    """
+    Anota cuándo se mostró la pregunta por primera vez. ``cache.add`` no
+    pisa una marca existente: recargar la página no reinicia el tiempo.
+    """
+    cache.add(_shown_key(attempt_id, numero, question_id), time.time(), STATE_TIMEOUT)
+
+
+def shown_at(attempt_id, numero, question_id):
+    """Segundos (epoch) en que se mostró la pregunta, o None."""
+    return cache.get(_shown_key(attempt_id, numero, question_id))
+
+
+async def amark_shown(attempt_id, numero, question_id):
+    await cache.aadd(_shown_key(attempt_id, numero, question_id), time.time(), STATE_TIMEOUT)
+
+
+async def ashown_at(attempt_id, numero, question_id):
+    return await cache.aget(_shown_key(attempt_id, numero, question_id))
@@ -0,0 +1,525 @@
+# juego/leaderboard.py
+"""
+Ranking materializado.
+
+Cada intento terminado se copia a ``LeaderboardEntry`` en el momento en que
+termina (``record_finished``). El ranking se lee de esa tabla, ordenada por
+su propio índice, en lugar de ordenar toda la tabla ``GameAttempt``.
+
+La primera página (podio + tabla) se guarda además en la caché con
+semántica stale-while-revalidate: ver ``first_page``.
+
+El ranking por jugador (mejor resultado de cada ``document``) se lee de
+``PlayerStats``, que también se actualiza en ``record_finished``.
+
+Cada intento terminado se anuncia además en la caché (``publish_finished``)
+para el ranking en vivo de juego/ranking_live.py.
+"""
+from django.core import signing
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import GameAttempt, LeaderboardEntry, PlayerStats
+
+# Orden del ranking:
+#   1) pregunta máxima alcanzada (desc)
+#   2) premio actual (desc)
+#   3) fecha de creación (asc)
+#   4) id del intento, para desempatar de forma estable
+ORDERING = ("-max_reached_question", "-current_prize", "created_at", "attempt_id")
+LIVE_ORDERING = ("-max_reached_question", "-current_prize", "created_at", "id")
+
+REBUILD_BATCH_SIZE = 1000
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+CURSOR_SALT = "juego.leaderboard.cursor"
+
+# Ranking por jugador: mejor pregunta, mejor premio, quién lo logró primero
+PLAYER_ORDERING = ("-best_max_reached_question", "-best_prize", "best_at", "id")
+PLAYER_CURSOR_SALT = "juego.leaderboard.cursor.jugadores"
+_DATE_FIELDS = {"created_at", "best_at"}
+
+# Caché de la primera página
+FIRST_PAGE_KEY = "juego:ranking:primera"
+FIRST_PAGE_FRESH_KEY = "juego:ranking:primera:fresca"
+FIRST_PAGE_CUTOFF_KEY = "juego:ranking:primera:corte"
+FIRST_PAGE_LOCK_KEY = "juego:ranking:primera:lock"
+FIRST_PAGE_FRESH_SECONDS = 10     # ventana en la que la copia se sirve sin más
+FIRST_PAGE_TIMEOUT = 60 * 60      # después de esto ya ni siquiera se sirve vieja
+FIRST_PAGE_LOCK_SECONDS = 30      # por si el worker que recalcula se muere
+STATS_KEY = "juego:ranking:stats:{}"
+STATS = ("hit", "stale", "miss", "rebuild")
+
+# Intentos terminados, para el ranking en vivo: un contador de secuencia y
+# un evento por número (la lista de filas nuevas, o None si hay que releer)
+EVENTS_SEQ_KEY = "juego:ranking:eventos"
+EVENT_KEY = "juego:ranking:evento:{}"
+EVENT_TIMEOUT = 5 * 60
+
+
+def _entry_fields(attempt):
+    return {
+        "name": attempt.name,
+        "document": attempt.document,
+        "created_at": attempt.created_at,
+        "max_reached_question": attempt.max_reached_question,
+        "current_prize": attempt.current_prize,
+        "finished_reason": attempt.finished_reason,
+    }
+
+
+def record_finished(attempt):
+    """Agrega (o actualiza) la entrada del ranking de un intento terminado."""
+    if not attempt.finished:
+        return
+    _, creada = LeaderboardEntry.objects.update_or_create(
+        attempt_id=attempt.id,
+        defaults=_entry_fields(attempt),
+    )
+    if creada:
+        # Solo la primera vez: volver a registrar el intento no lo cuenta dos veces
+        record_player(attempt)
+    _invalidate_first_page_for(attempt)
+    publish_finished([attempt])
+
+
+def record_finished_many(attempts):
+    """
+    ``record_finished`` por lotes (para ``expire_attempts``): un INSERT para
+    todas las entradas nuevas y una actualización de ``PlayerStats`` por
+    documento. Devuelve cuántas entradas se agregaron.
+    """
+    existentes = set(
+        LeaderboardEntry.objects.filter(attempt_id__in=[a.id for a in attempts]).values_list(
+            "attempt_id", flat=True
+        )
+    )
+    nuevos = [a for a in attempts if a.finished and a.id not in existentes]
+    if not nuevos:
+        return 0
+    LeaderboardEntry.objects.bulk_create(
+        [LeaderboardEntry(attempt_id=a.id, **_entry_fields(a)) for a in nuevos], ignore_conflicts=True
+    )
+    por_documento = {}
+    for attempt in nuevos:
+        por_documento.setdefault(attempt.document, []).append(attempt)
+    for document, intentos in por_documento.items():
+        _record_player_results(document, [_entry_fields(a) for a in intentos])
+    invalidate_first_page()
+    publish_finished(nuevos)
+    return len(nuevos)
+
+
+def record_player(attempt):
+    """Suma el intento terminado al ``PlayerStats`` de su documento."""
+    _record_player_results(attempt.document, [_entry_fields(attempt)])
+
+
+def _record_player_results(document, resultados):
+    for fields in resultados:
+        del fields["document"]
+    with transaction.atomic():
+        stats = PlayerStats.objects.select_for_update().filter(document=document).first()
+        if stats is None:
+            try:
+                with transaction.atomic():
+                    stats = PlayerStats(document=document)
+                    for fields in resultados:
+                        stats.add_result(**fields)
+                    stats.save()
+                    return
+            except IntegrityError:
+                # Otro worker creó la fila al mismo tiempo
+                stats = PlayerStats.objects.select_for_update().get(document=document)
+        for fields in resultados:
+            stats.add_result(**fields)
+        stats.save()
+
+
+def publish_finished(attempts):
+    """
+    Anuncia los intentos terminados al ranking en vivo, cuando la transacción
+    confirma (un rollback no debe aparecer en las pantallas).
+    """
+    filas = [{"attempt_id": a.id, **_entry_fields(a)} for a in attempts if a.finished]
+    if filas:
+        transaction.on_commit(lambda: _publish(filas))
+
+
+def publish_reset():
+    """Pide al ranking en vivo que vuelva a leer el ranking (tras ``rebuild``)."""
+    transaction.on_commit(lambda: _publish(None))
+
+
+def _publish(filas):
+    # Primero el número y después el evento: quien lea el número antes de
+    # que el evento exista lo vuelve a buscar en el sondeo siguiente
+    try:
+        numero = cache.incr(EVENTS_SEQ_KEY)
+    except ValueError:
+        cache.add(EVENTS_SEQ_KEY, 0, timeout=None)
+        numero = cache.incr(EVENTS_SEQ_KEY)
+    cache.set(EVENT_KEY.format(numero), filas, EVENT_TIMEOUT)
+
+
+def entries():
+    return LeaderboardEntry.objects.order_by(*ORDERING)
+
+
+def _clave(obj, ordering):
+    return [getattr(obj, campo.lstrip("-")) for campo in ordering]
+
+
+def encode_cursor(entry, ordering=ORDERING, salt=CURSOR_SALT):
+    """
+    Cursor opaco (firmado) con la clave de orden de ``entry`` y su posición
+    en el ranking, para pedir la página que sigue después de ella.
+    """
+    valores = [v.isoformat() if hasattr(v, "isoformat") else v for v in _clave(entry, ordering)]
+    return signing.dumps([*valores, entry.posicion], salt=salt, compress=True)
+
+
+def decode_cursor(cursor, ordering=ORDERING, salt=CURSOR_SALT):
+    """Devuelve ``(clave_de_orden, posición)`` o lanza ``ValueError``."""
+    try:
+        *valores, posicion = signing.loads(cursor, salt=salt)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise ValueError("Cursor de ranking inválido")
+    if len(valores) != len(ordering):
+        raise ValueError("Cursor de ranking inválido")
+    for i, campo in enumerate(ordering):
+        if campo.lstrip("-") in _DATE_FIELDS:
+            valores[i] = parse_datetime(valores[i]) if isinstance(valores[i], str) else None
+            if valores[i] is None:
+                raise ValueError("Cursor de ranking inválido")
+    return tuple(valores), posicion
+
+
+def _after(qs, key, ordering=ORDERING):
+    """Filtro keyset: todo lo que va después de ``key`` en ``ordering``."""
+    condicion = Q()
+    iguales = {}
+    for campo, valor in zip(ordering, key):
+        nombre = campo.lstrip("-")
+        lookup = "lt" if campo.startswith("-") else "gt"
+        condicion |= Q(**iguales, **{f"{nombre}__{lookup}": valor})
+        iguales[nombre] = valor
+    return qs.filter(condicion)
+
+
+def page(cursor=None, size=PAGE_SIZE):
+    """
+    Una página del ranking con paginación keyset sobre
+    (max_reached_question, current_prize, created_at, attempt_id): la última
+    página cuesta lo mismo que la primera porque nunca se usa OFFSET.
+
+    Devuelve ``(entradas, siguiente_cursor)``; cada entrada trae su
+    ``posicion`` en el ranking. ``siguiente_cursor`` es None en la última
+    página. Un cursor inválido lanza ``ValueError``.
+    """
+    qs, size, posicion = _page_queryset(entries(), ORDERING, CURSOR_SALT, cursor, size)
+    return _finish_page(list(qs[:size + 1]), size, posicion, ORDERING, CURSOR_SALT)
+
+
+async def apage(cursor=None, size=PAGE_SIZE):
+    """Versión async de ``page``."""
+    qs, size, posicion = _page_queryset(entries(), ORDERING, CURSOR_SALT, cursor, size)
+    return _finish_page([e async for e in qs[:size + 1]], size, posicion, ORDERING, CURSOR_SALT)
+
+
+def players():
+    return PlayerStats.objects.order_by(*PLAYER_ORDERING)
+
+
+def player_page(cursor=None, size=PAGE_SIZE):
+    """Como ``page`` pero del ranking por jugador (``PlayerStats``)."""
+    qs, size, posicion = _page_queryset(players(), PLAYER_ORDERING, PLAYER_CURSOR_SALT, cursor, size)
+    return _finish_page(list(qs[:size + 1]), size, posicion, PLAYER_ORDERING, PLAYER_CURSOR_SALT)
+
+
+async def aplayer_page(cursor=None, size=PAGE_SIZE):
+    qs, size, posicion = _page_queryset(players(), PLAYER_ORDERING, PLAYER_CURSOR_SALT, cursor, size)
+    return _finish_page([p async for p in qs[:size + 1]], size, posicion, PLAYER_ORDERING, PLAYER_CURSOR_SALT)
+
+
+def _page_queryset(qs, ordering, salt, cursor, size):
+    size = max(1, min(size, MAX_PAGE_SIZE))
+    posicion = 0
+    if cursor:
+        key, posicion = decode_cursor(cursor, ordering, salt)
+        qs = _after(qs, key, ordering)
+    return qs, size, posicion
+
+
+def _finish_page(rows, size, posicion, ordering, salt):
+    hay_mas = len(rows) > size
+    rows = rows[:size]
+    for i, entry in enumerate(rows, start=posicion + 1):
+        entry.posicion = i
+    siguiente = encode_cursor(rows[-1], ordering, salt) if hay_mas else None
+    return rows, siguiente
+
+
+def as_dict(entry):
+    return {
+        "posicion": entry.posicion,
+        "name": entry.name,
+        "document": entry.document,
+        "max_reached_question": entry.max_reached_question,
+        "current_prize": entry.current_prize,
+        "finished_reason": entry.finished_reason,
+        "created_at": entry.created_at.isoformat(),
+    }
+
+
+def as_player_dict(stats):
+    return {
+        "posicion": stats.posicion,
+        "name": stats.name,
+        "document": stats.document,
+        "best_max_reached_question": stats.best_max_reached_question,
+        "best_prize": stats.best_prize,
+        "games_played": stats.games_played,
+        "wins": stats.wins,
+        "last_played": stats.last_played.isoformat(),
+    }
+
+
+def live_queryset():
+    """La consulta original sobre GameAttempt; sirve para reconstruir y verificar."""
+    # finished__in=[True] en lugar de finished=True: Django compila este
+    # último como "WHERE finished" y el motor no puede usar la igualdad sobre
+    # la primera columna de juego_attempt_ranking_idx.
+    return GameAttempt.objects.filter(finished__in=[True]).order_by(*LIVE_ORDERING)
+
+
+def rebuild():
+    """
+    Reconstruye el ranking desde GameAttempt. Las entradas de intentos
+    archivados no están en GameAttempt y se conservan tal cual. Devuelve el
+    número de entradas reconstruidas.
+    """
+    total = 0
+    LeaderboardEntry.objects.filter(archived=False).delete()
+    batch = []
+    for attempt in live_queryset().iterator(chunk_size=REBUILD_BATCH_SIZE):
+        batch.append(LeaderboardEntry(attempt_id=attempt.id, **_entry_fields(attempt)))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            LeaderboardEntry.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        LeaderboardEntry.objects.bulk_create(batch)
+        total += len(batch)
+    invalidate_first_page()
+    publish_reset()
+    return total
+
+
+def rebuild_players():
+    """
+    Reconstruye ``PlayerStats`` desde ``LeaderboardEntry`` (que incluye los
+    intentos archivados). Devuelve la cantidad de jugadores.
+    """
+    total = 0
+    PlayerStats.objects.all().delete()
+    batch = []
+    actual = None
+    filas = LeaderboardEntry.objects.order_by("document", "created_at").values_list(
+        "document", "name", "created_at", "max_reached_question", "current_prize", "finished_reason"
+    )
+    for document, *resultado in filas.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        if actual is None or actual.document != document:
+            if actual is not None:
+                batch.append(actual)
+            actual = PlayerStats(document=document)
+        actual.add_result(*resultado)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            PlayerStats.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if actual is not None:
+        batch.append(actual)
+    PlayerStats.objects.bulk_create(batch)
+    return total + len(batch)
+
+
+def compare():
+    """
+    Recorre en paralelo el ranking materializado (sin los archivados) y la
+    consulta en vivo y devuelve una lista de diferencias
+    ``(posición, esperado, encontrado)``.
+    """
+    fields = ("max_reached_question", "current_prize", "created_at", "finished_reason")
+    live = live_queryset().values_list("id", *fields).iterator(chunk_size=REBUILD_BATCH_SIZE)
+    stored = entries().filter(archived=False).values_list("attempt_id", *fields).iterator(
+        chunk_size=REBUILD_BATCH_SIZE
+    )
+
+    diferencias = []
+    posicion = 0
+    while True:
+        esperado = next(live, None)
+        encontrado = next(stored, None)
+        if esperado is None and encontrado is None:
+            break
+        posicion += 1
+        if esperado != encontrado:
+            diferencias.append((posicion, esperado, encontrado))
+    return diferencias
+
+
+# ======================
+#  CACHÉ DE LA PRIMERA PÁGINA
+# ======================
+
+def _count(stat):
+    key = STATS_KEY.format(stat)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+async def _acount(stat):
+    key = STATS_KEY.format(stat)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 1, timeout=None)
+
+
+def stats():
+    """Contadores hit/stale/miss/rebuild de la caché de la primera página."""
+    valores = cache.get_many([STATS_KEY.format(s) for s in STATS])
+    return {s: valores.get(STATS_KEY.format(s), 0) for s in STATS}
+
+
+def _sort_key(max_reached_question, current_prize, created_at, attempt_id):
+    # Menor = más arriba en el ranking (mismo orden que ORDERING)
+    return (-max_reached_question, -current_prize, created_at, attempt_id)
+
+
+def _build_first_page():
+    top3, _ = page(size=3)
+    others, siguiente = [], None
+    if len(top3) == 3:
+        others, siguiente = page(encode_cursor(top3[-1]))
+    return {"top3": top3, "others": others, "siguiente_cursor": siguiente}
+
+
+def first_player_page():
+    """Podio + primera página del ranking por jugador (sin caché: lee el índice)."""
+    top3, _ = player_page(size=3)
+    others, siguiente = [], None
+    if len(top3) == 3:
+        others, siguiente = player_page(encode_cursor(top3[-1], PLAYER_ORDERING, PLAYER_CURSOR_SALT))
+    return {"top3": top3, "others": others, "siguiente_cursor": siguiente}
+
+
+async def afirst_player_page():
+    top3, _ = await aplayer_page(size=3)
+    others, siguiente = [], None
+    if len(top3) == 3:
+        others, siguiente = await aplayer_page(encode_cursor(top3[-1], PLAYER_ORDERING, PLAYER_CURSOR_SALT))
+    return {"top3": top3, "others": others, "siguiente_cursor": siguiente}
+
+
+async def _abuild_first_page():
+    top3, _ = await apage(size=3)
+    others, siguiente = [], None
+    if len(top3) == 3:
+        others, siguiente = await apage(encode_cursor(top3[-1]))
+    return {"top3": top3, "others": others, "siguiente_cursor": siguiente}
+
+
+def _first_page_values(payload):
+    """Claves de caché a guardar junto con una primera página recién calculada."""
+    ultima = (payload["others"] or payload["top3"])[-1:]
+    corte = None
+    if payload["siguiente_cursor"] and ultima:
+        e = ultima[0]
+        corte = _sort_key(e.max_reached_question, e.current_prize, e.created_at, e.attempt_id)
+    return {FIRST_PAGE_KEY: payload, FIRST_PAGE_CUTOFF_KEY: corte}
+
+
+def _rebuild_first_page():
+    _count("rebuild")
+    payload = _build_first_page()
+    cache.set_many(_first_page_values(payload), FIRST_PAGE_TIMEOUT)
+    cache.set(FIRST_PAGE_FRESH_KEY, True, FIRST_PAGE_FRESH_SECONDS)
+    return payload
+
+
+async def _arebuild_first_page():
+    await _acount("rebuild")
+    payload = await _abuild_first_page()
+    await cache.aset_many(_first_page_values(payload), FIRST_PAGE_TIMEOUT)
+    await cache.aset(FIRST_PAGE_FRESH_KEY, True, FIRST_PAGE_FRESH_SECONDS)
+    return payload
+
+
+def first_page():
+    """
+    Podio + primera página del ranking (``top3``, ``others``,
+    ``siguiente_cursor``), desde la caché.
+
+    - Copia fresca: se devuelve sin tocar la base.
+    - Copia vieja: un solo worker (el que gana ``cache.add`` del lock) la
+      recalcula; los demás siguen sirviendo la vieja mientras tanto.
+    - Sin copia: se calcula en el momento.
+    """
+    cached = cache.get_many([FIRST_PAGE_KEY, FIRST_PAGE_FRESH_KEY])
+    payload = cached.get(FIRST_PAGE_KEY)
+    if payload is None:
+        _count("miss")
+        return _rebuild_first_page()
+    if FIRST_PAGE_FRESH_KEY in cached:
+        _count("hit")
+        return payload
+
+    _count("stale")
+    if cache.add(FIRST_PAGE_LOCK_KEY, True, FIRST_PAGE_LOCK_SECONDS):
+        try:
+            payload = _rebuild_first_page()
+        finally:
+            cache.delete(FIRST_PAGE_LOCK_KEY)
+    return payload
+
+
+async def afirst_page():
+    """Versión async de ``first_page``."""
+    cached = await cache.aget_many([FIRST_PAGE_KEY, FIRST_PAGE_FRESH_KEY])
+    payload = cached.get(FIRST_PAGE_KEY)
+    if payload is None:
+        await _acount("miss")
+        return await _arebuild_first_page()
+    if FIRST_PAGE_FRESH_KEY in cached:
+        await _acount("hit")
+        return payload
+
+    await _acount("stale")
+    if await cache.aadd(FIRST_PAGE_LOCK_KEY, True, FIRST_PAGE_LOCK_SECONDS):
+        try:
+            payload = await _arebuild_first_page()
+        finally:
+            await cache.adelete(FIRST_PAGE_LOCK_KEY)
+    return payload
+
+
+def invalidate_first_page():
+    """Marca la copia como vieja; se sigue sirviendo hasta que alguien la recalcule."""
+    cache.delete(FIRST_PAGE_FRESH_KEY)
+
+
+def _invalidate_first_page_for(attempt):
+    # Un intento que queda después del último puesto de una primera página
+    # llena no cambia nada de lo que se muestra: no hace falta invalidar.
+    corte = cache.get(FIRST_PAGE_CUTOFF_KEY)
+    if corte is not None and _sort_key(
+        attempt.max_reached_question, attempt.current_prize, attempt.created_at, attempt.id
+    ) > corte:
+        return
+    invalidate_first_page()
@@ -0,0 +1,226 @@
+# juego/lifelines.py
+"""
+Motor único de las ayudas (50:50, público, amigo, cambiar de pregunta).
+
+- El estado vive en ``GameAttempt.lifeline_flags`` (ver el modelo): qué
+  ayudas se usaron, qué opciones deshabilitó el 50:50 y si el resultado del
+  público o del amigo está visible en la pregunta actual.
+- Una ayuda se consume con un único UPDATE condicional
+  (``WHERE bit de la ayuda = 0 AND sigue en la misma pregunta``): dos clics
+  simultáneos no pueden gastarla dos veces. Con el plazo vencido no hay
+  pregunta actual: el intento lo termina por tiempo la siguiente vista.
+- Los resultados salen de un ``random.Random`` sembrado con
+  (intento, pregunta, ayuda). No se guardan en ningún lado: ``resultados``
+  los vuelve a calcular idénticos cada vez que se muestra la pregunta.
+"""
+import random
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
+from .game import NIVELES, PLAZO_GRACIA, nuevo_plazo
+from .models import AttemptQuestion, GameAttempt
+
+OPCIONES = ["A", "B", "C", "D"]
+
+USADA = {
+    "5050": "Ya utilizaste la ayuda 50:50.",
+    "publico": "Ya usaste la ayuda 'Preguntar al público'.",
+    "amigo": "Ya usaste la ayuda 'Llamar a un amigo'.",
+    "cambiar": "Ya usaste la ayuda 'Cambiar de pregunta'.",
+}
+SIN_PREGUNTA = {
+    "5050": "No hay pregunta activa para aplicar 50:50.",
+    "publico": "No hay pregunta activa para preguntar al público.",
+    "amigo": "No hay pregunta activa para llamar al amigo.",
+    "cambiar": "No hay pregunta activa para cambiar.",
+}
+SIN_REPUESTO = "No hay más preguntas disponibles para cambiar en esta dificultad."
+
+AYUDAS = tuple(USADA)
+
+
+def _rng(attempt_id, question_id, nombre):
+    return random.Random(f"{attempt_id}:{question_id}:{nombre}")
+
+
+# ----------------------------------------------------------------------
+# Resultados (funciones puras de la semilla y la opción correcta)
+# ----------------------------------------------------------------------
+
+def cincuenta(rng, correcta):
+    """Dos opciones incorrectas a deshabilitar."""
+    restantes = [o for o in OPCIONES if o != correcta]
+    return sorted(rng.sample(restantes, 2))  # SIEMPRE SOLO INCORRECTAS
+
+
+def publico(rng, correcta):
+    """Porcentajes del público para A, B, C y D (suman 100)."""
+    idx_correcta = OPCIONES.index(correcta)
+
+    porcentajes = [0, 0, 0, 0]
+    base_correcta = rng.randint(40, 70)
+    restante = 100 - base_correcta
+    indices = [0, 1, 2, 3]
+    indices.remove(idx_correcta)
+
+    for i in indices[:-1]:
+        val = rng.randint(0, restante)
+        porcentajes[i] = val
+        restante -= val
+    porcentajes[indices[-1]] = restante
+    porcentajes[idx_correcta] = base_correcta
+    return porcentajes
+
+
+def amigo(rng, correcta):
+    """Letra que sugiere el amigo: acierta el 80% de las veces."""
+    if rng.random() < 0.8:
+        return correcta
+    return rng.choice([o for o in OPCIONES if o != correcta])
+
+
+def resultados(attempt, question_id, correcta):
+    """
+    Resultados visibles del público y del amigo en la pregunta actual,
+    recalculados desde la semilla: ``ayuda_publico_data`` y
+    ``ayuda_amigo_letra`` (o nada).
+    """
+    data = {}
+    if attempt.lifeline_flags & GameAttempt.LIFELINE_PUBLIC_VISIBLE:
+        data["ayuda_publico_data"] = publico(_rng(attempt.id, question_id, "publico"), correcta)
+    if attempt.lifeline_flags & GameAttempt.LIFELINE_FRIEND_VISIBLE:
+        data["ayuda_amigo_letra"] = amigo(_rng(attempt.id, question_id, "amigo"), correcta)
+    return data
+
+
+def _efecto(nombre, attempt_id, question_id, correcta):
+    """Bits a encender además del de "usada", y lo que se muestra ya."""
+    rng = _rng(attempt_id, question_id, nombre)
+    if nombre == "5050":
+        bits = sum(GameAttempt.LIFELINE_DISABLED[l] for l in cincuenta(rng, correcta))
+        return bits, {}
+    if nombre == "publico":
+        return GameAttempt.LIFELINE_PUBLIC_VISIBLE, {"ayuda_publico_data": publico(rng, correcta)}
+    return GameAttempt.LIFELINE_FRIEND_VISIBLE, {"ayuda_amigo_letra": amigo(rng, correcta)}
+
+
+# ----------------------------------------------------------------------
+# Consumo
+# ----------------------------------------------------------------------
+
+def _en_plazo(campo="question_deadline"):
+    """Sin plazo (torneo) o con el plazo todavía abierto, con la misma gracia que ``game``."""
+    return Q(**{f"{campo}__isnull": True}) | Q(**{f"{campo}__gte": timezone.now() - PLAZO_GRACIA})
+
+
+def _pregunta_actual(attempt_id):
+    """(número, id de la pregunta, opción correcta) del intento en juego, en una consulta."""
+    return AttemptQuestion.objects.filter(
+        _en_plazo("attempt__question_deadline"),
+        attempt_id=attempt_id,
+        attempt__finished=False,
+        question_number=F("attempt__current_question_number"),
+        is_spare=False,
+    ).values_list("question_number", "question_id", "question__correct_option")
+
+
+def _consumir(attempt_id, numero, nombre, bits=0, conservar=None):
+    """
+    UPDATE condicional que marca la ayuda como usada y enciende ``bits``
+    (antes se apagan los que no estén en ``conservar``). Solo afecta al
+    intento si la ayuda no se usó, sigue en la pregunta ``numero`` y no se
+    le venció el plazo.
+    """
+    bit = GameAttempt.LIFELINE_USED[nombre]
+    flags = F("lifeline_flags")
+    if conservar is not None:
+        flags = flags.bitand(conservar)
+    return GameAttempt.objects.filter(
+        Exact(F("lifeline_flags").bitand(bit), 0),
+        _en_plazo(),
+        id=attempt_id,
+        current_question_number=numero,
+        finished=False,
+    ), {"lifeline_flags": flags.bitor(bit | bits)}
+
+
+def usar(nombre, attempt_id):
+    """
+    Usa la ayuda ``nombre`` en la pregunta actual del intento. Devuelve un
+    dict con lo que hay que mostrar: ``mensaje_info``,
+    ``ayuda_publico_data`` o ``ayuda_amigo_letra``.
+    """
+    if nombre == "cambiar":
+        return _cambiar(attempt_id)
+
+    fila = _pregunta_actual(attempt_id).first()
+    if fila is None:
+        return {"mensaje_info": SIN_PREGUNTA[nombre]}
+    numero, question_id, correcta = fila
+
+    bits, resultado = _efecto(nombre, attempt_id, question_id, correcta)
+    qs, cambios = _consumir(attempt_id, numero, nombre, bits)
+    if not qs.update(**cambios):
+        return {"mensaje_info": USADA[nombre]}
+    return resultado
+
+
+async def ausar(nombre, attempt_id):
+    """Versión async de ``usar``."""
+    if nombre == "cambiar":
+        # Necesita una transacción, que no tiene versión async
+        return await sync_to_async(_cambiar)(attempt_id)
+
+    fila = await _pregunta_actual(attempt_id).afirst()
+    if fila is None:
+        return {"mensaje_info": SIN_PREGUNTA[nombre]}
+    numero, question_id, correcta = fila
+
+    bits, resultado = _efecto(nombre, attempt_id, question_id, correcta)
+    qs, cambios = _consumir(attempt_id, numero, nombre, bits)
+    if not await qs.aupdate(**cambios):
+        return {"mensaje_info": USADA[nombre]}
+    return resultado
+
+
+def _cambiar(attempt_id):
+    fila = _pregunta_actual(attempt_id).first()
+    if fila is None:
+        return {"mensaje_info": SIN_PREGUNTA["cambiar"]}
+    numero = fila[0]
+    inicio_nivel = NIVELES[GameAttempt.difficulty_for(numero)][0]
+
+    # Pregunta de repuesto sorteada al crear el intento para este nivel
+    repuesto_id = AttemptQuestion.objects.filter(
+        attempt_id=attempt_id,
+        question_number=inicio_nivel,
+        is_spare=True,
+        replaced=False
+    ).values_list("id", flat=True).first()
+    if repuesto_id is None:
+        return {"mensaje_info": SIN_REPUESTO}
+
+    # El repuesto ocupa el lugar de la actual, que se conserva marcada como
+    # reemplazada (se mostró al jugador); el 50:50 y los resultados
+    # visibles eran de la pregunta anterior y se apagan. La pregunta nueva
+    # tiene su propio plazo.
+    with transaction.atomic():
+        qs, cambios = _consumir(
+            attempt_id, numero, "cambiar", conservar=GameAttempt.LIFELINE_USED_MASK
+        )
+        if not qs.update(question_deadline=nuevo_plazo(), **cambios):
+            return {"mensaje_info": USADA["cambiar"]}
+        AttemptQuestion.objects.filter(
+            attempt_id=attempt_id,
+            question_number=numero,
+            is_spare=False
+        ).update(is_spare=True, replaced=True)
+        AttemptQuestion.objects.filter(id=repuesto_id).update(
+            question_number=numero,
+            is_spare=False
+        )
+    return {}
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from juego import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve a un archivo .jsonl.gz los intentos terminados anteriores a una fecha. "
+        "Conservan su lugar en el ranking; se devuelven con restore_attempts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=180,
+                            help="Archiva los intentos con más de estos días (por defecto 180).")
+        parser.add_argument("--before", help="Fecha de corte AAAA-MM-DD (en lugar de --days).")
+        parser.add_argument("--output-dir", default=str(Path(settings.BASE_DIR) / "archivo"),
+                            help="Carpeta de los archivos generados.")
+        parser.add_argument("--batch-size", type=int, default=archive.BATCH_SIZE,
+                            help="Intentos por lote (cada lote es una transacción corta).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Solo cuenta cuántos intentos se archivarían.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser mayor que cero.")
+        if options["before"]:
+            fecha = parse_date(options["before"])
+            if fecha is None:
+                raise CommandError("--before debe tener el formato AAAA-MM-DD.")
+            cutoff = timezone.make_aware(timezone.datetime.combine(fecha, timezone.datetime.min.time()))
+        else:
+            cutoff = timezone.now() - timedelta(days=options["days"])
+
+        pendientes = archive.count(cutoff)
+        self.stdout.write(f"Intentos terminados antes de {cutoff:%Y-%m-%d %H:%M}: {pendientes}")
+        if options["dry_run"] or not pendientes:
+            return
+
+        carpeta = Path(options["output_dir"])
+        carpeta.mkdir(parents=True, exist_ok=True)
+        path = carpeta / f"intentos-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz"
+
+        total = 0
+        for cantidad in archive.archive(cutoff, path, options["batch_size"]):
+            total += cantidad
+            self.stdout.write(f"  {total}/{pendientes}")
+        self.stdout.write(self.style.SUCCESS(f"Archivados {total} intentos en {path}"))
@@ -0,0 +1,131 @@
+"""
+Tiempo de render de la página de jugar por request, con la escalera de
+premios precalculada (como ahora) y armada en cada request (como antes).
+
+- ahora: ``juego/jugar.html`` desde el loader cacheado, con el HTML de la
+  escalera de ``fragments.escalera``;
+- antes: la lista de la escalera armada con ``reversed``/``enumerate`` y el
+  bucle de ``_escalera.html`` dentro de ``jugar.html``;
+- antes, sin loader cacheado: lo mismo, compilando la plantilla en cada
+  request (DEBUG con loaders sin caché).
+
+Solo se mide el render (sin base ni middlewares): el intento y la pregunta
+se arman en memoria. Reporta el mejor de ``--repeat`` tiempos, en
+microsegundos por request.
+
+    python manage.py benchmark_render --number 2000
+"""
+import timeit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Engine, engines
+from django.template.backends.django import Template
+from django.template.loader import get_template, render_to_string
+from django.test import RequestFactory, override_settings
+from django.utils.safestring import mark_safe
+
+from juego import fragments
+from juego.game import PREMIOS
+from juego.models import GameAttempt, Question
+
+NUMERO = 7  # pregunta actual del intento de prueba
+
+# {% static %} sin manifest: no hace falta haber corrido collectstatic
+SIN_MANIFEST = {
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def _build_escalera(attempt):
+    # La versión anterior, de juego/views.py
+    escalera = []
+    total = len(PREMIOS)
+    nivel_actual_index = attempt.current_question_number - 1  # 0-based
+
+    for i, premio in enumerate(reversed(PREMIOS)):
+        nivel_real = total - 1 - i  # índice real 0-based
+        escalera.append({
+            "numero": nivel_real + 1,
+            "premio": premio,
+            "es_actual": (nivel_real == nivel_actual_index),
+        })
+    return escalera
+
+
+def _fuente_anterior(engine):
+    """``jugar.html`` con el bucle de la escalera dentro, como estaba antes."""
+    jugar = engine.find_template("juego/jugar.html")[0].source
+    bucle = engine.find_template("juego/_escalera.html")[0].source.split("\n", 1)[1]
+    return jugar.replace("{{ escalera }}", bucle)
+
+
+class Command(BaseCommand):
+    help = "Mide cuánto tiempo de render por request ahorra la escalera precalculada en jugar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=2000, help="Renders por medición.")
+        parser.add_argument("--repeat", type=int, default=5, help="Mediciones (se toma la mejor).")
+
+    def handle(self, *args, **options):
+        if options["number"] < 1 or options["repeat"] < 1:
+            raise CommandError("--number y --repeat deben ser mayores que cero.")
+        with override_settings(STORAGES=SIN_MANIFEST):
+            medidas = self.medir(options["number"], options["repeat"])
+
+        base = medidas[0][1]
+        self.stdout.write(f"Renders por medición: {options['number']}  (mejor de {options['repeat']})")
+        self.stdout.write(f"{'':<36}{'µs/request':>12}{'ahorro':>10}")
+        for etiqueta, micros in medidas:
+            ahorro = "" if micros == base else f"{(micros - base) / micros:>10.0%}"
+            self.stdout.write(f"{etiqueta:<36}{micros:>12.1f}{ahorro}")
+
+    def medir(self, number, repeat):
+        """[(etiqueta, microsegundos por render)], el actual primero."""
+        request = RequestFactory().get("/jugar/")
+        attempt = GameAttempt(name="Benchmark", document="benchmark", current_question_number=NUMERO)
+        question = Question(text="¿Pregunta?", option_a="Uno", option_b="Dos",
+                            option_c="Tres", option_d="Cuatro", correct_option="A")
+        contexto = {
+            "attempt": attempt,
+            "bloque_pregunta": {
+                "text": question.text,
+                "opciones": mark_safe(render_to_string("juego/_opciones.html", {"question": question})),
+            },
+            "premio_nivel": PREMIOS[NUMERO - 1],
+            "total_preguntas": len(PREMIOS),
+            "disabled_letters": [],
+        }
+
+        backend = engines["django"]
+        actual = get_template("juego/jugar.html")
+        fuente = _fuente_anterior(backend.engine)
+        anterior = backend.from_string(fuente)
+        sin_cache = Engine(
+            app_dirs=True,
+            context_processors=backend.engine.context_processors,
+            libraries=backend.engine.libraries,
+        )
+
+        def ahora():
+            actual.render({**contexto, "escalera": fragments.escalera(attempt.current_question_number)}, request)
+
+        def antes():
+            anterior.render({**contexto, "escalera": _build_escalera(attempt)}, request)
+
+        def antes_sin_cache():
+            plantilla = Template(sin_cache.from_string(fuente), backend)
+            plantilla.render({**contexto, "escalera": _build_escalera(attempt)}, request)
+
+        medidas = []
+        for etiqueta, funcion in (
+            ("Ahora (escalera precalculada)", ahora),
+            ("Antes (escalera en cada request)", antes),
+            ("Antes, sin loader cacheado", antes_sin_cache),
+        ):
+            funcion()  # calentar cachés
+            mejor = min(timeit.repeat(funcion, number=number, repeat=repeat))
+            medidas.append((etiqueta, mejor / number * 1e6))
+
+        return medidas
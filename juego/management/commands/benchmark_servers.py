@@ -0,0 +1,188 @@
+"""
+Compara el despliegue WSGI (gunicorn + vistas sync) con el ASGI (uvicorn +
+vistas async de juego/views_async.py) con la misma carga de ``loadtest``.
+
+Levanta cada servidor como subproceso sobre la base configurada, lo calienta,
+mide su memoria residente en reposo y corre ``loadtest --url`` mientras
+muestrea la memoria. Reporta requests por segundo, errores y la memoria
+extra por conexión concurrente: (pico - reposo) / concurrencia.
+
+    DB_ENGINE=sqlite python manage.py migrate
+    DB_ENGINE=sqlite python manage.py benchmark_servers --players 100 --concurrency 8,32
+
+Necesita gunicorn y uvicorn instalados. La memoria se lee de /proc (Linux)
+y suma el proceso principal y sus hijos (los workers de gunicorn).
+"""
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from .loadtest import Command as LoadTest
+
+SERVIDORES = {
+    "wsgi": lambda puerto, hilos: [
+        "gunicorn", "millonario_project.wsgi:application",
+        "--bind", f"127.0.0.1:{puerto}", "--workers", "1",
+        "--worker-class", "gthread", "--threads", str(hilos),
+    ],
+    "asgi": lambda puerto, hilos: [
+        "uvicorn", "millonario_project.asgi:application",
+        "--host", "127.0.0.1", "--port", str(puerto), "--workers", "1",
+        "--no-access-log",
+    ],
+}
+MUESTREO_SEGUNDOS = 0.05
+
+
+def _hijos(pid):
+    hijos = []
+    for task in Path(f"/proc/{pid}/task").glob("*/children"):
+        try:
+            hijos += [int(p) for p in task.read_text().split()]
+        except OSError:
+            pass
+    return hijos
+
+
+def rss_kb(pid):
+    """Memoria residente de ``pid`` y todos sus descendientes, en KB."""
+    total = 0
+    pendientes = [pid]
+    while pendientes:
+        actual = pendientes.pop()
+        try:
+            for linea in Path(f"/proc/{actual}/status").read_text().splitlines():
+                if linea.startswith("VmRSS:"):
+                    total += int(linea.split()[1])
+                    break
+        except OSError:
+            continue
+        pendientes += _hijos(actual)
+    return total
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _esperar(url, proceso, timeout=20):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise CommandError(f"El servidor terminó al arrancar (código {proceso.returncode}).")
+        try:
+            with urllib.request.urlopen(url + "/ranking/", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"El servidor no respondió en {timeout}s: {url}")
+
+
+class Command(BaseCommand):
+    help = "Compara req/s y memoria por conexión entre gunicorn (WSGI) y uvicorn (ASGI)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--servers", default="wsgi,asgi", help="Servidores a medir (wsgi, asgi).")
+        parser.add_argument("--concurrency", default="8,32",
+                            help="Niveles de concurrencia separados por coma.")
+        parser.add_argument("--players", type=int, default=50, help="Partidas por corrida.")
+        parser.add_argument("--seed", type=int, default=1, help="Semilla de loadtest (misma carga en ambos).")
+
+    def handle(self, *args, **options):
+        if sys.platform != "linux":
+            raise CommandError("La medición de memoria lee /proc: solo funciona en Linux.")
+        servidores = [s.strip() for s in options["servers"].split(",") if s.strip()]
+        for servidor in servidores:
+            if servidor not in SERVIDORES:
+                raise CommandError(f"Servidor desconocido: {servidor}")
+            ejecutable = SERVIDORES[servidor](0, 1)[0]
+            if not shutil.which(ejecutable):
+                raise CommandError(f"Falta {ejecutable}: pip install {ejecutable}")
+        try:
+            niveles = [int(c) for c in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency debe ser una lista de enteros.")
+
+        filas = []
+        for servidor in servidores:
+            for concurrencia in niveles:
+                filas.append((servidor, concurrencia, self.medir(servidor, concurrencia, options)))
+
+        self.stdout.write(
+            f"{'servidor':<10}{'conc.':>7}{'req/s':>10}{'errores':>9}"
+            f"{'reposo MB':>11}{'pico MB':>10}{'KB/conexión':>13}"
+        )
+        for servidor, concurrencia, r in filas:
+            self.stdout.write(
+                f"{servidor:<10}{concurrencia:>7}{r['req_s']:>10.1f}{r['errores']:>9}"
+                f"{r['reposo'] / 1024:>11.1f}{r['pico'] / 1024:>10.1f}"
+                f"{(r['pico'] - r['reposo']) / concurrencia:>13.1f}"
+            )
+
+    def medir(self, servidor, concurrencia, options):
+        puerto = _puerto_libre()
+        url = f"http://127.0.0.1:{puerto}"
+        env = dict(os.environ)
+        env["ALLOWED_HOSTS"] = "127.0.0.1"
+        env["JUEGO_ASYNC_VIEWS"] = "True" if servidor == "asgi" else "False"
+
+        proceso = subprocess.Popen(
+            SERVIDORES[servidor](puerto, concurrencia),
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _esperar(url, proceso)
+            # Calentamiento: imports, pool de preguntas y cachés del proceso
+            self.correr_carga(url, min(5, options["players"]), 1, options["seed"])
+            reposo = rss_kb(proceso.pid)
+
+            pico = [reposo]
+            listo = threading.Event()
+
+            def muestrear():
+                while not listo.wait(MUESTREO_SEGUNDOS):
+                    pico[0] = max(pico[0], rss_kb(proceso.pid))
+
+            hilo = threading.Thread(target=muestrear, daemon=True)
+            hilo.start()
+            try:
+                resumen = self.correr_carga(url, options["players"], concurrencia, options["seed"])
+            finally:
+                listo.set()
+                hilo.join()
+        finally:
+            proceso.terminate()
+            try:
+                proceso.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+
+        return {**resumen, "reposo": reposo, "pico": pico[0]}
+
+    def correr_carga(self, url, jugadores, concurrencia, semilla):
+        carga = LoadTest(stdout=StringIO(), stderr=StringIO())
+        call_command(
+            carga,
+            url=url,
+            players=jugadores,
+            concurrency=concurrencia,
+            seed=semilla,
+            cleanup=True,
+        )
+        return carga.resumen
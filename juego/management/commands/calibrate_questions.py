@@ -0,0 +1,47 @@
+"""
+Recalcula las estadísticas de respuesta de cada pregunta (``QuestionStats``)
+desde la telemetría y lista las preguntas mal calibradas: las que tienen
+una tasa de acierto propia de otra dificultad. Lee las respuestas de la
+réplica si hay una configurada.
+
+    python manage.py calibrate_questions
+    python manage.py calibrate_questions --min-answers 50 --chunk-size 5000
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from juego import calibration, db_router, telemetry
+from juego.models import QuestionStats
+
+
+class Command(BaseCommand):
+    help = "Calcula acierto y tiempos de respuesta por pregunta y marca las mal calibradas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-answers", type=int, default=calibration.MIN_ANSWERS,
+                            help="Respuestas mínimas para juzgar una pregunta.")
+        parser.add_argument("--chunk-size", type=int, default=calibration.BATCH_SIZE,
+                            help="Filas por lectura y por escritura.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size debe ser mayor que cero.")
+        # Lo que este proceso tenga pendiente (normalmente nada)
+        telemetry.flush()
+
+        # La telemetría se lee de la réplica (si hay); QuestionStats se
+        # escribe en la primaria y desde ahí se lee el listado
+        with db_router.lecturas_en_replica(), transaction.atomic():
+            total, mal = calibration.rebuild(options["min_answers"], options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Estadísticas recalculadas: {total} preguntas, {mal} mal calibradas."
+        ))
+
+        mal_calibradas = QuestionStats.objects.filter(miscalibrated=True).select_related("question")
+        for stats in mal_calibradas.order_by("question_id").iterator():
+            q = stats.question
+            self.stdout.write(
+                f"  #{q.id} {q.get_difficulty_display()} -> "
+                f"{stats.get_suggested_difficulty_display()}: "
+                f"{stats.accuracy:.0%} de {stats.answers}, p50 {stats.p50_ms} ms  {q.text[:60]}"
+            )
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from juego import game, leaderboard
+from juego.models import AttemptQuestion, Difficulty, GameAttempt, Question
+
+
+def consultas_calientes():
+    """(descripción, queryset, índice esperado) de cada consulta crítica."""
+    return [
+        (
+            "Ranking (primera página)",
+            leaderboard.entries()[:leaderboard.PAGE_SIZE],
+            "juego_leaderboard_orden_idx",
+        ),
+        (
+            "Ranking en vivo sobre GameAttempt",
+            leaderboard.live_queryset()[:leaderboard.PAGE_SIZE],
+            "juego_attempt_ranking_idx",
+        ),
+        (
+            "Pool de preguntas por dificultad",
+            Question.objects.filter(difficulty=Difficulty.EASY, is_active=True).values_list("id", flat=True),
+            "juego_question_dif_activa_idx",
+        ),
+        (
+            "Pregunta actual del intento",
+            AttemptQuestion.objects.filter(attempt_id=1, question_number=1, is_spare=False),
+            "juego_aq_intento_numero_idx",
+        ),
+        (
+            "Búsqueda de intentos por documento",
+            GameAttempt.objects.filter(document="1"),
+            "juego_attempt_documento_idx",
+        ),
+        (
+            "Admin: intentos por fecha",
+            GameAttempt.objects.filter(created_at__gte=timezone.now()),
+            "juego_attempt_fecha_idx",
+        ),
+        (
+            "Intentos vencidos (expire_attempts)",
+            game.vencidos().filter(question_deadline__isnull=False),
+            "juego_attempt_plazo_idx",
+        ),
+    ]
+
+
+def usa_indice(plan, indice):
+    if connection.vendor == "mysql":
+        return f'"key": "{indice}"' in plan
+    return indice in plan
+
+
+class Command(BaseCommand):
+    help = "Ejecuta EXPLAIN sobre las consultas críticas y verifica que usen el índice esperado."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plan", action="store_true", help="Muestra el plan completo de cada consulta.")
+
+    def handle(self, *args, **options):
+        explain_options = {"format": "JSON"} if connection.vendor == "mysql" else {}
+        fallas = 0
+        for descripcion, queryset, indice in consultas_calientes():
+            plan = queryset.explain(**explain_options)
+            ok = usa_indice(plan, indice)
+            if ok:
+                self.stdout.write(self.style.SUCCESS(f"[OK]    {descripcion}: usa {indice}"))
+            else:
+                fallas += 1
+                self.stdout.write(self.style.ERROR(f"[FALLA] {descripcion}: no usa {indice}"))
+            if options["verbose_plan"] or not ok:
+                self.stdout.write(f"        {plan}")
+
+        if fallas:
+            raise CommandError(f"{fallas} consulta(s) no usan el índice esperado.")
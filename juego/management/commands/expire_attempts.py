@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from juego import game
+
+
+class Command(BaseCommand):
+    help = (
+        "Termina los intentos con el plazo de respuesta vencido (Tiempo agotado) y los "
+        "intentos sin plazo abandonados (Abandono), y los pasa al ranking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--abandoned-hours", type=int,
+                            default=int(game.ABANDONO.total_seconds() // 3600),
+                            help="Horas tras las que un intento sin plazo se da por abandonado.")
+        parser.add_argument("--batch-size", type=int, default=game.BARRIDO_BATCH_SIZE,
+                            help="Intentos por lote (un UPDATE por lote).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Solo cuenta cuántos intentos se terminarían.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser mayor que cero.")
+        now = timezone.now()
+        abandono = timedelta(hours=options["abandoned_hours"])
+
+        pendientes = game.vencidos(now, abandono).count()
+        self.stdout.write(f"Intentos vencidos o abandonados: {pendientes}")
+        if options["dry_run"] or not pendientes:
+            return
+
+        total = 0
+        for cantidad in game.expirar_vencidos(now, abandono, options["batch_size"]):
+            total += cantidad
+            self.stdout.write(f"  {total}/{pendientes}")
+        self.stdout.write(self.style.SUCCESS(f"Terminados {total} intentos."))
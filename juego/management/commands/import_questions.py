@@ -0,0 +1,163 @@
+"""
+Importa preguntas desde CSV o JSONL sin cargar el archivo en memoria.
+
+Cada fila necesita: text, option_a, option_b, option_c, option_d,
+correct_option (A-D) y difficulty (EASY/MEDIUM/HARD o su nombre en
+español); is_active es opcional. Las preguntas cuyo contenido ya existe
+(misma huella content_hash) se saltan.
+
+    python manage.py import_questions juego/data/preguntas_base.jsonl
+    python manage.py import_questions banco.csv --batch-size 5000
+"""
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from juego import question_pool
+from juego.models import Difficulty, Question
+
+CAMPOS = ("text", "option_a", "option_b", "option_c", "option_d", "correct_option", "difficulty")
+OPCIONES_VALIDAS = {valor for valor, _ in Question.CORRECT_CHOICES}
+# Se aceptan el valor ("EASY") o la etiqueta ("Fácil"), sin distinguir mayúsculas
+DIFICULTADES = {}
+for _valor, _etiqueta in Difficulty.choices:
+    DIFICULTADES[_valor.casefold()] = _valor
+    DIFICULTADES[_etiqueta.casefold()] = _valor
+VERDADERO = {"1", "true", "t", "si", "sí", "yes", "y"}
+
+
+def leer_filas(path, formato):
+    """Genera ``(número_de_línea, dict)`` leyendo el archivo de a una fila."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if formato == "csv":
+            lector = csv.DictReader(f)
+            for fila in lector:
+                yield lector.line_num, fila
+        else:
+            for numero, linea in enumerate(f, start=1):
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    yield numero, json.loads(linea)
+                except json.JSONDecodeError as exc:
+                    yield numero, ValueError(f"JSON inválido: {exc.msg}")
+
+
+def validar(fila):
+    """Devuelve una Question sin guardar o lanza ValueError (TypeError si la fila no es un objeto)."""
+    if isinstance(fila, Exception):
+        raise fila
+    if not isinstance(fila, dict):
+        raise TypeError("la fila no es un objeto")
+
+    faltan = [c for c in CAMPOS if not str(fila.get(c) or "").strip()]
+    if faltan:
+        raise ValueError(f"faltan campos: {', '.join(faltan)}")
+
+    correct_option = str(fila["correct_option"]).strip().upper()
+    if correct_option not in OPCIONES_VALIDAS:
+        raise ValueError(f"correct_option inválida: {fila['correct_option']!r}")
+
+    difficulty = DIFICULTADES.get(str(fila["difficulty"]).strip().casefold())
+    if difficulty is None:
+        raise ValueError(f"difficulty inválida: {fila['difficulty']!r}")
+
+    is_active = fila.get("is_active", True)
+    if isinstance(is_active, str):
+        is_active = is_active.strip().casefold() in VERDADERO if is_active.strip() else True
+
+    textos = {c: str(fila[c]).strip() for c in CAMPOS[:5]}
+    for campo in CAMPOS[1:5]:
+        if len(textos[campo]) > Question._meta.get_field(campo).max_length:
+            raise ValueError(f"{campo} es demasiado larga")
+
+    return Question(
+        **textos,
+        correct_option=correct_option,
+        difficulty=difficulty,
+        is_active=bool(is_active),
+        content_hash=Question.compute_content_hash(*textos.values()),
+    )
+
+
+class Command(BaseCommand):
+    help = "Importa un banco de preguntas desde CSV o JSONL en lotes, sin duplicados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo .csv o .jsonl")
+        parser.add_argument("--format", choices=["csv", "jsonl"],
+                            help="Formato del archivo (por defecto, según la extensión).")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Filas por bulk_create.")
+        parser.add_argument("--dry-run", action="store_true", help="Valida y cuenta sin guardar nada (no detecta duplicados entre lotes).")
+        parser.add_argument("--max-errors", type=int, default=20, help="Errores a mostrar en detalle.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        formato = options["format"] or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser mayor que cero.")
+
+        self.dry_run = options["dry_run"]
+        self.verbosity = options["verbosity"]
+        self.leidas = self.insertadas = self.duplicadas = self.invalidas = 0
+        inicio = time.perf_counter()
+
+        lote = {}
+        try:
+            for numero, fila in leer_filas(path, formato):
+                self.leidas += 1
+                try:
+                    question = validar(fila)
+                except (TypeError, ValueError) as exc:
+                    self.invalidas += 1
+                    if self.invalidas <= options["max_errors"]:
+                        self.stderr.write(f"Línea {numero}: {exc}")
+                    continue
+
+                if question.content_hash in lote:
+                    self.duplicadas += 1
+                    continue
+                lote[question.content_hash] = question
+                if len(lote) >= options["batch_size"]:
+                    self.guardar_lote(lote)
+                    lote = {}
+                    self.progreso(inicio)
+        except FileNotFoundError:
+            raise CommandError(f"No existe el archivo {path}")
+
+        if lote:
+            self.guardar_lote(lote)
+
+        if self.insertadas and not self.dry_run:
+            # bulk_create no dispara las señales que invalidan el pool
+            question_pool.invalidate()
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{'[dry-run] ' if self.dry_run else ''}"
+            f"Leídas: {self.leidas}, insertadas: {self.insertadas}, duplicadas: {self.duplicadas}, "
+            f"inválidas: {self.invalidas} en {duracion:.2f}s ({self.leidas / max(duracion, 1e-9):.0f} filas/s)"
+        ))
+
+    def guardar_lote(self, lote):
+        existentes = set(
+            Question.objects.filter(content_hash__in=list(lote)).values_list("content_hash", flat=True)
+        )
+        nuevas = [q for h, q in lote.items() if h not in existentes]
+        self.duplicadas += len(existentes)
+        if self.dry_run or not nuevas:
+            self.insertadas += len(nuevas)
+            return
+        with transaction.atomic():
+            # ignore_conflicts cubre otra importación concurrente con las mismas filas
+            Question.objects.bulk_create(nuevas, ignore_conflicts=True)
+        self.insertadas += len(nuevas)
+
+    def progreso(self, inicio):
+        if self.verbosity >= 2:
+            duracion = time.perf_counter() - inicio
+            self.stdout.write(f"  {self.leidas} filas ({self.leidas / max(duracion, 1e-9):.0f} filas/s)")
@@ -0,0 +1,293 @@
+"""
+Prueba de carga: N jugadores concurrentes juegan partidas completas.
+
+Con el cliente de pruebas de Django (por defecto) todo corre en este mismo
+proceso contra la base configurada; pensado para SQLite:
+
+    DB_ENGINE=sqlite python manage.py migrate
+    DB_ENGINE=sqlite python manage.py collectstatic --noinput
+    DB_ENGINE=sqlite python manage.py loadtest --players 50 --concurrency 8
+
+``collectstatic`` va primero: sin el manifest de estáticos las páginas usan
+los nombres sin hash (juego/storage.py) y no miden lo mismo que en producción.
+
+Con ``--url`` se juega contra un servidor ya levantado (runserver, gunicorn,
+uvicorn). En ese modo no hay conteo de consultas por vista.
+"""
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import HttpRequest
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import Resolver404, resolve
+
+from juego import game_state
+from juego.models import AttemptQuestion, GameAttempt, LeaderboardEntry
+
+OPCIONES = ["A", "B", "C", "D"]
+AYUDAS = ["5050", "publico", "amigo", "cambiar"]
+NUMERO_RE = re.compile(r'name="question_number" value="(\d+)"')
+FIN_TEXTO = "Resultado del intento"
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, round(p / 100 * len(valores) + 0.5) - 1))
+    return valores[k]
+
+
+def nombre_vista(path):
+    try:
+        return resolve(urllib.parse.urlsplit(path).path).url_name or path
+    except Resolver404:
+        return path
+
+
+class ClienteLocal:
+    """Juega con django.test.Client y cuenta las consultas de cada request."""
+
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, metodo, path, data=None):
+        consultas = []
+
+        def contar(execute, sql, params, many, context):
+            consultas.append(sql)
+            return execute(sql, params, many, context)
+
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(contar):
+            if metodo == "GET":
+                resp = self.client.get(path)
+            else:
+                resp = self.client.post(path, data or {})
+        duracion = time.perf_counter() - inicio
+        return resp.status_code, resp.content.decode(), duracion, len(consultas)
+
+    def cookie(self, nombre):
+        morsel = self.client.cookies.get(nombre)
+        return morsel.value if morsel else None
+
+    def cerrar(self):
+        connection.close()
+
+
+class _SinRedireccion(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ClienteHttp:
+    """Juega contra un servidor real, con cookies y token CSRF."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies),
+            _SinRedireccion(),
+        )
+
+    def request(self, metodo, path, data=None):
+        body = None
+        if metodo == "POST":
+            data = dict(data or {})
+            data["csrfmiddlewaretoken"] = self.cookie("csrftoken") or ""
+            body = urllib.parse.urlencode(data).encode()
+        req = urllib.request.Request(self.base_url + path, data=body, method=metodo)
+        req.add_header("Referer", self.base_url + "/")
+
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(req) as resp:
+                status, contenido = resp.status, resp.read()
+        except urllib.error.HTTPError as exc:
+            status, contenido = exc.code, exc.read()
+        duracion = time.perf_counter() - inicio
+        return status, contenido.decode(errors="replace"), duracion, None
+
+    def cookie(self, nombre):
+        for c in self.cookies:
+            if c.name == nombre:
+                return c.value
+        return None
+
+    def cerrar(self):
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Simula jugadores concurrentes y reporta throughput, latencias p50/p95/p99 y consultas por vista."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=20, help="Cantidad de partidas a jugar.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Jugadores simultáneos (hilos).")
+        parser.add_argument("--correct", type=float, default=0.8, help="Probabilidad de responder bien.")
+        parser.add_argument("--lifeline", type=float, default=0.15,
+                            help="Probabilidad de usar una ayuda disponible antes de cada respuesta.")
+        parser.add_argument("--ranking", type=int, default=1, help="Visitas al ranking por jugador.")
+        parser.add_argument("--url", help="URL base de un servidor levantado (ej. http://127.0.0.1:8000).")
+        parser.add_argument("--seed", type=int, help="Semilla para repetir la misma corrida.")
+        parser.add_argument("--cleanup", action="store_true",
+                            help="Borra al final los intentos creados por la prueba.")
+
+    def handle(self, *args, **options):
+        if options["players"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--players y --concurrency deben ser mayores que cero.")
+
+        self.options = options
+        self.muestras = []
+        self.intentos = []
+        self.errores = 0
+        self.lock = threading.Lock()
+        semilla = options["seed"] if options["seed"] is not None else random.randrange(1 << 30)
+
+        local = not options["url"]
+        if local:
+            setup_test_environment()
+        try:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                list(pool.map(lambda i: self.jugar_partida(i, random.Random(semilla + i)),
+                              range(options["players"])))
+            total = time.perf_counter() - inicio
+        finally:
+            if local:
+                teardown_test_environment()
+
+        self.reportar(total, semilla)
+
+        if options["cleanup"] and self.intentos:
+            GameAttempt.objects.filter(id__in=self.intentos).delete()
+            LeaderboardEntry.objects.filter(attempt_id__in=self.intentos).delete()
+
+    # ---------------------------------------------------------------
+
+    def nuevo_cliente(self):
+        if self.options["url"]:
+            return ClienteHttp(self.options["url"])
+        return ClienteLocal()
+
+    def request(self, cliente, metodo, path, data=None):
+        status, contenido, duracion, consultas = cliente.request(metodo, path, data)
+        with self.lock:
+            self.muestras.append((nombre_vista(path), duracion, consultas))
+            if status >= 400:
+                self.errores += 1
+        return status, contenido
+
+    def intento_id(self, cliente):
+        # Se lee la cookie firmada igual que lo hacen las vistas
+        request = HttpRequest()
+        valor = cliente.cookie(game_state.ATTEMPT_COOKIE)
+        if valor:
+            request.COOKIES[game_state.ATTEMPT_COOKIE] = valor
+        return game_state.get_attempt_id(request)
+
+    def opcion_correcta(self, attempt_id, numero):
+        # Consulta fuera de las métricas: el "jugador" hace trampa para poder
+        # controlar la tasa de aciertos.
+        return AttemptQuestion.objects.filter(
+            attempt_id=attempt_id,
+            question_number=numero,
+            is_spare=False
+        ).values_list("question__correct_option", flat=True).first()
+
+    def jugar_partida(self, indice, rng):
+        cliente = self.nuevo_cliente()
+        try:
+            self.request(cliente, "GET", "/")
+            self.request(cliente, "POST", "/", {"name": f"Carga {indice}", "document": f"LT{indice:06d}"})
+            attempt_id = self.intento_id(cliente)
+            if attempt_id is None:
+                with self.lock:
+                    self.errores += 1
+                return
+            with self.lock:
+                self.intentos.append(attempt_id)
+
+            disponibles = list(AYUDAS)
+            for _ in range(40):  # tope de seguridad
+                status, contenido = self.request(cliente, "GET", "/jugar/")
+                if status != 200 or FIN_TEXTO in contenido:
+                    break
+                match = NUMERO_RE.search(contenido)
+                if not match:
+                    break
+                numero = int(match.group(1))
+
+                if disponibles and rng.random() < self.options["lifeline"]:
+                    ayuda = disponibles.pop(rng.randrange(len(disponibles)))
+                    self.request(cliente, "POST", f"/ayuda/{ayuda}/")
+                    continue
+
+                correcta = self.opcion_correcta(attempt_id, numero)
+                if correcta and rng.random() < self.options["correct"]:
+                    opcion = correcta
+                else:
+                    opcion = rng.choice([o for o in OPCIONES if o != correcta])
+                status, contenido = self.request(cliente, "POST", "/responder/",
+                                                 {"option": opcion, "question_number": numero})
+                if status == 200:  # respuesta incorrecta: se muestra el resultado
+                    break
+
+            for _ in range(self.options["ranking"]):
+                self.request(cliente, "GET", "/ranking/")
+        finally:
+            cliente.cerrar()
+
+    def reportar(self, total, semilla):
+        requests = len(self.muestras)
+        # Para quien llama al comando desde código (ej. benchmark_servers)
+        self.resumen = {
+            "requests": requests,
+            "segundos": total,
+            "req_s": requests / total,
+            "errores": self.errores,
+        }
+        self.stdout.write(
+            f"Partidas: {self.options['players']}  concurrencia: {self.options['concurrency']}  "
+            f"semilla: {semilla}  modo: {'HTTP ' + self.options['url'] if self.options['url'] else 'en proceso'}"
+        )
+        self.stdout.write(
+            f"Requests: {requests} en {total:.2f}s -> {requests / total:.1f} req/s, "
+            f"{self.options['players'] / total:.2f} partidas/s, errores: {self.errores}"
+        )
+
+        por_vista = {}
+        for vista, duracion, consultas in self.muestras:
+            por_vista.setdefault(vista, []).append((duracion, consultas))
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'vista':<16}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'consultas':>12}{'máx':>6}"
+        )
+        for vista in sorted(por_vista):
+            datos = por_vista[vista]
+            tiempos = sorted(d for d, _ in datos)
+            conteos = [q for _, q in datos if q is not None]
+            if conteos:
+                consultas = f"{sum(conteos) / len(conteos):.1f}"
+                maximo = str(max(conteos))
+            else:
+                consultas, maximo = "-", "-"
+            self.stdout.write(
+                f"{vista:<16}{len(datos):>7}"
+                f"{percentil(tiempos, 50) * 1000:>10.1f}"
+                f"{percentil(tiempos, 95) * 1000:>10.1f}"
+                f"{percentil(tiempos, 99) * 1000:>10.1f}"
+                f"{consultas:>12}{maximo:>6}"
+            )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from juego import db_router, leaderboard
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el ranking materializado desde GameAttempt y lo compara con la consulta en vivo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Solo compara el ranking con la consulta en vivo, sin reconstruirlo.",
+        )
+        parser.add_argument(
+            "--max-diffs",
+            type=int,
+            default=20,
+            help="Cantidad máxima de diferencias a mostrar.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            with transaction.atomic():
+                total = leaderboard.rebuild()
+            self.stdout.write(f"Ranking reconstruido: {total} entradas.")
+
+        # Solo verificar es un reporte: puede leer de la réplica. Después de
+        # reconstruir se compara contra la primaria.
+        with db_router.lecturas_en_replica(options["check"]):
+            diferencias = leaderboard.compare()
+        for posicion, esperado, encontrado in diferencias[:options["max_diffs"]]:
+            self.stdout.write(f"  #{posicion}: esperado {esperado}, encontrado {encontrado}")
+
+        if diferencias:
+            raise CommandError(f"El ranking no coincide con la consulta en vivo ({len(diferencias)} diferencias).")
+        self.stdout.write(self.style.SUCCESS("El ranking coincide con la consulta en vivo."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from juego import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el resumen por jugador (PlayerStats) desde el ranking materializado."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = leaderboard.rebuild_players()
+        self.stdout.write(self.style.SUCCESS(f"Resumen por jugador reconstruido: {total} jugadores."))
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from juego import archive
+
+
+class Command(BaseCommand):
+    help = "Devuelve a la base los intentos de un archivo generado por archive_attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo .jsonl.gz generado por archive_attempts.")
+        parser.add_argument("--batch-size", type=int, default=archive.BATCH_SIZE,
+                            help="Intentos por lote.")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"No existe el archivo {path}")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser mayor que cero.")
+
+        total = 0
+        for cantidad in archive.restore(path, options["batch_size"]):
+            total += cantidad
+        self.stdout.write(self.style.SUCCESS(f"Restaurados {total} intentos desde {path}"))
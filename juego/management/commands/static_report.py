@@ -0,0 +1,115 @@
+"""
+Bytes transferidos en una partida completa de 15 preguntas (flujo HTML, sin
+JavaScript), con los estilos dentro de cada página (como antes) y en
+archivos estáticos con hash y precomprimidos (como ahora).
+
+Juega una partida ganadora con el cliente de pruebas dentro de una
+transacción que se deshace al final, y para cada página suma:
+
+- antes: el HTML más el CSS/JS que ahora referencia, que iba incrustado y
+  se bajaba en cada página;
+- ahora, primera partida: el HTML más cada archivo estático una sola vez,
+  en su versión comprimida (brotli si está instalado, si no gzip);
+- ahora, partidas siguientes: solo el HTML (los estáticos quedan en la
+  caché del navegador por un año).
+
+    python manage.py static_report
+"""
+import gzip
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import HttpRequest
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from juego import game_state
+from juego.game import PREMIOS
+from juego.models import AttemptQuestion
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ESTATICO_RE = re.compile(r'(?:href|src)="(/?{}[^"]+)"'.format(re.escape(settings.STATIC_URL.lstrip("/"))))
+NUMERO_RE = re.compile(r'name="question_number" value="(\d+)"')
+
+# Nombres sin hash para leer los archivos fuente con los finders
+SIN_MANIFEST = {
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def _tamanos(url):
+    """(bytes sin comprimir, bytes comprimidos) de un archivo estático."""
+    nombre = url.split(settings.STATIC_URL.lstrip("/"), 1)[1]
+    with open(finders.find(nombre), "rb") as f:
+        contenido = f.read()
+    comprimido = brotli.compress(contenido, quality=11) if brotli else gzip.compress(contenido, 9)
+    return len(contenido), min(len(contenido), len(comprimido))
+
+
+class Command(BaseCommand):
+    help = "Compara los bytes por partida con estilos incrustados y con estáticos cacheables."
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with override_settings(STORAGES=SIN_MANIFEST), transaction.atomic():
+                paginas = self.jugar()
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        antes = ahora = siguientes = 0
+        vistos = set()
+        for html, estaticos in paginas:
+            antes += html + sum(_tamanos(url)[0] for url in estaticos)
+            siguientes += html
+            ahora += html + sum(_tamanos(url)[1] for url in estaticos if url not in vistos)
+            vistos.update(estaticos)
+
+        compresion = "brotli" if brotli else "gzip"
+        self.stdout.write(f"Requests por partida: {len(paginas)}  (estáticos: {len(vistos)}, {compresion})")
+        self.stdout.write(f"{'':<34}{'bytes':>10}{'vs antes':>10}")
+        for etiqueta, total in (
+            ("Antes (estilos incrustados)", antes),
+            ("Ahora, primera partida", ahora),
+            ("Ahora, partidas siguientes", siguientes),
+        ):
+            self.stdout.write(f"{etiqueta:<34}{total:>10}{total / antes:>10.0%}")
+
+    def jugar(self):
+        """[(bytes del HTML, [urls de estáticos])] de cada request de la partida."""
+        client = Client()
+        paginas = []
+
+        def pedir(metodo, path, data=None):
+            response = client.get(path) if metodo == "GET" else client.post(path, data or {})
+            contenido = response.content.decode()
+            paginas.append((len(response.content), ESTATICO_RE.findall(contenido)))
+            return contenido
+
+        pedir("GET", "/")
+        pedir("POST", "/", {"name": "Reporte", "document": "static-report"})
+        # La cookie firmada del intento, leída igual que en las vistas
+        request = HttpRequest()
+        request.COOKIES[game_state.ATTEMPT_COOKIE] = client.cookies[game_state.ATTEMPT_COOKIE].value
+        attempt_id = game_state.get_attempt_id(request)
+
+        for numero in range(1, len(PREMIOS) + 1):
+            contenido = pedir("GET", "/jugar/")
+            if not NUMERO_RE.search(contenido):
+                break
+            correcta = AttemptQuestion.objects.filter(
+                attempt_id=attempt_id, question_number=numero, is_spare=False
+            ).values_list("question__correct_option", flat=True).first()
+            pedir("POST", "/responder/", {"option": correcta, "question_number": numero})
+        pedir("GET", "/jugar/")   # resultado
+        pedir("GET", "/ranking/")
+        return paginas
@@ -0,0 +1,220 @@
+# juego/middleware.py
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import db_router
+
+logger = logging.getLogger(__name__)
+
+# Presupuesto de consultas por vista (nombre de la URL). Los tests de
+# juego/tests.py fallan si alguna vista lo supera al jugar partidas completas.
+QUERY_BUDGETS = {
+    "home": 6,            # crear intento + validar y guardar la escalera (+ carga del pool)
+    "jugar": 6,           # intento + id de la pregunta (+ la pregunta si el fragmento no está en caché;
+                          # + UPDATE, ranking y PlayerStats si el plazo venció)
+    "responder": 7,       # pregunta + UPDATE condicional (+ intento, ranking y PlayerStats al terminar)
+    "ayuda": 5,           # pregunta + UPDATE condicional (cambiar: + repuesto + borrar/promover)
+    "ranking": 2,         # podio + primera página (0 si está en caché)
+    "ranking_cache_stats": 0,
+    "ranking_api": 1,
+    "ranking_stream": 0,  # el ranking lo lee el publicador de juego/ranking_live.py, no la request
+    "api_iniciar": 7,
+    "api_estado": 6,      # como jugar
+    "api_responder": 7,
+    "api_ayuda": 5,
+    "torneo": 3,          # ronda (0 si está en caché) + torneo + alta del intento al inscribirse
+    "api_torneo_estado": 1,     # el intento; la ronda y los porcentajes salen de la caché
+    "api_torneo_responder": 0,  # la respuesta va a la caché (juego/tournament.py)
+}
+
+# Tiempo máximo en la base por request. Solo se avisa en el log: en los
+# tests dependería de la máquina.
+DB_TIME_BUDGET_MS = 100
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def _es_control_de_transaccion(sql):
+    return sql.lstrip()[:32].upper().startswith(
+        ("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+    )
+
+
+class _Contador:
+    """execute_wrapper que cuenta consultas y acumula el tiempo en la base."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - inicio
+            # BEGIN y los savepoints dependen del motor y de si la vista corre
+            # dentro de otra transacción (por ejemplo en los tests); no se
+            # cuentan como consultas.
+            if not _es_control_de_transaccion(sql):
+                self.queries += 1
+
+
+def _registrar(vista, contador):
+    with _lock:
+        datos = _stats.setdefault(vista, {
+            "requests": 0,
+            "queries": 0,
+            "max_queries": 0,
+            "db_time": 0.0,
+            "max_db_time": 0.0,
+        })
+        datos["requests"] += 1
+        datos["queries"] += contador.queries
+        datos["max_queries"] = max(datos["max_queries"], contador.queries)
+        datos["db_time"] += contador.db_time
+        datos["max_db_time"] = max(datos["max_db_time"], contador.db_time)
+
+
+def snapshot():
+    """Copia de las estadísticas acumuladas por vista en este proceso."""
+    with _lock:
+        return {vista: dict(datos) for vista, datos in _stats.items()}
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def _medir(contador):
+    stack = ExitStack()
+    for conn in connections.all():
+        stack.enter_context(conn.execute_wrapper(contador))
+    return stack
+
+
+class QueryStatsMiddleware:
+    """
+    Cuenta las consultas y el tiempo en la base de cada request, agrupados
+    por el nombre de la URL resuelta. Avisa en el log cuando una vista pasa
+    su presupuesto y agrega un encabezado Server-Timing con el tiempo en la
+    base, visible en las herramientas del navegador.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        contador = _Contador()
+        with _medir(contador):
+            response = self.get_response(request)
+        return self._reportar(request, response, contador)
+
+    async def __acall__(self, request):
+        # Las conexiones son por hilo y el ORM async corre en el hilo de
+        # sync_to_async(thread_sensitive=True), que bajo ASGI es uno por
+        # request: el contador se instala (y se quita) en ese hilo, no en el
+        # del event loop, donde no pasa ninguna consulta.
+        contador = _Contador()
+        stack = await sync_to_async(_medir, thread_sensitive=True)(contador)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close, thread_sensitive=True)()
+        return self._reportar(request, response, contador)
+
+    def _reportar(self, request, response, contador):
+        match = request.resolver_match
+        vista = match.url_name if match and match.url_name else None
+        if vista is None:
+            return response
+
+        _registrar(vista, contador)
+        presupuesto = QUERY_BUDGETS.get(vista)
+        if presupuesto is not None and contador.queries > presupuesto:
+            logger.warning(
+                "La vista %s hizo %d consultas (presupuesto: %d)",
+                vista, contador.queries, presupuesto,
+            )
+        if contador.db_time * 1000 > DB_TIME_BUDGET_MS:
+            logger.warning(
+                "La vista %s pasó %.1f ms en la base (presupuesto: %d ms)",
+                vista, contador.db_time * 1000, DB_TIME_BUDGET_MS,
+            )
+        response["Server-Timing"] = (
+            f'db;dur={contador.db_time * 1000:.1f};desc="{contador.queries} consultas"'
+        )
+        return response
+
+
+class ReadReplicaMiddleware:
+    """
+    Elige, al resolver la URL, si las lecturas de la request van a la
+    réplica (ver juego/db_router.py). Si la request escribió algún modelo
+    del juego (la sesión no cuenta), deja la cookie ``PRIMARY_COOKIE`` por
+    ``JUEGO_REPLICA_LAG_SECONDS``: las requests siguientes de ese cliente
+    leen de la primaria hasta que la réplica alcance lo que acaba de
+    escribir.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with db_router.lecturas_en_replica(False) as estado:
+            response = self.get_response(request)
+        return self._marcar(response, estado)
+
+    async def __acall__(self, request):
+        with db_router.lecturas_en_replica(False) as estado:
+            response = await self.get_response(request)
+        return self._marcar(response, estado)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        db_router.usar_replica(self._lee_de_replica(request))
+
+    def _lee_de_replica(self, request):
+        if not db_router.replica_alias() or db_router.PRIMARY_COOKIE in request.COOKIES:
+            return False
+        match = request.resolver_match
+        if match.url_name in db_router.REPLICA_VIEWS:
+            return True
+        # Listados del admin (los formularios leen de la primaria)
+        return (
+            match.app_name == "admin"
+            and request.method in ("GET", "HEAD")
+            and (match.url_name or "").endswith("_changelist")
+        )
+
+    def _marcar(self, response, estado):
+        if estado.escribio_juego and db_router.replica_alias():
+            response.set_cookie(
+                db_router.PRIMARY_COOKIE, "1",
+                max_age=settings.JUEGO_REPLICA_LAG_SECONDS,
+                httponly=True,
+                samesite="Lax",
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
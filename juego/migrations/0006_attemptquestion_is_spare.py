@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0005_merge_0003_attemptquestion_0004_cargar_preguntas'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='attemptquestion',
+            name='is_spare',
+            field=models.BooleanField(default=False),
+        ),
+    )
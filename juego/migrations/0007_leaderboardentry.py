@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0006_attemptquestion_is_spare'),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_id', models.PositiveBigIntegerField(unique=True, verbose_name='Intento')),
+                ('name', models.CharField(max_length=150, verbose_name='Nombre jugador')),
+                ('document', models.CharField(max_length=50, verbose_name='Documento')),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de intento')),
+                ('max_reached_question', models.PositiveIntegerField(default=0)),
+                ('current_prize', models.PositiveIntegerField(default=0)),
+                ('finished_reason', models.CharField(blank=True, choices=[('WIN', 'Ganó'), ('LOSE', 'Perdió'), ('TIME', 'Tiempo agotado'), ('QUIT', 'Abandono'), (None, 'En juego')], max_length=10, null=True, verbose_name='Motivo de finalización')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-max_reached_question', '-current_prize', 'created_at', 'attempt_id'], name='juego_leaderboard_orden_idx')],
+            },
+        ),
+    )
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0007_leaderboardentry'),
+    )
+
+    operations = (
+        migrations.AddIndex(
+            model_name='attemptquestion',
+            index=models.Index(fields=['attempt', 'question_number'], name='juego_aq_intento_numero_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gameattempt',
+            index=models.Index(fields=['finished', '-max_reached_question', '-current_prize', 'created_at'], name='juego_attempt_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gameattempt',
+            index=models.Index(fields=['document'], name='juego_attempt_documento_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['difficulty', 'is_active'], name='juego_question_dif_activa_idx'),
+        ),
+    )
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:16
+
+import hashlib
+import logging
+
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def _content_hash(q):
+    # Misma fórmula que Question.compute_content_hash (el modelo histórico
+    # no tiene sus métodos)
+    partes = [" ".join(str(p).split()).casefold()
+              for p in (q.text, q.option_a, q.option_b, q.option_c, q.option_d)]
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+def calcular_hashes(apps, schema_editor):
+    Question = apps.get_model("juego", "Question")
+    vistos = {}
+    repetidas = []
+    pendientes = []
+    for q in Question.objects.order_by("id").iterator(chunk_size=1000):
+        h = _content_hash(q)
+        if h in vistos:
+            # Pregunta repetida ya existente: la huella es única, así que la
+            # más nueva queda sin huella y se desactiva (los intentos que la
+            # usaron la siguen referenciando)
+            repetidas.append((q.id, vistos[h]))
+            continue
+        vistos[h] = q.id
+        q.content_hash = h
+        pendientes.append(q)
+        if len(pendientes) >= 1000:
+            Question.objects.bulk_update(pendientes, ["content_hash"])
+            pendientes = []
+    if pendientes:
+        Question.objects.bulk_update(pendientes, ["content_hash"])
+    if repetidas:
+        Question.objects.filter(id__in=[r for r, _ in repetidas]).update(is_active=False)
+        detalle = ", ".join(f"{r} (igual a {o})" for r, o in repetidas)
+        logger.warning("Preguntas repetidas desactivadas y sin huella: %s", detalle)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0008_indices_consultas'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='question',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(calcular_hashes, migrations.RunPython.noop),
+    )
@@ -0,0 +1,67 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.lookups import Exact
+
+# Mismos bits que GameAttempt.LIFELINE_USED / LIFELINE_DISABLED
+USADAS = {"used_5050": 1 << 0, "used_public": 1 << 1, "used_friend": 1 << 2, "used_switch": 1 << 3}
+DESHABILITADAS = {"A": 1 << 4, "B": 1 << 5, "C": 1 << 6, "D": 1 << 7}
+
+
+def empaquetar(apps, schema_editor):
+    GameAttempt = apps.get_model("juego", "GameAttempt")
+    # Un UPDATE por bit, sin recorrer los intentos en Python
+    for campo, bit in USADAS.items():
+        GameAttempt.objects.filter(**{campo: True}).update(
+            lifeline_flags=F("lifeline_flags").bitor(bit)
+        )
+    for letra, bit in DESHABILITADAS.items():
+        GameAttempt.objects.filter(fifty_disabled_options__contains=letra).update(
+            lifeline_flags=F("lifeline_flags").bitor(bit)
+        )
+
+
+def desempaquetar(apps, schema_editor):
+    GameAttempt = apps.get_model("juego", "GameAttempt")
+    for campo, bit in USADAS.items():
+        GameAttempt.objects.filter(Exact(F("lifeline_flags").bitand(bit), bit)).update(**{campo: True})
+    for attempt in GameAttempt.objects.filter(lifeline_flags__gte=DESHABILITADAS["A"]).iterator():
+        letras = [l for l, bit in DESHABILITADAS.items() if attempt.lifeline_flags & bit]
+        if letras:
+            attempt.fifty_disabled_options = ",".join(letras)
+            attempt.save(update_fields=["fifty_disabled_options"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0009_question_content_hash'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='gameattempt',
+            name='lifeline_flags',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ayudas'),
+        ),
+        migrations.RunPython(empaquetar, desempaquetar),
+        migrations.RemoveField(
+            model_name='gameattempt',
+            name='fifty_disabled_options',
+        ),
+        migrations.RemoveField(
+            model_name='gameattempt',
+            name='used_5050',
+        ),
+        migrations.RemoveField(
+            model_name='gameattempt',
+            name='used_friend',
+        ),
+        migrations.RemoveField(
+            model_name='gameattempt',
+            name='used_public',
+        ),
+        migrations.RemoveField(
+            model_name='gameattempt',
+            name='used_switch',
+        ),
+    )
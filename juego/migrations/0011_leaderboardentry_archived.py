@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0010_gameattempt_lifeline_flags'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='archived',
+            field=models.BooleanField(default=False, verbose_name='Archivado'),
+        ),
+    )
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0011_leaderboardentry_archived'),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name='PlayerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document', models.CharField(max_length=50, unique=True, verbose_name='Documento')),
+                ('name', models.CharField(max_length=150, verbose_name='Nombre jugador')),
+                ('best_max_reached_question', models.PositiveIntegerField(default=0)),
+                ('best_prize', models.PositiveIntegerField(default=0)),
+                ('best_at', models.DateTimeField(verbose_name='Fecha del mejor intento')),
+                ('games_played', models.PositiveIntegerField(default=0, verbose_name='Partidas')),
+                ('wins', models.PositiveIntegerField(default=0, verbose_name='Victorias')),
+                ('last_played', models.DateTimeField(verbose_name='Última partida')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-best_max_reached_question', '-best_prize', 'best_at', 'id'], name='juego_player_orden_idx')],
+            },
+        ),
+    )
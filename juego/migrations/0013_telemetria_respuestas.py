@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0012_playerstats'),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='juego.question')),
+                ('answers', models.PositiveIntegerField(default=0, verbose_name='Respuestas')),
+                ('correct', models.PositiveIntegerField(default=0, verbose_name='Correctas')),
+                ('accuracy', models.FloatField(default=0, verbose_name='Tasa de acierto')),
+                ('timed_answers', models.PositiveIntegerField(default=0, verbose_name='Respuestas con tiempo')),
+                ('mean_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('p50_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('p90_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('latency_histogram', models.JSONField(default=list)),
+                ('suggested_difficulty', models.CharField(blank=True, choices=[('EASY', 'Fácil'), ('MEDIUM', 'Media'), ('HARD', 'Difícil')], max_length=10, null=True)),
+                ('miscalibrated', models.BooleanField(default=False, verbose_name='Mal calibrada')),
+                ('computed_at', models.DateTimeField(verbose_name='Calculado')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='attemptquestion',
+            name='is_correct',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attemptquestion',
+            name='response_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attemptquestion',
+            name='selected_option',
+            field=models.CharField(blank=True, max_length=1, null=True),
+        ),
+    )
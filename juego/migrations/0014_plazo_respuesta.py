@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0013_telemetria_respuestas'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='gameattempt',
+            name='question_deadline',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Plazo de respuesta'),
+        ),
+        migrations.AddIndex(
+            model_name='gameattempt',
+            index=models.Index(fields=['finished', 'question_deadline'], name='juego_attempt_plazo_idx'),
+        ),
+    )
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0014_plazo_respuesta'),
+    )
+
+    operations = (
+        migrations.AddIndex(
+            model_name='gameattempt',
+            index=models.Index(fields=['created_at'], name='juego_attempt_fecha_idx'),
+        ),
+    )
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0015_indice_fecha_intento'),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name='Tournament',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150, verbose_name='Nombre')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+                ('status', models.CharField(choices=[('WAITING', 'Esperando jugadores'), ('OPEN', 'Pregunta abierta'), ('CLOSED', 'Pregunta cerrada'), ('FINISHED', 'Terminado')], default='WAITING', max_length=10, verbose_name='Estado')),
+                ('current_question_number', models.PositiveIntegerField(default=0, verbose_name='Pregunta')),
+                ('question_deadline', models.DateTimeField(blank=True, null=True, verbose_name='Plazo de respuesta')),
+                ('used_question_ids', models.JSONField(default=list, editable=False)),
+                ('question', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='juego.question')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='gameattempt',
+            name='tournament',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempts', to='juego.tournament'),
+        ),
+        migrations.AddIndex(
+            model_name='gameattempt',
+            index=models.Index(fields=['tournament', 'finished', 'current_question_number'], name='juego_attempt_torneo_idx'),
+        ),
+    )
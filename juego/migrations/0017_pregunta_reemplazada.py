@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('juego', '0016_torneo_en_vivo'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='attemptquestion',
+            name='replaced',
+            field=models.BooleanField(default=False),
+        ),
+    )
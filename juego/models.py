@@ -1,3 +1,7 @@
+import hashlib
+from types import MappingProxyType
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
 from django.db import models
 
 
@@ -35,9 +39,79 @@ class Question(models.Model):
 
     is_active = models.BooleanField("Activa", default=True)
 
+    # Huella del contenido (texto + opciones) para no importar duplicados
+    content_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = (
+            # Pool de preguntas: SELECT id WHERE difficulty=? AND is_active.
+            # En InnoDB el índice secundario ya incluye la PK, así que cubre
+            # la consulta sin tocar la tabla.
+            models.Index(fields=["difficulty", "is_active"], name="juego_question_dif_activa_idx"),
+        )
+
     def __str__(self):
         return f"[{self.get_difficulty_display()}] {self.text[:60]}..."
 
+    @staticmethod
+    def compute_content_hash(text, option_a, option_b, option_c, option_d):
+        """SHA-256 del texto y las opciones, sin distinguir mayúsculas ni espacios extra."""
+        partes = [" ".join(str(p).split()).casefold() for p in (text, option_a, option_b, option_c, option_d)]
+        return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+    def validate_unique(self, exclude=None):
+        # content_hash no está en el formulario (editable=False), así que
+        # Django no lo valida: sin esto, repetir otra pregunta desde el admin
+        # terminaba en IntegrityError
+        super().validate_unique(exclude)
+        content_hash = self.compute_content_hash(
+            self.text, self.option_a, self.option_b, self.option_c, self.option_d
+        )
+        repetida = (
+            Question.objects.filter(content_hash=content_hash)
+            .exclude(pk=self.pk).values_list("pk", flat=True).first()
+        )
+        if repetida is not None:
+            raise ValidationError({
+                NON_FIELD_ERRORS: [f"Ya existe una pregunta con el mismo texto y opciones (id {repetida})."],
+            })
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash(
+            self.text, self.option_a, self.option_b, self.option_c, self.option_d
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "content_hash" not in update_fields:
+            kwargs["update_fields"] = {*update_fields, "content_hash"}
+        super().save(*args, **kwargs)
+
+
+class Tournament(models.Model):
+    """
+    Torneo en vivo (juego/tournament.py): todos los jugadores reciben la
+    misma pregunta al mismo tiempo y los que fallan quedan eliminados. Cada
+    jugador es un ``GameAttempt`` con ``tournament``.
+    """
+    class Status(models.TextChoices):
+        WAITING = 'WAITING', 'Esperando jugadores'
+        OPEN = 'OPEN', 'Pregunta abierta'
+        CLOSED = 'CLOSED', 'Pregunta cerrada'
+        FINISHED = 'FINISHED', 'Terminado'
+
+    name = models.CharField("Nombre", max_length=150)
+    created_at = models.DateTimeField("Fecha", auto_now_add=True)
+    status = models.CharField("Estado", max_length=10, choices=Status.choices, default=Status.WAITING)
+    current_question_number = models.PositiveIntegerField("Pregunta", default=0)  # 0 = no empezó
+    question = models.ForeignKey(
+        Question, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    question_deadline = models.DateTimeField("Plazo de respuesta", null=True, blank=True)
+    # Preguntas ya usadas en el torneo, para no repetirlas
+    used_question_ids = models.JSONField(default=list, editable=False)
+
+    def __str__(self):
+        return f"{self.name} - {self.get_status_display()}"
+
 
 class GameAttempt(models.Model):
     name = models.CharField("Nombre jugador", max_length=150)
@@ -47,13 +121,20 @@ class GameAttempt(models.Model):
     current_question_number = models.PositiveIntegerField(default=1)
     max_reached_question = models.PositiveIntegerField(default=0)
     current_prize = models.PositiveIntegerField(default=0)
-    used_5050 = models.BooleanField(default=False)
-    used_public = models.BooleanField(default=False)
-    used_friend = models.BooleanField(default=False)
-    used_switch = models.BooleanField(default=False)
 
-    # Guardamos las opciones deshabilitadas por 50:50, ej: "B,D"
-    fifty_disabled_options = models.CharField(max_length=10, blank=True, null=True)
+    # Estado de las ayudas en un solo entero (ver juego/lifelines.py):
+    #   bits 0-3  ayudas usadas: 5050, público, amigo, cambiar
+    #   bits 4-7  opciones A-D deshabilitadas por el 50:50 en la pregunta actual
+    #   bit 8     resultado del público visible en la pregunta actual
+    #   bit 9     sugerencia del amigo visible en la pregunta actual
+    # Los bits 4-9 se limpian al responder y al cambiar de pregunta.
+    lifeline_flags = models.PositiveIntegerField("Ayudas", default=0)
+
+    LIFELINE_USED = MappingProxyType({"5050": 1 << 0, "publico": 1 << 1, "amigo": 1 << 2, "cambiar": 1 << 3})
+    LIFELINE_USED_MASK = 0b1111
+    LIFELINE_DISABLED = MappingProxyType({"A": 1 << 4, "B": 1 << 5, "C": 1 << 6, "D": 1 << 7})
+    LIFELINE_PUBLIC_VISIBLE = 1 << 8
+    LIFELINE_FRIEND_VISIBLE = 1 << 9
 
     FINISH_REASONS = [
         ('WIN', 'Ganó'),
@@ -70,18 +151,72 @@ class GameAttempt(models.Model):
         blank=True
     )
     finished = models.BooleanField(default=False)
+    # Hasta cuándo se puede responder la pregunta actual (ver juego/game.py)
+    question_deadline = models.DateTimeField("Plazo de respuesta", null=True, blank=True)
+    # Jugador de un torneo en vivo (la pregunta la pone el torneo, no se sortea)
+    tournament = models.ForeignKey(
+        Tournament, on_delete=models.SET_NULL, null=True, blank=True, related_name="attempts"
+    )
+
+    class Meta:
+        indexes = (
+            # Intentos vencidos para el comando expire_attempts
+            models.Index(fields=["finished", "question_deadline"], name="juego_attempt_plazo_idx"),
+            # Consulta en vivo del ranking (reconstrucción y verificación)
+            models.Index(
+                fields=["finished", "-max_reached_question", "-current_prize", "created_at"],
+                name="juego_attempt_ranking_idx",
+            ),
+            # Búsqueda por documento en el admin
+            models.Index(fields=["document"], name="juego_attempt_documento_idx"),
+            # Filtro por fecha en el admin
+            models.Index(fields=["created_at"], name="juego_attempt_fecha_idx"),
+            # Jugadores que siguen en la ronda de un torneo (eliminación)
+            models.Index(
+                fields=["tournament", "finished", "current_question_number"],
+                name="juego_attempt_torneo_idx",
+            ),
+        )
 
     def __str__(self):
         estado = "Terminado" if self.finished else "En juego"
         return f"{self.name} ({self.document}) - {estado} - Pregunta {self.max_reached_question}"
 
-    def get_current_difficulty(self):
-        if 1 <= self.current_question_number <= 5:
+    @staticmethod
+    def difficulty_for(question_number):
+        if 1 <= question_number <= 5:
             return Difficulty.EASY
-        elif 6 <= self.current_question_number <= 10:
+        elif 6 <= question_number <= 10:
             return Difficulty.MEDIUM
         else:
             return Difficulty.HARD
+
+    def get_current_difficulty(self):
+        return self.difficulty_for(self.current_question_number)
+
+    def lifeline_used(self, nombre):
+        return bool(self.lifeline_flags & self.LIFELINE_USED[nombre])
+
+    @property
+    def used_5050(self):
+        return self.lifeline_used("5050")
+
+    @property
+    def used_public(self):
+        return self.lifeline_used("publico")
+
+    @property
+    def used_friend(self):
+        return self.lifeline_used("amigo")
+
+    @property
+    def used_switch(self):
+        return self.lifeline_used("cambiar")
+
+    @property
+    def disabled_letters(self):
+        """Opciones que el 50:50 deshabilitó en la pregunta actual."""
+        return [l for l, bit in self.LIFELINE_DISABLED.items() if self.lifeline_flags & bit]
         
 class AttemptQuestion(models.Model):
     attempt = models.ForeignKey(
@@ -94,10 +229,133 @@ class AttemptQuestion(models.Model):
         on_delete=models.CASCADE
     )
     question_number = models.PositiveIntegerField()  # número de la pregunta en el juego (1,2,3,...)
+    # Pregunta de repuesto para "Cambiar de pregunta"; su question_number es
+    # el primero del nivel al que pertenece (1, 6 u 11)
+    is_spare = models.BooleanField(default=False)
+    # Pregunta que se mostró y se cambió con "Cambiar de pregunta": queda
+    # fuera de la escalera (is_spare=True) con el número en que se mostró
+    replaced = models.BooleanField(default=False)
     asked_at = models.DateTimeField(auto_now_add=True)
 
+    # Telemetría de la respuesta (juego/telemetry.py); se escribe por lotes,
+    # así que puede llegar unos segundos después de responder
+    selected_option = models.CharField(max_length=1, null=True, blank=True)
+    is_correct = models.BooleanField(null=True, blank=True)
+    response_ms = models.PositiveIntegerField(null=True, blank=True)  # medido en el servidor
+
     class Meta:
         unique_together = ('attempt', 'question')  # la misma pregunta no se repite en el mismo intento
+        indexes = (
+            # Pregunta actual: WHERE attempt_id=? AND question_number=?
+            models.Index(fields=["attempt", "question_number"], name="juego_aq_intento_numero_idx"),
+        )
+
+    def __str__(self):
+        return f"Intento {self.attempt_id} - Pregunta #{self.question_number}: {self.question_id}"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Copia desnormalizada de un intento terminado, mantenida al terminar cada
+    juego. El ranking se lee de esta tabla por su índice de orden, así que
+    el costo de leer el top-N no depende de cuántos intentos existan.
+
+    ``attempt_id`` no es una ForeignKey a propósito: la entrada conserva su
+    lugar en el ranking aunque el intento se archive o se borre.
+    ``archived`` marca las entradas cuyo intento ya no está en
+    ``GameAttempt`` (ver juego/archive.py).
+    """
+    attempt_id = models.PositiveBigIntegerField("Intento", unique=True)
+    name = models.CharField("Nombre jugador", max_length=150)
+    document = models.CharField("Documento", max_length=50)
+    created_at = models.DateTimeField("Fecha de intento")
+    max_reached_question = models.PositiveIntegerField(default=0)
+    current_prize = models.PositiveIntegerField(default=0)
+    finished_reason = models.CharField(
+        "Motivo de finalización",
+        max_length=10,
+        choices=GameAttempt.FINISH_REASONS,
+        null=True,
+        blank=True
+    )
+    archived = models.BooleanField("Archivado", default=False)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=["-max_reached_question", "-current_prize", "created_at", "attempt_id"],
+                name="juego_leaderboard_orden_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.name} ({self.document}) - Pregunta {self.max_reached_question} - ${self.current_prize}"
+
+
+class PlayerStats(models.Model):
+    """
+    Resumen por jugador (``document``), actualizado cada vez que termina uno
+    de sus intentos (juego.leaderboard.record_finished). El ranking por
+    jugador se lee de aquí, sin agrupar ``GameAttempt``.
+
+    El mejor resultado es el de mayor pregunta alcanzada y, a igualdad, el
+    de mayor premio; ``best_at`` es la fecha del intento en que se logró.
+    """
+    document = models.CharField("Documento", max_length=50, unique=True)
+    name = models.CharField("Nombre jugador", max_length=150)  # el del último intento
+    best_max_reached_question = models.PositiveIntegerField(default=0)
+    best_prize = models.PositiveIntegerField(default=0)
+    best_at = models.DateTimeField("Fecha del mejor intento")
+    games_played = models.PositiveIntegerField("Partidas", default=0)
+    wins = models.PositiveIntegerField("Victorias", default=0)
+    last_played = models.DateTimeField("Última partida")
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=["-best_max_reached_question", "-best_prize", "best_at", "id"],
+                name="juego_player_orden_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.name} ({self.document}) - Mejor: pregunta {self.best_max_reached_question} - ${self.best_prize}"
+
+    def add_result(self, name, created_at, max_reached_question, current_prize, finished_reason):
+        """Suma un intento terminado al resumen (sin guardar)."""
+        self.games_played += 1
+        if finished_reason == "WIN":
+            self.wins += 1
+        if self.last_played is None or created_at >= self.last_played:
+            self.last_played = created_at
+            self.name = name
+        nuevo = (max_reached_question, current_prize)
+        actual = (self.best_max_reached_question, self.best_prize)
+        if self.best_at is None or nuevo > actual or (nuevo == actual and created_at < self.best_at):
+            self.best_max_reached_question, self.best_prize = nuevo
+            self.best_at = created_at
+
+
+class QuestionStats(models.Model):
+    """
+    Estadísticas de respuesta de cada pregunta, calculadas fuera de línea
+    por ``manage.py calibrate_questions`` a partir de la telemetría de
+    ``AttemptQuestion``.
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True,
+                                    related_name="stats")
+    answers = models.PositiveIntegerField("Respuestas", default=0)
+    correct = models.PositiveIntegerField("Correctas", default=0)
+    accuracy = models.FloatField("Tasa de acierto", default=0)
+    timed_answers = models.PositiveIntegerField("Respuestas con tiempo", default=0)
+    mean_ms = models.PositiveIntegerField(null=True, blank=True)
+    p50_ms = models.PositiveIntegerField(null=True, blank=True)
+    p90_ms = models.PositiveIntegerField(null=True, blank=True)
+    # Cantidad de respuestas por rango de tiempo (límites en juego/calibration.py)
+    latency_histogram = models.JSONField(default=list)
+    suggested_difficulty = models.CharField(max_length=10, choices=Difficulty.choices, null=True, blank=True)
+    miscalibrated = models.BooleanField("Mal calibrada", default=False)
+    computed_at = models.DateTimeField("Calculado")
 
     def __str__(self):
-        return f"Intento {self.attempt_id} - Pregunta #{self.question_number}: {self.question_id}"
\ No newline at end of file
+        return f"{self.question_id}: {self.accuracy:.0%} de {self.answers}"
@@ -0,0 +1,126 @@
+# juego/question_pool.py
+"""
+Pool de preguntas en memoria.
+
+En lugar de ``ORDER BY RAND()`` sobre toda la tabla ``Question`` cada vez que
+se necesita una pregunta nueva, cada proceso guarda en un arreglo los IDs de
+las preguntas activas de cada ``Difficulty`` y elige uno al azar en O(1)
+esperado. Solo se carga de la base la fila elegida.
+
+El pool se invalida cuando se guarda o se borra una ``Question`` (señales en
+``juego.signals``). Para que la invalidación llegue también a los demás
+procesos se guarda un número de versión en la caché de Django: si la caché es
+compartida (Redis, Memcached) todos los workers ven el cambio; con la caché
+local de cada proceso, ``POOL_TTL`` limita cuánto tiempo puede quedar viejo.
+"""
+import random
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import Question
+
+POOL_TTL = 300  # segundos
+POOL_VERSION_KEY = "juego:question_pool:version"
+
+# Intentos de muestreo al azar antes de filtrar el arreglo completo
+_MAX_RANDOM_TRIES = 8
+
+_lock = threading.Lock()
+_pools = {}          # dificultad -> lista de IDs activos
+_loaded_version = None
+_loaded_at = 0.0
+
+
+def _current_version():
+    return cache.get(POOL_VERSION_KEY, 0)
+
+
+def invalidate():
+    """Descarta el pool de este proceso y avisa a los demás vía caché."""
+    global _loaded_version
+    with _lock:
+        _pools.clear()
+        _loaded_version = None
+    try:
+        cache.incr(POOL_VERSION_KEY)
+    except ValueError:
+        cache.add(POOL_VERSION_KEY, 1, timeout=None)
+
+
+def _get_ids(difficulty):
+    global _loaded_version, _loaded_at
+
+    version = _current_version()
+    now = time.monotonic()
+    with _lock:
+        if _loaded_version != version or now - _loaded_at > POOL_TTL:
+            _pools.clear()
+            _loaded_version = version
+            _loaded_at = now
+
+        ids = _pools.get(difficulty)
+        if ids is None:
+            ids = list(
+                Question.objects.filter(
+                    difficulty=difficulty,
+                    is_active=True
+                ).values_list("id", flat=True)
+            )
+            _pools[difficulty] = ids
+        return ids
+
+
+def pick_id(difficulty, exclude=()):
+    """
+    Devuelve un ID de pregunta activa de ``difficulty`` que no esté en
+    ``exclude``, o ``None`` si no queda ninguna.
+    """
+    ids = _get_ids(difficulty)
+    if not ids:
+        return None
+
+    exclude = set(exclude)
+    # Los intentos usan pocas preguntas por dificultad, así que casi siempre
+    # el primer sorteo ya es válido.
+    for _ in range(_MAX_RANDOM_TRIES):
+        candidate = random.choice(ids)
+        if candidate not in exclude:
+            return candidate
+
+    restantes = [i for i in ids if i not in exclude]
+    if not restantes:
+        return None
+    return random.choice(restantes)
+
+
+def sample_ids(difficulty, k):
+    """
+    Devuelve hasta ``k`` IDs distintos de preguntas activas de ``difficulty``
+    en orden aleatorio (menos si el pool no alcanza).
+    """
+    ids = _get_ids(difficulty)
+    return random.sample(ids, min(k, len(ids)))
+
+
+def pick(difficulty, exclude=()):
+    """
+    Igual que ``pick_id`` pero devuelve la ``Question`` cargada. Si el ID del
+    pool ya no es válido (otro proceso la desactivó) se refresca el pool y se
+    vuelve a intentar una vez.
+    """
+    for _ in range(2):
+        question_id = pick_id(difficulty, exclude)
+        if question_id is None:
+            return None
+        question = Question.objects.filter(
+            id=question_id,
+            difficulty=difficulty,
+            is_active=True
+        ).first()
+        if question is not None:
+            return question
+        invalidate()
+    return None
+
@@ -0,0 +1,219 @@
+# juego/ranking_live.py
+"""
+Ranking en vivo por Server-Sent Events (``ranking/stream/``) para las
+pantallas del evento, en lugar de recargar ``ranking/`` cada pocos segundos.
+
+Un solo ``Publicador`` por proceso tiene en memoria el podio y la primera
+página del ranking (``TOP`` puestos) y los reparte a todas las pantallas
+conectadas:
+
+- lee el ranking de la base una vez, cuando se conecta la primera pantalla
+  (y de nuevo solo si pierde eventos o tras ``leaderboard.rebuild``);
+- cada ``SONDEO_SEGUNDOS`` mira en la caché los intentos terminados que
+  anuncia ``leaderboard.publish_finished`` (en este proceso o en otro) y
+  manda a cada pantalla solo lo que cambió: entradas nuevas, puestos que se
+  movieron y las que salen del top.
+
+Conectar otra pantalla no hace consultas: recibe la copia en memoria. Los
+anuncios de otros procesos (varios workers) llegan si la caché es compartida
+(Redis, ``REDIS_URL``); con ``LocMemCache`` solo se ven los del mismo proceso.
+
+Cada pantalla tiene una cola acotada (``COLA_MAXIMA``). Si no la vacía a
+tiempo (red lenta), se descartan sus cambios pendientes y, cuando se pone al
+día, recibe el ranking completo. Sin cambios, cada ``HEARTBEAT_SEGUNDOS`` se
+manda un comentario para que los proxies no corten la conexión.
+
+Necesita las vistas async (ASGI): bajo WSGI la respuesta nunca terminaría y
+la ruta no se registra (ver juego/urls.py).
+"""
+import asyncio
+import json
+import logging
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateformat import format as date_format
+
+from . import db_router, leaderboard
+from .models import LeaderboardEntry
+
+logger = logging.getLogger(__name__)
+
+TOP = 3 + leaderboard.PAGE_SIZE   # podio + primera página de ranking/
+SONDEO_SEGUNDOS = 0.5
+HEARTBEAT_SEGUNDOS = 15
+COLA_MAXIMA = 32
+RETRY_MS = 3000                   # cuánto espera EventSource para reconectar
+MAX_PENDIENTES = 500              # más eventos atrasados que esto: se relee
+
+# En la cola de una pantalla: mandar el ranking completo al sacarlo
+RANKING = object()
+
+
+def _mensaje(evento, datos):
+    return f"event: {evento}\ndata: {json.dumps(datos, separators=(',', ':'))}\n\n"
+
+
+def _fila(entry):
+    return {
+        **leaderboard.as_dict(entry),
+        "attempt_id": entry.attempt_id,
+        "estado": entry.get_finished_reason_display(),
+        "fecha": date_format(timezone.localtime(entry.created_at), "Y-m-d H:i"),
+    }
+
+
+def _orden(entry):
+    return leaderboard._sort_key(
+        entry.max_reached_question, entry.current_prize, entry.created_at, entry.attempt_id
+    )
+
+
+class Pantalla:
+    """Una conexión SSE: su cola de mensajes pendientes."""
+
+    def __init__(self):
+        self.cola = asyncio.Queue(COLA_MAXIMA)
+        self.atrasada = False
+
+    def enviar(self, mensaje):
+        if self.atrasada:
+            return  # ya tiene pendiente el ranking completo
+        try:
+            self.cola.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.atrasada = True
+            self.cola.put_nowait(RANKING)
+
+
+class Publicador:
+
+    def __init__(self, top=TOP):
+        self.top = top
+        self.filas = None        # LeaderboardEntry del top, en orden
+        self.secuencia = 0       # último evento aplicado
+        self.pantallas = set()
+        self._ranking = None     # mensaje del ranking completo, ya armado
+        self._faltante = None    # evento que no estaba en la caché en el último sondeo
+        self._tarea = None
+
+    def suscribir(self):
+        pantalla = Pantalla()
+        if self.filas is not None:
+            pantalla.cola.put_nowait(RANKING)
+        self.pantallas.add(pantalla)
+        loop = asyncio.get_running_loop()
+        if self._tarea is None or self._tarea.done() or self._tarea.get_loop() is not loop:
+            self._tarea = loop.create_task(self._sondear())
+        return pantalla
+
+    def desuscribir(self, pantalla):
+        self.pantallas.discard(pantalla)
+        if not self.pantallas and self._tarea is not None:
+            self._tarea.cancel()
+            self._tarea = None
+
+    def ranking(self):
+        """Mensaje SSE con el top completo (se arma una vez por cambio)."""
+        if self._ranking is None:
+            self._ranking = _mensaje("ranking", {"results": [_fila(e) for e in self.filas]})
+        return self._ranking
+
+    async def _sondear(self):
+        while self.pantallas:
+            try:
+                await self.sincronizar()
+            except Exception:
+                logger.exception("No se pudo actualizar el ranking en vivo")
+            await asyncio.sleep(SONDEO_SEGUNDOS)
+
+    async def sincronizar(self):
+        """Aplica los intentos terminados desde el último sondeo."""
+        ultimo = await cache.aget(leaderboard.EVENTS_SEQ_KEY, 0)
+        if self.filas is None or ultimo < self.secuencia or ultimo - self.secuencia > MAX_PENDIENTES:
+            await self._releer(ultimo)
+            return
+        if ultimo == self.secuencia:
+            return
+
+        numeros = range(self.secuencia + 1, ultimo + 1)
+        eventos = await cache.aget_many([leaderboard.EVENT_KEY.format(n) for n in numeros])
+        nuevas = []
+        for numero in numeros:
+            key = leaderboard.EVENT_KEY.format(numero)
+            if key not in eventos:
+                # Recién anunciado (se espera un sondeo) o ya expirado: se relee
+                if self._faltante == numero:
+                    await self._releer(ultimo)
+                    return
+                self._faltante = numero
+                break
+            if eventos[key] is None:
+                await self._releer(ultimo)
+                return
+            nuevas += eventos[key]
+            self.secuencia = numero
+        if nuevas:
+            self._aplicar(nuevas)
+
+    async def _releer(self, ultimo):
+        # Siempre de la primaria: la réplica podría no tener todavía los
+        # intentos de los eventos que ya se dan por leídos
+        with db_router.lecturas_en_replica(False):
+            filas, _ = await leaderboard.apage(size=self.top)
+        self.filas = filas
+        self.secuencia = ultimo
+        self._faltante = None
+        self._ranking = None
+        for pantalla in self.pantallas:
+            pantalla.enviar(RANKING)
+
+    def _aplicar(self, nuevas):
+        antes = {e.attempt_id: e.posicion for e in self.filas}
+        por_id = {e.attempt_id: e for e in self.filas}
+        for datos in nuevas:
+            por_id[datos["attempt_id"]] = LeaderboardEntry(**datos)
+        self.filas = sorted(por_id.values(), key=_orden)[:self.top]
+        for posicion, entry in enumerate(self.filas, start=1):
+            entry.posicion = posicion
+
+        ids = {e.attempt_id for e in self.filas}
+        cambios = {
+            "nuevas": [_fila(e) for e in self.filas if e.attempt_id not in antes],
+            "movidas": [
+                {"attempt_id": e.attempt_id, "posicion": e.posicion}
+                for e in self.filas
+                if e.attempt_id in antes and antes[e.attempt_id] != e.posicion
+            ],
+            "salen": [attempt_id for attempt_id in antes if attempt_id not in ids],
+        }
+        if not any(cambios.values()):
+            return  # todas quedaron fuera del top
+        self._ranking = None
+        mensaje = _mensaje("cambios", cambios)
+        for pantalla in self.pantallas:
+            pantalla.enviar(mensaje)
+
+
+publicador = Publicador()
+
+
+async def eventos():
+    """Flujo SSE de una pantalla: el ranking completo y después sus cambios."""
+    pantalla = publicador.suscribir()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            try:
+                mensaje = await asyncio.wait_for(pantalla.cola.get(), HEARTBEAT_SEGUNDOS)
+            except TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if mensaje is RANKING:
+                pantalla.atrasada = False
+                mensaje = publicador.ranking()
+            yield mensaje
+    finally:
+        publicador.desuscribir(pantalla)
@@ -0,0 +1,23 @@
+# juego/signals.py
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import fragments, question_pool, telemetry
+from .models import Question
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidar_pool_preguntas(sender, **kwargs):
+    question_pool.invalidate()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidar_fragmentos_pregunta(sender, instance, **kwargs):
+    fragments.bump_version(instance.id)
+
+
+# La telemetría de las respuestas se escribe por lotes después de la request
+request_finished.connect(telemetry.flush_if_due, dispatch_uid="juego.telemetria")
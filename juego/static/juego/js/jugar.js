@@ -0,0 +1,99 @@
+// juego/static/juego/js/jugar.js
+// Cliente liviano: si el navegador tiene fetch, las respuestas y las
+// ayudas van a la API JSON y la página se actualiza sin recargar. Sin
+// JavaScript los formularios siguen funcionando con POST/redirect.
+(function () {
+  if (!window.fetch || !window.FormData) {
+    return;
+  }
+  var URL_JUGAR = document.currentScript.dataset.urlJugar;
+
+  function mostrar(id, visible) {
+    document.getElementById(id).hidden = !visible;
+  }
+
+  function pintar(data) {
+    var attempt = data.attempt;
+    var question = data.question;
+    if (attempt.finished || !question) {
+      // jugar muestra el resultado final
+      window.location.href = URL_JUGAR;
+      return;
+    }
+
+    document.getElementById("estado-numero").textContent = attempt.current_question_number;
+    document.getElementById("estado-premio").textContent = attempt.current_prize;
+    document.getElementById("estado-premio-nivel").textContent = attempt.premio_nivel;
+    var plazo = document.getElementById("estado-plazo");
+    if (plazo && attempt.question_deadline) {
+      plazo.textContent = new Date(attempt.question_deadline).toLocaleTimeString();
+    }
+    document.getElementById("pregunta-numero").textContent = question.number;
+    document.getElementById("pregunta-texto").textContent = question.text;
+    document.getElementById("question-number").value = question.number;
+
+    document.querySelectorAll("#form-responder .opcion-btn").forEach(function (btn) {
+      btn.querySelector(".opcion-texto").textContent = question.options[btn.value];
+      btn.disabled = question.disabled.indexOf(btn.value) !== -1;
+    });
+
+    document.querySelectorAll("form[data-ayuda]").forEach(function (form) {
+      form.querySelector("button").disabled = attempt.ayudas[form.dataset.ayuda];
+    });
+
+    document.querySelectorAll(".escalera-item").forEach(function (item) {
+      item.classList.toggle("actual", Number(item.dataset.numero) === question.number);
+    });
+
+    var mensaje = document.getElementById("mensaje-info");
+    mensaje.textContent = data.mensaje_info || "";
+    mostrar("mensaje-info", !!data.mensaje_info);
+
+    var publico = data.ayuda_publico_data;
+    if (publico) {
+      ["A", "B", "C", "D"].forEach(function (letra, i) {
+        document.querySelector('#ayuda-publico [data-letra="' + letra + '"]').textContent = publico[i];
+      });
+    }
+    mostrar("ayuda-publico", !!publico);
+
+    document.getElementById("ayuda-amigo-letra").textContent = data.ayuda_amigo_letra || "";
+    mostrar("ayuda-amigo", !!data.ayuda_amigo_letra);
+  }
+
+  function enviar(form, extra) {
+    var datos = new FormData(form);
+    if (extra) {
+      datos.append(extra.name, extra.value);
+    }
+    return fetch(form.dataset.api, {
+      method: "POST",
+      body: datos,
+      credentials: "same-origin"
+    }).then(function (resp) {
+      if (resp.headers.get("Content-Type") !== "application/json") {
+        throw new Error("Respuesta inesperada");
+      }
+      return resp.json();
+    }).then(function (data) {
+      if (data.error) {
+        throw new Error(data.error);
+      }
+      pintar(data);
+    }).catch(function () {
+      // Ante cualquier problema se vuelve al flujo normal de la página
+      window.location.href = URL_JUGAR;
+    });
+  }
+
+  document.querySelectorAll("form[data-api]").forEach(function (form) {
+    form.addEventListener("submit", function (event) {
+      var boton = event.submitter;
+      if (form.id === "form-responder" && !boton) {
+        return;  // navegador sin SubmitEvent.submitter: POST normal
+      }
+      event.preventDefault();
+      enviar(form, boton && boton.name ? boton : null);
+    });
+  });
+})();
@@ -0,0 +1,85 @@
+// juego/static/juego/js/ranking.js
+// Ranking en vivo: con ranking/stream/ (vistas async) el podio y la primera
+// página se actualizan con los eventos del servidor en lugar de recargar
+// la página. Sin EventSource la página queda como está.
+(function () {
+  var URL_STREAM = document.currentScript.dataset.urlStream;
+  if (!URL_STREAM || !window.EventSource) {
+    return;
+  }
+  var RECARGA_MS = 10000;  // lo que tarda en refrescarse la primera página en caché
+  var filas = [];
+  var recargando = false;
+
+  function aplicar(cambios) {
+    var porId = {};
+    filas.forEach(function (fila) { porId[fila.attempt_id] = fila; });
+    cambios.salen.forEach(function (id) { delete porId[id]; });
+    cambios.movidas.forEach(function (movida) {
+      if (porId[movida.attempt_id]) {
+        porId[movida.attempt_id].posicion = movida.posicion;
+      }
+    });
+    cambios.nuevas.forEach(function (fila) { porId[fila.attempt_id] = fila; });
+    filas = Object.keys(porId).map(function (id) { return porId[id]; });
+    filas.sort(function (a, b) { return a.posicion - b.posicion; });
+  }
+
+  function lineas(elemento, textos) {
+    elemento.replaceChildren();
+    textos.forEach(function (texto) {
+      elemento.appendChild(document.createTextNode(texto));
+      elemento.appendChild(document.createElement("br"));
+    });
+  }
+
+  function fila(datos) {
+    var tr = document.createElement("tr");
+    [
+      datos.posicion, datos.name, datos.document, datos.max_reached_question,
+      "$" + datos.current_prize, datos.estado, datos.fecha,
+    ].forEach(function (texto) {
+      var td = document.createElement("td");
+      td.textContent = texto;
+      tr.appendChild(td);
+    });
+    return tr;
+  }
+
+  function pintar() {
+    var tarjetas = document.querySelectorAll(".podium-card[data-puesto]");
+    var cuerpo = document.getElementById("ranking-filas");
+    var otros = filas.slice(3);
+    if (tarjetas.length !== Math.min(filas.length, 3) || (otros.length > 0) !== Boolean(cuerpo)) {
+      // Aparece el podio o la tabla: la página la arma el servidor
+      if (!recargando) {
+        recargando = true;
+        setTimeout(function () { window.location.reload(); }, RECARGA_MS);
+      }
+      return;
+    }
+    tarjetas.forEach(function (tarjeta) {
+      var datos = filas[Number(tarjeta.dataset.puesto) - 1];
+      tarjeta.querySelector(".name").textContent = datos.name;
+      tarjeta.querySelector(".document").textContent = datos.document;
+      lineas(tarjeta.querySelector(".info"), [
+        "Pregunta alcanzada: " + datos.max_reached_question,
+        "Premio: $" + datos.current_prize,
+        "Estado: " + datos.estado,
+      ]);
+    });
+    if (cuerpo) {
+      cuerpo.replaceChildren.apply(cuerpo, otros.map(fila));
+    }
+  }
+
+  var fuente = new EventSource(URL_STREAM);
+  fuente.addEventListener("ranking", function (evento) {
+    filas = JSON.parse(evento.data).results;
+    pintar();
+  });
+  fuente.addEventListener("cambios", function (evento) {
+    aplicar(JSON.parse(evento.data));
+    pintar();
+  });
+})();
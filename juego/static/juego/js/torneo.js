@@ -0,0 +1,90 @@
+// juego/static/juego/js/torneo.js
+// La ronda del torneo la publica el presentador; la página la consulta
+// cada segundo en api_torneo_estado (sale de la caché) y manda la
+// respuesta a api_torneo_responder.
+(function () {
+  if (!window.fetch || !window.FormData) {
+    return;
+  }
+  var URL_ESTADO = document.currentScript.dataset.urlEstado;
+  var INTERVALO_MS = 1000;
+  var form = document.getElementById("form-torneo");
+
+  function texto(id, valor) {
+    document.getElementById(id).textContent = valor;
+  }
+
+  function mensaje(ronda, attempt, respondida) {
+    if (attempt.finished) {
+      if (attempt.finished_reason === "WIN") {
+        return "¡Ganaste el torneo!";
+      }
+      var eliminado = "Quedaste eliminado en la pregunta " + attempt.max_reached_question + ".";
+      return ronda.estado === "OPEN" && !respondida ? eliminado + " Tu respuesta cuenta como público." : eliminado;
+    }
+    if (ronda.estado === "WAITING") {
+      return "Esperando la primera pregunta...";
+    }
+    if (ronda.estado === "OPEN") {
+      return respondida ? "Respondiste " + respondida + ". Esperando el cierre de la pregunta..." : "¡Responde antes de que venza el plazo!";
+    }
+    return "La respuesta correcta era " + ronda.correct_option + ". Esperando la siguiente pregunta...";
+  }
+
+  function pintar(data) {
+    var ronda = data.ronda;
+    var attempt = data.attempt;
+    texto("torneo-numero", ronda.numero);
+    texto("torneo-jugadores", ronda.jugadores === undefined ? "-" : ronda.jugadores);
+    texto("torneo-premio", attempt.current_prize);
+    texto("torneo-mensaje", mensaje(ronda, attempt, data.respondida));
+
+    document.getElementById("torneo-pregunta").hidden = !ronda.question_id;
+    if (ronda.question_id) {
+      texto("pregunta-numero", ronda.numero);
+      texto("pregunta-texto", ronda.text);
+      document.getElementById("question-number").value = ronda.numero;
+    }
+    var abierta = ronda.estado === "OPEN" && !data.respondida;
+    form.querySelectorAll(".opcion-btn").forEach(function (btn) {
+      btn.querySelector(".opcion-texto").textContent = ronda.options ? ronda.options[btn.value] : "";
+      btn.disabled = !abierta;
+    });
+
+    var publico = ronda.publico;
+    document.getElementById("torneo-publico").hidden = !publico;
+    if (publico) {
+      texto("publico-total", publico.total);
+      ["A", "B", "C", "D"].forEach(function (letra, i) {
+        document.querySelector('#torneo-publico [data-letra="' + letra + '"]').textContent = publico.porcentajes[i];
+      });
+    }
+  }
+
+  function actualizar() {
+    fetch(URL_ESTADO, { credentials: "same-origin" })
+      .then(function (resp) { return resp.json(); })
+      .then(function (data) {
+        if (!data.error) {
+          pintar(data);
+        }
+      })
+      .catch(function () {})
+      .then(function () { setTimeout(actualizar, INTERVALO_MS); });
+  }
+
+  form.addEventListener("submit", function (event) {
+    event.preventDefault();
+    var boton = event.submitter;
+    if (!boton) {
+      return;
+    }
+    var datos = new FormData(form);
+    datos.append(boton.name, boton.value);
+    form.querySelectorAll(".opcion-btn").forEach(function (btn) { btn.disabled = true; });
+    fetch(form.action, { method: "POST", body: datos, credentials: "same-origin" })
+      .catch(function () {});
+  });
+
+  actualizar();
+})();
@@ -0,0 +1,164 @@
+# juego/storage.py
+"""
+Archivos estáticos con hash en el nombre y versiones precomprimidas.
+
+``CompressedManifestStaticFilesStorage`` es el ``ManifestStaticFilesStorage``
+de Django (``jugar.css`` -> ``jugar.3f2a9c1b.css`` y un manifest con la
+correspondencia) que, al terminar ``collectstatic``, escribe al lado de cada
+archivo de texto un ``.gz`` y, si está instalado el paquete ``brotli``, un
+``.br``. Solo se guardan las versiones que de verdad pesan menos.
+
+``StaticFilesMiddleware`` los sirve sin servidor web delante: elige la
+versión comprimida según ``Accept-Encoding`` y manda los nombres con hash
+con caché de un año (``immutable``): si el archivo cambia, cambia el nombre.
+
+Hay que correr ``collectstatic`` antes de servir con ``DEBUG`` apagado. Sin
+el manifest, los templates usan los nombres sin hash (como con ``DEBUG``)
+en lugar de fallar en cada render, y se avisa en el log.
+"""
+import functools
+import gzip
+import logging
+import mimetypes
+import os
+import posixpath
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage,
+)
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se genera .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRIMIBLES = (".css", ".js", ".svg", ".txt", ".html", ".json", ".map")
+TAMANO_MINIMO = 256  # bytes; por debajo comprimir no compensa
+
+CACHE_HASHED = "public, max-age=31536000, immutable"
+CACHE_SIN_HASH = "public, max-age=300"
+
+
+def _comprimir(contenido):
+    versiones = {".gz": gzip.compress(contenido, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        versiones[".br"] = brotli.compress(contenido, quality=11)
+    return versiones
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    sin_manifest_avisado = False
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            # Sin collectstatic (no hay manifest): nombre sin hash
+            if not self.sin_manifest_avisado:
+                self.sin_manifest_avisado = True
+                logger.warning(
+                    "No está el manifest de estáticos en %s: se usan los nombres sin hash. "
+                    "Corre 'manage.py collectstatic'.", self.location,
+                )
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for nombre in self.hashed_files.values():
+            if not nombre.endswith(COMPRIMIBLES):
+                continue
+            with self.open(nombre) as f:
+                contenido = f.read()
+            if len(contenido) < TAMANO_MINIMO:
+                continue
+            for extension, comprimido in _comprimir(contenido).items():
+                if len(comprimido) < len(contenido):
+                    destino = self.path(nombre + extension)
+                    with open(destino, "wb") as salida:
+                        salida.write(comprimido)
+
+
+@functools.cache
+def _nombres_hashed():
+    # El manifest se lee una vez por proceso (cambia solo con collectstatic)
+    return frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+
+def _codificacion(request, path):
+    """Sufijo y Content-Encoding de la mejor versión disponible."""
+    aceptadas = request.headers.get("Accept-Encoding", "")
+    for sufijo, codificacion in ((".br", "br"), (".gz", "gzip")):
+        if codificacion in aceptadas and os.path.exists(path + sufijo):
+            return sufijo, codificacion
+    return "", None
+
+
+def servir(request):
+    """Respuesta para un archivo de ``STATIC_ROOT``, o None si no es uno."""
+    prefijo = "/" + settings.STATIC_URL.lstrip("/")
+    if request.method not in ("GET", "HEAD") or not request.path.startswith(prefijo):
+        return None
+    nombre = posixpath.normpath(request.path[len(prefijo):]).lstrip("/")
+    path = os.path.join(settings.STATIC_ROOT, nombre)
+    if nombre.startswith("..") or not os.path.isfile(path):
+        return None
+
+    # El ETag es de la versión que se manda: el .br y el .gz no son los
+    # mismos bytes que el original y una caché no debe confundirlos
+    sufijo, codificacion = _codificacion(request, path)
+    estado = os.stat(path + sufijo)
+    etag = f'"{int(estado.st_mtime)}-{estado.st_size}{sufijo.replace(".", "-")}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        tipo, _ = mimetypes.guess_type(nombre)
+        # FileResponse cierra el archivo al terminar de mandarlo
+        archivo = open(path + sufijo, "rb")  # noqa: SIM115
+        response = FileResponse(archivo, content_type=tipo or "application/octet-stream")
+        if codificacion:
+            response.headers["Content-Encoding"] = codificacion
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(estado.st_mtime)
+    response.headers["Cache-Control"] = CACHE_HASHED if nombre in _nombres_hashed() else CACHE_SIN_HASH
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+class StaticFilesMiddleware:
+    """
+    Sirve ``STATIC_URL`` desde ``STATIC_ROOT`` cuando ``JUEGO_SERVE_STATIC``
+    está activo (gunicorn/uvicorn sin nginx delante). Va antes que el resto
+    de los middlewares: un archivo estático no toca sesiones ni la base.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = servir(request) if settings.JUEGO_SERVE_STATIC else None
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = servir(request) if settings.JUEGO_SERVE_STATIC else None
+        if response is None:
+            response = await self.get_response(request)
+        return response
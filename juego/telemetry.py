@@ -0,0 +1,87 @@
+# juego/telemetry.py
+"""
+Telemetría de las respuestas: opción elegida, si fue correcta y el tiempo
+de respuesta medido en el servidor (desde que se mostró la pregunta, ver
+``game_state.mark_shown``).
+
+``responder`` no escribe nada en la base por esto: ``record`` deja la fila
+en un buffer del proceso y ``flush`` la escribe junto con las demás en un
+único ``bulk_update``. El buffer se vacía al terminar una request (señal
+``request_finished``, fuera del ciclo de la request y de su presupuesto
+de consultas) cuando junta ``BATCH_SIZE`` filas o la más vieja tiene más de
+``MAX_AGE_SECONDS``, y al salir el proceso. Si el proceso muere de golpe se
+pierde lo que había en el buffer: es telemetría, no estado del juego.
+"""
+import atexit
+import threading
+import time
+
+from django.db import DatabaseError
+
+from .models import AttemptQuestion
+
+BATCH_SIZE = 200
+MAX_AGE_SECONDS = 5
+FIELDS = ["selected_option", "is_correct", "response_ms"]
+
+_lock = threading.Lock()
+_buffer = []
+_primera = None  # time.monotonic() de la fila más vieja del buffer
+
+
+def response_ms(shown_at):
+    """Milisegundos desde ``shown_at`` (epoch en segundos), o None."""
+    if shown_at is None:
+        return None
+    return max(0, round((time.time() - shown_at) * 1000))
+
+
+def record(attempt_question_id, selected, correcta, ms):
+    """Deja la respuesta en el buffer, sin tocar la base."""
+    global _primera
+    fila = AttemptQuestion(
+        id=attempt_question_id,
+        selected_option=selected if selected in ("A", "B", "C", "D") else None,
+        is_correct=correcta,
+        response_ms=ms,
+    )
+    with _lock:
+        if not _buffer:
+            _primera = time.monotonic()
+        _buffer.append(fila)
+
+
+def pending():
+    return len(_buffer)
+
+
+def _toca_vaciar():
+    return len(_buffer) >= BATCH_SIZE or (
+        _buffer and time.monotonic() - _primera >= MAX_AGE_SECONDS
+    )
+
+
+def flush():
+    """Escribe todo el buffer con un ``bulk_update``. Devuelve cuántas filas."""
+    global _buffer
+    with _lock:
+        filas, _buffer = _buffer, []
+    if filas:
+        # Las filas borradas mientras tanto (intento archivado) no fallan:
+        # el UPDATE simplemente no las encuentra
+        AttemptQuestion.objects.bulk_update(filas, FIELDS, batch_size=BATCH_SIZE)
+    return len(filas)
+
+
+def flush_if_due(**kwargs):
+    """Receptor de ``request_finished``."""
+    if _toca_vaciar():
+        flush()
+
+
+@atexit.register
+def _flush_al_salir():
+    try:
+        flush()
+    except DatabaseError:
+        pass
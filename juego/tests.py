@@ -1,3 +1,1037 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import re
+import sqlite3
+import tempfile
+import types
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from . import (
+    calibration,
+    db_router,
+    fragments,
+    leaderboard,
+    lifelines,
+    middleware,
+    question_pool,
+    ranking_live,
+    storage,
+    telemetry,
+    tournament,
+    urls,
+)
+from .game import PREMIOS
+from .middleware import QUERY_BUDGETS
+from .models import (
+    AttemptQuestion,
+    Difficulty,
+    GameAttempt,
+    LeaderboardEntry,
+    PlayerStats,
+    Question,
+    QuestionStats,
+    Tournament,
+)
+
+# Sin collectstatic: los templates usan los estáticos sin hash
+STORAGES_SIN_MANIFEST = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+@override_settings(JUEGO_READ_REPLICA=None, STORAGES=STORAGES_SIN_MANIFEST)
+class JuegoTestCase(TestCase):
+    """
+    Base de los tests: la migración 0004 ya carga 5 preguntas por dificultad;
+    se agrega una más por dificultad para que exista la pregunta de repuesto
+    de "Cambiar de pregunta". Sin réplica: el router se prueba aparte
+    (ReplicaRouterTests).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for dificultad in Difficulty:
+            Question.objects.create(
+                text=f"Pregunta extra {dificultad}",
+                option_a="a",
+                option_b="b",
+                option_c="c",
+                option_d="d",
+                correct_option="A",
+                difficulty=dificultad,
+            )
+
+    def setUp(self):
+        # El pool y la caché son por proceso y sobreviven al rollback de cada test
+        cache.clear()
+        question_pool.invalidate()
+        middleware.reset()
+
+    def tearDown(self):
+        # El buffer de telemetría es del proceso: no debe pasar al test siguiente
+        telemetry.flush()
+
+    def empezar(self, name="Ana", document="123"):
+        response = self.client.post(reverse("home"), {"name": name, "document": document})
+        self.assertRedirects(response, reverse("jugar"), fetch_redirect_response=False)
+        return GameAttempt.objects.latest("id")
+
+    def opcion(self, attempt, correcta=True):
+        attempt.refresh_from_db()
+        buena = AttemptQuestion.objects.get(
+            attempt=attempt,
+            question_number=attempt.current_question_number,
+            is_spare=False,
+        ).question.correct_option
+        if correcta:
+            return buena
+        return next(o for o in "ABCD" if o != buena)
+
+    def responder(self, attempt, correcta=True):
+        opcion = self.opcion(attempt, correcta)
+        return self.client.post(reverse("responder"), {
+            "option": opcion,
+            "question_number": attempt.current_question_number,
+        })
+
+
+class QueryBudgetTests(JuegoTestCase):
+
+    def assertDentroDelPresupuesto(self, vistas_esperadas):
+        stats = middleware.snapshot()
+        self.assertTrue(set(vistas_esperadas) <= set(stats), sorted(stats))
+        for vista, datos in stats.items():
+            with self.subTest(vista=vista):
+                self.assertIn(vista, QUERY_BUDGETS, "Vista sin presupuesto de consultas")
+                self.assertLessEqual(datos["max_queries"], QUERY_BUDGETS[vista])
+
+    def test_partida_completa_con_ayudas(self):
+        attempt = self.empezar()
+        self.assertEqual(
+            AttemptQuestion.objects.filter(attempt=attempt, is_spare=False).count(), len(PREMIOS)
+        )
+
+        ayudas = ["cambiar", "5050", "publico", "amigo"]
+        for numero in range(1, len(PREMIOS) + 1):
+            response = self.client.get(reverse("jugar"))
+            self.assertContains(response, f'name="question_number" value="{numero}"')
+            if ayudas:
+                self.assertRedirects(
+                    self.client.post(reverse("ayuda", args=[ayudas.pop(0)])), reverse("jugar"),
+                    fetch_redirect_response=False,
+                )
+                self.client.get(reverse("jugar"))
+            self.assertRedirects(self.responder(attempt), reverse("jugar"), fetch_redirect_response=False)
+
+        self.assertContains(self.client.get(reverse("jugar")), "Resultado del intento")
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.finished_reason, "WIN")
+        self.assertEqual(attempt.current_prize, PREMIOS[-1])
+        self.assertTrue(all([attempt.used_5050, attempt.used_public, attempt.used_friend, attempt.used_switch]))
+
+        self.assertContains(self.client.get(reverse("ranking")), "Ana")
+        self.assertEqual(self.client.get(reverse("ranking_api")).json()["results"][0]["name"], "Ana")
+
+        self.assertDentroDelPresupuesto([
+            "home", "jugar", "responder", "ranking", "ranking_api", "ayuda",
+        ])
+
+    def test_partida_perdida(self):
+        attempt = self.empezar()
+        self.responder(attempt)
+        response = self.responder(attempt, correcta=False)
+        self.assertContains(response, "Resultado del intento")
+
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.finished_reason, "LOSE")
+        self.assertEqual(attempt.max_reached_question, 2)
+        self.assertEqual(attempt.current_prize, PREMIOS[0])
+        self.assertDentroDelPresupuesto(["home", "responder"])
+
+    def test_partida_por_api(self):
+        data = self.client.post(reverse("api_iniciar"), {"name": "Kiosco", "document": "9"}).json()
+        attempt = GameAttempt.objects.get(id=data["attempt"]["id"])
+
+        data = self.client.post(reverse("api_ayuda", args=["publico"])).json()
+        self.assertEqual(sum(data["ayuda_publico_data"]), 100)
+
+        for numero in range(1, len(PREMIOS) + 1):
+            self.assertEqual(data["question"]["number"], numero)
+            data = self.client.post(reverse("api_responder"), {
+                "option": self.opcion(attempt),
+                "question_number": numero,
+            }).json()
+        self.assertTrue(data["attempt"]["finished"])
+        self.assertIsNone(data["question"])
+
+        self.assertDentroDelPresupuesto(["api_iniciar", "api_ayuda", "api_responder"])
+
+
+class FragmentCacheTests(JuegoTestCase):
+
+    def test_bloque_cacheado_y_invalidado_al_editar(self):
+        attempt = self.empezar()
+        self.client.get(reverse("jugar"))  # llena la caché del fragmento
+
+        with self.assertNumQueries(2):  # intento + id de la pregunta
+            response = self.client.get(reverse("jugar"))
+        question = AttemptQuestion.objects.get(
+            attempt=attempt, question_number=1, is_spare=False
+        ).question
+        self.assertContains(response, question.option_a)
+
+        question.option_a = "Opción editada"
+        question.save()
+        self.assertContains(self.client.get(reverse("jugar")), "Opción editada")
+
+        # El 50:50 cambia las letras deshabilitadas y por lo tanto la clave
+        self.client.post(reverse("ayuda", args=["5050"]))
+        html = self.client.get(reverse("jugar")).content.decode()
+        self.assertEqual(len(re.findall(r'name="option"\s+value="[A-D]"\s+disabled', html)), 2)
+
+    def test_escalera_precalculada_por_pregunta(self):
+        html = fragments.escalera(3)
+        self.assertIs(fragments.escalera(3), html)  # renderizada una sola vez
+        self.assertEqual(len(re.findall(r'class="escalera-item', html)), len(PREMIOS))
+        self.assertEqual(re.findall(r'escalera-item actual" data-numero="(\d+)"', html), ["3"])
+        # Fuera de rango: la escalera sin pregunta marcada
+        self.assertIs(fragments.escalera(99), fragments.escalera(0))
+
+        self.empezar()
+        self.assertContains(self.client.get(reverse("jugar")), fragments.escalera(1), html=True)
+
+
+class LifelineTests(JuegoTestCase):
+
+    def test_resultados_reproducibles_y_consumo_unico(self):
+        self.client.post(reverse("api_iniciar"), {"name": "Ana", "document": "1"})
+        attempt = GameAttempt.objects.latest("id")
+        correcta = self.opcion(attempt)
+
+        data = self.client.post(reverse("api_ayuda", args=["publico"])).json()
+        porcentajes = data["ayuda_publico_data"]
+        self.assertEqual(sum(porcentajes), 100)
+        # Se recalculan iguales desde la semilla, sin guardarlos
+        self.assertEqual(self.client.get(reverse("api_estado")).json()["ayuda_publico_data"], porcentajes)
+
+        data = self.client.post(reverse("api_ayuda", args=["publico"])).json()
+        self.assertEqual(data["mensaje_info"], lifelines.USADA["publico"])
+
+        data = self.client.post(reverse("api_ayuda", args=["5050"])).json()
+        deshabilitadas = data["question"]["disabled"]
+        self.assertEqual(len(deshabilitadas), 2)
+        self.assertNotIn(correcta, deshabilitadas)
+
+        attempt.refresh_from_db()
+        self.assertTrue(attempt.used_public and attempt.used_5050)
+        self.assertFalse(attempt.used_friend or attempt.used_switch)
+
+        # Al responder se apagan el 50:50 y los resultados visibles
+        data = self.client.post(reverse("api_responder"), {"option": correcta, "question_number": 1}).json()
+        self.assertEqual(data["question"]["disabled"], [])
+        self.assertNotIn("ayuda_publico_data", data)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.lifeline_flags, GameAttempt.LIFELINE_USED["publico"] | GameAttempt.LIFELINE_USED["5050"])
+
+    def test_cambiar_conserva_la_pregunta_mostrada(self):
+        attempt = self.empezar()
+        mostrada = AttemptQuestion.objects.get(attempt=attempt, question_number=1, is_spare=False)
+        self.client.post(reverse("ayuda", args=["cambiar"]))
+
+        mostrada.refresh_from_db()
+        self.assertEqual((mostrada.question_number, mostrada.is_spare, mostrada.replaced), (1, True, True))
+        actual = AttemptQuestion.objects.get(attempt=attempt, question_number=1, is_spare=False)
+        self.assertNotEqual(actual.question_id, mostrada.question_id)
+        self.assertFalse(
+            AttemptQuestion.objects.filter(attempt=attempt, question_number=1, is_spare=True, replaced=False).exists()
+        )
+        self.assertEqual(AttemptQuestion.objects.filter(attempt=attempt).count(), len(PREMIOS) + 3)
+        self.assertRedirects(self.responder(attempt), reverse("jugar"), fetch_redirect_response=False)
+
+
+URLS_ASYNC = types.ModuleType("urls_async")
+URLS_ASYNC.urlpatterns = urls.patrones(async_views=True)
+
+
+@override_settings(ROOT_URLCONF=URLS_ASYNC)
+class AsyncViewsTests(JuegoTestCase):
+
+    async def test_partida_completa_con_vistas_async(self):
+        response = await self.async_client.post(reverse("home"), {"name": "Async", "document": "7"})
+        self.assertRedirects(response, reverse("jugar"), fetch_redirect_response=False)
+        attempt = await GameAttempt.objects.alatest("id")
+
+        ayudas = ["cambiar", "5050", "publico", "amigo"]
+        for numero in range(1, len(PREMIOS) + 1):
+            response = await self.async_client.get(reverse("jugar"))
+            self.assertContains(response, f'name="question_number" value="{numero}"')
+            if ayudas:
+                await self.async_client.post(reverse("ayuda", args=[ayudas.pop(0)]))
+            opcion = await sync_to_async(self.opcion)(attempt)
+            response = await self.async_client.post(reverse("responder"), {
+                "option": opcion, "question_number": numero,
+            })
+            self.assertRedirects(response, reverse("jugar"), fetch_redirect_response=False)
+
+        await attempt.arefresh_from_db()
+        self.assertEqual(attempt.finished_reason, "WIN")
+        self.assertTrue(all([attempt.used_5050, attempt.used_public, attempt.used_friend, attempt.used_switch]))
+        self.assertContains(await self.async_client.get(reverse("ranking")), "Async")
+        data = (await self.async_client.get(reverse("ranking_api"))).json()
+        self.assertEqual(data["results"][0]["name"], "Async")
+
+        # Las consultas del ORM async se cuentan (corren en el hilo de
+        # sync_to_async, no en el del event loop)
+        stats = middleware.snapshot()
+        for vista in ("home", "jugar", "responder", "ayuda"):
+            with self.subTest(vista=vista):
+                self.assertGreater(stats[vista]["queries"], 0)
+                self.assertLessEqual(stats[vista]["max_queries"], QUERY_BUDGETS[vista])
+
+
+class ResponderTests(JuegoTestCase):
+
+    def test_respuesta_repetida_no_avanza_dos_veces(self):
+        attempt = self.empezar()
+        opcion = self.opcion(attempt)
+        for _ in range(2):
+            self.client.post(reverse("responder"), {"option": opcion, "question_number": 1})
+
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.current_question_number, 2)
+        self.assertEqual(attempt.current_prize, PREMIOS[0])
+
+    def test_api_responde_409_con_numero_viejo(self):
+        self.client.post(reverse("api_iniciar"), {"name": "Ana", "document": "1"})
+        attempt = GameAttempt.objects.latest("id")
+        self.client.post(reverse("api_responder"), {"option": self.opcion(attempt), "question_number": 1})
+
+        response = self.client.post(reverse("api_responder"), {"option": "A", "question_number": 1})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["attempt"]["current_question_number"], 2)
+
+
+class DeadlineTests(JuegoTestCase):
+
+    def vencer(self, attempt, segundos=120):
+        GameAttempt.objects.filter(id=attempt.id).update(
+            question_deadline=timezone.now() - timedelta(seconds=segundos)
+        )
+
+    def test_respuesta_fuera_de_plazo_termina_por_tiempo(self):
+        attempt = self.empezar()
+        self.responder(attempt)
+        attempt.refresh_from_db()
+        self.assertGreater(attempt.question_deadline, timezone.now())
+
+        self.vencer(attempt)
+        response = self.responder(attempt)  # correcta, pero tarde
+        self.assertContains(response, "Tiempo agotado")
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.finished_reason, attempt.current_prize), ("TIME", PREMIOS[0]))
+        self.assertTrue(LeaderboardEntry.objects.filter(attempt_id=attempt.id).exists())
+
+    def test_jugar_termina_el_intento_vencido(self):
+        attempt = self.empezar()
+        self.vencer(attempt)
+        self.assertContains(self.client.get(reverse("jugar")), "Tiempo agotado")
+        self.assertEqual(GameAttempt.objects.get(id=attempt.id).finished_reason, "TIME")
+
+    def test_ayudas_fuera_de_plazo_no_se_usan(self):
+        attempt = self.empezar()
+        self.vencer(attempt)
+        plazo = GameAttempt.objects.get(id=attempt.id).question_deadline
+        for nombre in ("cambiar", "5050"):
+            self.assertRedirects(
+                self.client.post(reverse("ayuda", args=[nombre])), reverse("jugar"),
+                fetch_redirect_response=False,
+            )
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.question_deadline, plazo)  # no le dio otro reloj
+        self.assertEqual((attempt.used_switch, attempt.used_5050), (False, False))
+
+        self.assertContains(self.client.get(reverse("jugar")), "Tiempo agotado")
+        self.assertEqual(GameAttempt.objects.get(id=attempt.id).finished_reason, "TIME")
+
+    def test_barrido_por_lotes(self):
+        vencidos = [self.empezar(document=str(i)) for i in range(5)]
+        for attempt in vencidos:
+            self.vencer(attempt)
+        en_plazo = self.empezar(document="en-plazo")
+        viejo = GameAttempt.objects.create(name="Viejo", document="v")  # sin plazo
+        GameAttempt.objects.filter(id=viejo.id).update(created_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command("expire_attempts", "--batch-size", "2", stdout=out)
+        self.assertIn("Terminados 6 intentos", out.getvalue())
+
+        motivos = dict(GameAttempt.objects.values_list("document", "finished_reason"))
+        self.assertEqual([motivos[str(i)] for i in range(5)], ["TIME"] * 5)
+        self.assertEqual(motivos["v"], "QUIT")
+        self.assertIsNone(motivos[en_plazo.document])
+        self.assertEqual(LeaderboardEntry.objects.count(), 6)
+        self.assertEqual(PlayerStats.objects.get(document="v").games_played, 1)
+
+        call_command("expire_attempts", stdout=out)
+        self.assertEqual(LeaderboardEntry.objects.count(), 6)
+
+
+class TelemetryTests(JuegoTestCase):
+
+    def test_respuestas_al_buffer_y_por_lotes(self):
+        attempt = self.empezar()
+        self.client.get(reverse("jugar"))
+        self.responder(attempt)
+        self.responder(attempt, correcta=False)  # sin pasar por jugar: sin tiempo
+
+        filas = AttemptQuestion.objects.filter(attempt=attempt, is_spare=False).order_by("question_number")
+        self.assertFalse(filas.filter(is_correct__isnull=False).exists())
+        self.assertEqual(telemetry.pending(), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(telemetry.flush(), 2)
+
+        primera, segunda = filas[:2]
+        self.assertEqual((primera.is_correct, segunda.is_correct), (True, False))
+        self.assertEqual(primera.selected_option, primera.question.correct_option)
+        self.assertIsNotNone(primera.response_ms)
+        self.assertIsNone(segunda.response_ms)
+        # Solo 2 de 15 preguntas respondidas
+        self.assertEqual(filas.filter(is_correct__isnull=False).count(), 2)
+
+    def test_calibracion_marca_preguntas_fuera_de_su_banda(self):
+        facil = Question.objects.filter(difficulty=Difficulty.EASY).first()
+        dificil = Question.objects.filter(difficulty=Difficulty.HARD).first()
+        filas = []
+        for i in range(40):
+            attempt = GameAttempt.objects.create(name="T", document=str(i))
+            # La fácil casi nadie la acierta; la difícil, uno de cada cuatro
+            filas.append(AttemptQuestion(attempt=attempt, question=facil, question_number=1,
+                                         is_correct=i < 4, selected_option="A", response_ms=1500 + i * 100))
+            filas.append(AttemptQuestion(attempt=attempt, question=dificil, question_number=11,
+                                         is_correct=i % 4 == 0, selected_option="B", response_ms=9000))
+        AttemptQuestion.objects.bulk_create(filas)
+
+        out = StringIO()
+        call_command("calibrate_questions", "--chunk-size", "7", stdout=out)
+        self.assertIn("2 preguntas, 1 mal calibradas", out.getvalue())
+
+        stats = QuestionStats.objects.get(question=facil)
+        self.assertEqual((stats.answers, stats.correct, stats.timed_answers), (40, 4, 40))
+        self.assertTrue(stats.miscalibrated)
+        self.assertEqual(stats.suggested_difficulty, Difficulty.HARD)
+        self.assertEqual(sum(stats.latency_histogram), 40)
+        self.assertEqual(stats.p50_ms, 5000)
+        self.assertFalse(QuestionStats.objects.get(question=dificil).miscalibrated)
+        self.assertEqual(calibration.difficulty_for_accuracy(0.5), Difficulty.MEDIUM)
+
+
+class RankingTests(JuegoTestCase):
+
+    def test_paginacion_keyset_sigue_el_orden_en_vivo(self):
+        for i in range(25):
+            attempt = GameAttempt.objects.create(
+                name=f"J{i}",
+                document=str(i),
+                max_reached_question=i % 4,
+                current_prize=(i % 3) * 100,
+                finished=True,
+                finished_reason="LOSE",
+            )
+            leaderboard.record_finished(attempt)
+
+        nombres, cursor = [], ""
+        while True:
+            data = self.client.get(reverse("ranking_api"), {"cursor": cursor, "limite": 7}).json()
+            nombres += [e["name"] for e in data["results"]]
+            cursor = data["next"]
+            if not cursor:
+                break
+
+        self.assertEqual(nombres, list(leaderboard.live_queryset().values_list("name", flat=True)))
+        self.assertEqual(leaderboard.compare(), [])
+
+    def test_primera_pagina_cacheada_stale_while_revalidate(self):
+        self.client.get(reverse("ranking"))  # miss: se calcula y se guarda
+        with self.assertNumQueries(0):
+            self.client.get(reverse("ranking"))
+
+        attempt = self.empezar(name="Nueva")
+        self.responder(attempt, correcta=False)  # termina -> copia vieja
+
+        # Otro worker está recalculando: se sirve la copia vieja sin consultas
+        cache.add(leaderboard.FIRST_PAGE_LOCK_KEY, True)
+        with self.assertNumQueries(0):
+            self.assertNotContains(self.client.get(reverse("ranking")), "Nueva")
+        cache.delete(leaderboard.FIRST_PAGE_LOCK_KEY)
+
+        self.assertContains(self.client.get(reverse("ranking")), "Nueva")
+        self.assertEqual(
+            self.client.get(reverse("ranking_cache_stats")).json(),
+            {"hit": 1, "stale": 2, "miss": 1, "rebuild": 2},
+        )
+
+    def test_ranking_por_jugador(self):
+        for correctas in (3, 1, 5):
+            attempt = self.empezar(name="Ana", document="1")
+            for _ in range(correctas):
+                self.responder(attempt)
+            self.responder(attempt, correcta=False)
+        attempt = self.empezar(name="Beto", document="2")
+        self.responder(attempt)
+        self.responder(attempt, correcta=False)
+
+        ana = PlayerStats.objects.get(document="1")
+        self.assertEqual((ana.games_played, ana.wins, ana.best_max_reached_question), (3, 0, 6))
+        self.assertEqual(ana.best_prize, PREMIOS[4])
+
+        data = self.client.get(reverse("ranking_api"), {"modo": "jugadores", "limite": 1}).json()
+        self.assertEqual([e["document"] for e in data["results"]], ["1"])
+        data = self.client.get(reverse("ranking_api"), {"modo": "jugadores", "cursor": data["next"]}).json()
+        self.assertEqual([(e["posicion"], e["document"]) for e in data["results"]], [(2, "2")])
+        self.assertContains(self.client.get(reverse("ranking"), {"modo": "jugadores"}), "Mejor premio")
+
+        antes = list(PlayerStats.objects.order_by("document").values())
+        call_command("rebuild_player_stats", stdout=StringIO())
+        despues = list(PlayerStats.objects.order_by("document").values())
+        for fila in antes + despues:
+            del fila["id"]
+        self.assertEqual(despues, antes)
+
+    def test_reconstruir_ranking(self):
+        attempt = GameAttempt.objects.create(name="X", document="1", finished=True, finished_reason="WIN")
+        self.assertEqual(len(leaderboard.compare()), 1)
+        self.assertEqual(leaderboard.rebuild(), 1)
+        self.assertEqual(LeaderboardEntry.objects.get().attempt_id, attempt.id)
+
+
+@override_settings(ROOT_URLCONF=URLS_ASYNC)
+class RankingLiveTests(JuegoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Un publicador nuevo por test (el del módulo vive lo que el proceso)
+        for nombre, valor in (("publicador", ranking_live.Publicador()), ("SONDEO_SEGUNDOS", 0.01)):
+            parche = mock.patch.object(ranking_live, nombre, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def terminar(self, name, maximo, premio):
+        attempt = GameAttempt.objects.create(
+            name=name, document=name, finished=True, finished_reason="LOSE",
+            max_reached_question=maximo, current_prize=premio,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            leaderboard.record_finished(attempt)
+        return attempt
+
+    async def leer(self, flujo):
+        """Siguiente evento (sin los heartbeats) como ``(nombre, datos)``."""
+        while True:
+            mensaje = await asyncio.wait_for(anext(flujo), 2)
+            mensaje = mensaje.decode() if isinstance(mensaje, bytes) else mensaje
+            if not mensaje.startswith(":"):
+                evento, datos = re.match(r"event: (\w+)\ndata: (.*)\n\n", mensaje).groups()
+                return evento, json.loads(datos)
+
+    async def test_pantallas_comparten_el_ranking_y_reciben_los_cambios(self):
+        primero = await sync_to_async(self.terminar)("Uno", 5, 1000)
+
+        lecturas = mock.patch.object(leaderboard, "apage", wraps=leaderboard.apage)
+        with lecturas as apage:
+            response = await self.async_client.get(reverse("ranking_stream"))
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            pantalla = response.streaming_content
+            self.assertTrue((await anext(pantalla)).startswith(b"retry:"))
+            evento, datos = await self.leer(pantalla)
+            self.assertEqual(evento, "ranking")
+            self.assertEqual([f["name"] for f in datos["results"]], ["Uno"])
+
+            # Otra pantalla recibe la copia en memoria: el ranking se leyó una vez
+            otra = ranking_live.eventos()
+            await anext(otra)
+            self.assertEqual(await self.leer(otra), (evento, datos))
+        self.assertEqual(apage.await_count, 1)
+
+        segundo = await sync_to_async(self.terminar)("Dos", 9, 16000)
+        for flujo in (pantalla, otra):
+            evento, cambios = await self.leer(flujo)
+            self.assertEqual(evento, "cambios")
+            self.assertEqual([(f["attempt_id"], f["posicion"]) for f in cambios["nuevas"]], [(segundo.id, 1)])
+            self.assertEqual(cambios["movidas"], [{"attempt_id": primero.id, "posicion": 2}])
+            self.assertEqual(cambios["salen"], [])
+        await pantalla.aclose()
+        await otra.aclose()
+
+    async def test_heartbeat_y_pantalla_lenta(self):
+        with mock.patch.object(ranking_live, "HEARTBEAT_SEGUNDOS", 0.01):
+            flujo = ranking_live.eventos()
+            await anext(flujo)
+            self.assertEqual((await self.leer(flujo))[0], "ranking")
+            self.assertEqual(await asyncio.wait_for(anext(flujo), 2), ": ping\n\n")
+            await flujo.aclose()
+
+        # Con la cola llena se descartan los cambios y queda el ranking completo
+        pantalla = ranking_live.Pantalla()
+        for numero in range(ranking_live.COLA_MAXIMA + 5):
+            pantalla.enviar(f"cambio {numero}")
+        self.assertTrue(pantalla.atrasada)
+        self.assertEqual(pantalla.cola.qsize(), 1)
+        self.assertIs(pantalla.cola.get_nowait(), ranking_live.RANKING)
+
+
+class TournamentTests(JuegoTestCase):
+
+    def inscribir(self, torneo, name, document):
+        client = self.client_class()
+        response = client.post(reverse("torneo", args=[torneo.id]), {"name": name, "document": document})
+        self.assertRedirects(response, reverse("torneo", args=[torneo.id]), fetch_redirect_response=False)
+        return client, GameAttempt.objects.latest("id")
+
+    def contestar(self, client, torneo, numero, opcion):
+        return client.post(reverse("api_torneo_responder", args=[torneo.id]), {
+            "option": opcion, "question_number": numero,
+        })
+
+    def test_pregunta_compartida_y_eliminacion_en_bloque(self):
+        torneo = tournament.crear("Gala")
+        (ana, ana_attempt), (beto, beto_attempt), (caro, caro_attempt) = [
+            self.inscribir(torneo, name, document)
+            for name, document in (("Ana", "1"), ("Beto", "2"), ("Caro", "3"))
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            ronda = tournament.abrir_pregunta(torneo.id)
+        self.assertEqual((ronda["numero"], ronda["jugadores"]), (1, 3))
+        with self.assertRaises(ValueError):
+            tournament.abrir_pregunta(torneo.id)
+        self.assertIsNone(tournament.inscribir(torneo.id, "Tarde", "4"))
+
+        # La pregunta sale de la caché, sin la respuesta mientras está abierta
+        estado = ana.get(reverse("api_torneo_estado", args=[torneo.id])).json()
+        self.assertEqual(estado["ronda"]["question_id"], ronda["question_id"])
+        self.assertNotIn("correct_option", estado["ronda"])
+
+        buena = ronda["correct_option"]
+        mala = next(o for o in "ABCD" if o != buena)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.contestar(ana, torneo, 1, buena).status_code, 200)
+            self.assertEqual(self.contestar(beto, torneo, 1, mala).status_code, 200)
+            self.assertEqual(self.contestar(ana, torneo, 1, mala).status_code, 409)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        # Las respuestas quedan en la caché compartida, no en el proceso que
+        # las recibió: se escriben al cerrar
+        self.assertEqual(tournament.respuesta(torneo.id, 1, beto_attempt.id), mala)
+        self.assertFalse(AttemptQuestion.objects.filter(attempt__tournament=torneo).exists())
+
+        publico = tournament.porcentajes(torneo.id, 1)
+        self.assertEqual(publico["total"], 2)
+        self.assertEqual(publico["porcentajes"][tournament.OPCIONES.index(buena)], 50)
+        self.assertEqual(sum(publico["porcentajes"]), 100)
+
+        with self.assertRaises(ValueError):
+            tournament.cerrar_pregunta(torneo.id)  # todavía en plazo
+        torneo.refresh_from_db()
+        despues = torneo.question_deadline + tournament.CIERRE_MARGEN
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            pasan, eliminados = tournament.cerrar_pregunta(torneo.id, now=despues)
+        self.assertEqual((pasan, eliminados), (1, 2))
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "juego_gameattempt"')]
+        self.assertEqual(len(updates), 2)
+
+        escritas = {
+            aq.attempt_id: (aq.question_id, aq.selected_option, aq.is_correct, aq.response_ms is not None)
+            for aq in AttemptQuestion.objects.filter(attempt__tournament=torneo)
+        }
+        self.assertEqual(escritas, {
+            ana_attempt.id: (ronda["question_id"], buena, True, True),
+            beto_attempt.id: (ronda["question_id"], mala, False, True),
+        })
+        self.assertEqual(tournament.porcentajes(torneo.id, 1), publico)
+        estados = {
+            a.id: (a.current_question_number, a.current_prize, a.finished, a.finished_reason)
+            for a in GameAttempt.objects.filter(tournament=torneo)
+        }
+        self.assertEqual(estados[ana_attempt.id], (2, PREMIOS[0], False, None))
+        self.assertEqual(estados[beto_attempt.id], (1, 0, True, "LOSE"))
+        self.assertEqual(estados[caro_attempt.id], (1, 0, True, "TIME"))
+        self.assertEqual(
+            set(LeaderboardEntry.objects.values_list("attempt_id", flat=True)),
+            {beto_attempt.id, caro_attempt.id},
+        )
+
+        # Cerrada, la sala ve la respuesta correcta y lo que votó el público
+        estado = caro.get(reverse("api_torneo_estado", args=[torneo.id])).json()
+        self.assertEqual(estado["ronda"]["correct_option"], buena)
+        self.assertEqual(estado["ronda"]["publico"], publico)
+        self.assertTrue(estado["attempt"]["finished"])
+        self.assertContains(caro.get(reverse("torneo", args=[torneo.id])), 'id="form-torneo"')
+
+    def test_inscripcion_cerrada_al_empezar(self):
+        torneo = tournament.crear("Gala")
+        self.inscribir(torneo, "Ana", "1")
+        with self.captureOnCommitCallbacks(execute=True):
+            tournament.abrir_pregunta(torneo.id)
+        response = self.client.post(reverse("torneo", args=[torneo.id]), {"name": "Beto", "document": "2"})
+        self.assertContains(response, "El torneo ya empezó")
+        self.assertEqual(GameAttempt.objects.filter(tournament=torneo).count(), 1)
+
+    def test_barrido_no_toca_a_los_inscriptos(self):
+        torneo = tournament.crear("Gala")
+        _, attempt = self.inscribir(torneo, "Ana", "1")
+        GameAttempt.objects.filter(id=attempt.id).update(created_at=timezone.now() - timedelta(days=2))
+        call_command("expire_attempts", stdout=StringIO())
+        self.assertFalse(GameAttempt.objects.get(id=attempt.id).finished)
+
+
+class ArchiveTests(JuegoTestCase):
+
+    def test_archivar_y_restaurar_conserva_el_ranking(self):
+        viejos = []
+        for i in range(5):
+            attempt = self.empezar(name=f"Viejo {i}", document=str(i))
+            for _ in range(i):
+                self.responder(attempt)
+            self.responder(attempt, correcta=False)
+            viejos.append(attempt.id)
+        GameAttempt.objects.filter(id__in=viejos).update(created_at=timezone.now() - timedelta(days=400))
+        leaderboard.rebuild()
+        en_juego = self.empezar(name="En juego")
+        ranking_antes = list(leaderboard.entries().values_list("attempt_id", "name"))
+        plazos = dict(GameAttempt.objects.filter(id__in=viejos).values_list("id", "question_deadline"))
+        self.assertNotIn(None, plazos.values())
+        torneo = Tournament.objects.create(name="Gala")
+        GameAttempt.objects.filter(id__in=viejos[:2]).update(tournament=torneo)
+        telemetry.flush()
+        respuestas = AttemptQuestion.objects.filter(attempt_id__in=viejos).order_by("id")
+        telemetria_antes = list(respuestas.values_list("id", "selected_option", "is_correct", "response_ms"))
+        self.assertEqual(sum(1 for fila in telemetria_antes if fila[1] is not None), 15)  # 0+1+...+4 aciertos y 5 fallos
+
+        with tempfile.TemporaryDirectory() as carpeta:
+            salida = StringIO()
+            call_command("archive_attempts", days=180, output_dir=carpeta, batch_size=2, stdout=salida)
+            path = next(Path(carpeta).glob("*.jsonl.gz"))
+
+            self.assertFalse(GameAttempt.objects.filter(id__in=viejos).exists())
+            self.assertFalse(AttemptQuestion.objects.filter(attempt_id__in=viejos).exists())
+            self.assertTrue(GameAttempt.objects.filter(id=en_juego.id).exists())
+            self.assertEqual(list(leaderboard.entries().values_list("attempt_id", "name")), ranking_antes)
+            self.assertEqual(LeaderboardEntry.objects.filter(archived=True).count(), 5)
+            self.assertEqual(leaderboard.compare(), [])
+
+            call_command("restore_attempts", str(path), stdout=StringIO())
+
+        self.assertEqual(GameAttempt.objects.filter(id__in=viejos).count(), 5)
+        self.assertEqual(AttemptQuestion.objects.filter(attempt_id__in=viejos).count(), 5 * (len(PREMIOS) + 3))
+        self.assertEqual(
+            list(respuestas.values_list("id", "selected_option", "is_correct", "response_ms")), telemetria_antes
+        )
+        self.assertEqual(
+            dict(GameAttempt.objects.filter(id__in=viejos).values_list("id", "question_deadline")), plazos
+        )
+        self.assertEqual(list(torneo.attempts.order_by("id").values_list("id", flat=True)), viejos[:2])
+        self.assertFalse(GameAttempt.objects.filter(id__in=viejos, created_at__gt=timezone.now() - timedelta(days=1)).exists())
+        self.assertFalse(LeaderboardEntry.objects.filter(archived=True).exists())
+        self.assertEqual(leaderboard.compare(), [])
+
+
+class AdminTests(JuegoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser("admin", "a@a.co", "x"))
+
+    def test_intentos_keyset_sin_conteo_total(self):
+        GameAttempt.objects.bulk_create(
+            [GameAttempt(name=f"J{i}", document=f"{i:04d}") for i in range(250)]
+        )
+        url = reverse("admin:juego_gameattempt_changelist")
+        with self.assertNumQueries(4) as ctx:  # sesión, usuario, página, conteo con tope
+            response = self.client.get(url)
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn("OFFSET", sql)
+        self.assertIn("LIMIT 10000", sql)  # conteo con tope
+        self.assertContains(response, "J249")
+        self.assertNotContains(response, "J149")
+
+        siguiente = response.context["cl"].siguiente_url
+        response = self.client.get(url + siguiente)
+        self.assertContains(response, "J149")
+        self.assertNotContains(response, "J249")
+        self.assertContains(response, "Primera página")
+
+        response = self.client.get(url, {"q": "002"})
+        self.assertEqual([a.document for a in response.context["cl"].result_list][-1], "0020")
+        self.assertEqual(response.context["cl"].result_count, 10)
+
+    def test_inline_de_preguntas_solo_al_pedirlo(self):
+        attempt = self.empezar()
+        url = reverse("admin:juego_gameattempt_change", args=[attempt.id])
+        self.assertEqual(self.client.get(url).context["inline_admin_formsets"], [])
+        formsets = self.client.get(url, {"preguntas": 1}).context["inline_admin_formsets"]
+        self.assertEqual(len(formsets), 1)
+        self.assertEqual(len(formsets[0].formset.forms), len(PREMIOS) + 3)  # + un repuesto por nivel
+
+    def test_activar_y_desactivar_en_un_update(self):
+        ids = list(Question.objects.filter(difficulty=Difficulty.EASY).values_list("id", flat=True))
+        url = reverse("admin:juego_question_changelist")
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(url, {"action": "desactivar", "_selected_action": ids})
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Question.objects.filter(id__in=ids, is_active=True).exists())
+
+        self.client.post(url, {"action": "activar", "_selected_action": ids})
+        self.assertEqual(Question.objects.filter(id__in=ids, is_active=True).count(), len(ids))
+
+    def test_editar_pregunta_repetida_es_error_del_formulario(self):
+        original, otra = Question.objects.filter(difficulty=Difficulty.EASY).order_by("id")[:2]
+        datos = {
+            "text": original.text, "option_a": original.option_a, "option_b": original.option_b,
+            "option_c": original.option_c, "option_d": original.option_d,
+            "correct_option": otra.correct_option, "difficulty": otra.difficulty, "is_active": "on",
+        }
+        response = self.client.post(reverse("admin:juego_question_change", args=[otra.id]), datos)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f"Ya existe una pregunta con el mismo texto y opciones (id {original.id}).")
+        otra.refresh_from_db()
+        self.assertNotEqual(otra.text, original.text)
+
+    def test_presentador_del_torneo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("admin:juego_tournament_add"), {"name": "Gala"})
+        torneo = Tournament.objects.get()
+        # Se crea con tournament.crear(), que publica la ronda al confirmar
+        self.assertEqual(cache.get(tournament.RONDA_KEY.format(torneo.id))["nombre"], "Gala")
+        self.assertContains(self.client.get(reverse("torneo", args=[torneo.id])), "Gala")
+        self.client.post(reverse("admin:juego_tournament_change", args=[torneo.id]), {"name": "Otra"})
+        self.assertEqual(Tournament.objects.get().name, "Gala")
+
+        url = reverse("admin:juego_tournament_changelist")
+        datos = {"action": "abrir_pregunta", "_selected_action": [torneo.id]}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, datos)
+        torneo.refresh_from_db()
+        self.assertEqual((torneo.status, torneo.current_question_number), (Tournament.Status.OPEN, 1))
+        response = self.client.post(url, datos, follow=True)
+        self.assertContains(response, "Primero hay que cerrar la pregunta abierta.")
+        self.assertContains(self.client.get(reverse("admin:juego_tournament_change", args=[torneo.id])), "0 respuestas")
+
+
+@override_settings(JUEGO_READ_REPLICA="replica")
+class ReplicaRouterTests(JuegoTestCase):
+
+    def test_lecturas_en_replica_salvo_lo_escrito(self):
+        router = db_router.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(LeaderboardEntry))
+        with db_router.lecturas_en_replica():
+            self.assertEqual(router.db_for_read(LeaderboardEntry), "replica")
+            self.assertIsNone(router.db_for_read(User))
+            self.assertEqual(router.db_for_write(LeaderboardEntry), "default")
+            self.assertEqual(router.db_for_read(LeaderboardEntry), "default")  # read-your-writes
+            self.assertEqual(router.db_for_read(GameAttempt), "replica")
+        with db_router.lecturas_en_replica(False):
+            self.assertIsNone(router.db_for_read(LeaderboardEntry))
+
+    def pedir(self, nombre, cookies=None, escribir=False):
+        destinos = []
+
+        def vista(request):
+            middleware_replica.process_view(request, None, (), {})
+            destinos.append(db_router.ReplicaRouter().db_for_read(LeaderboardEntry))
+            if escribir:
+                db_router.ReplicaRouter().db_for_write(GameAttempt)
+            return HttpResponse()
+
+        middleware_replica = middleware.ReadReplicaMiddleware(vista)
+        request = RequestFactory().get(reverse(nombre))
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(request.path)
+        response = middleware_replica(request)
+        return destinos[0], response
+
+    def test_middleware_elige_por_vista(self):
+        self.assertEqual(self.pedir("ranking")[0], "replica")
+        self.assertIsNone(self.pedir("jugar")[0])
+        self.assertIsNone(self.pedir("ranking", cookies={db_router.PRIMARY_COOKIE: "1"})[0])
+
+        _, response = self.pedir("responder", escribir=True)
+        self.assertIn(db_router.PRIMARY_COOKIE, response.cookies)
+        self.assertNotIn(db_router.PRIMARY_COOKIE, self.pedir("ranking")[1].cookies)
+
+
+@override_settings(JUEGO_READ_REPLICA="replica", STORAGES=STORAGES_SIN_MANIFEST)
+class ReplicaSqliteTests(TransactionTestCase):
+    """
+    El router de punta a punta con dos bases SQLite: la réplica es un
+    archivo con la copia de la primaria tomada en ``replicar()``; lo que se
+    escribe después solo está en la primaria (la réplica "atrasada").
+    """
+    serialized_rollback = True
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.carpeta = tempfile.TemporaryDirectory()
+        cls.path = str(Path(cls.carpeta.name) / "replica.sqlite3")
+        # El runner solo conoce los alias de settings.DATABASES: la réplica
+        # se agrega acá. MIRROR: Django no la vacía entre tests.
+        connections.settings["replica"] = {
+            **connections["default"].settings_dict,
+            "NAME": cls.path,
+            "TEST": {**connections["default"].settings_dict["TEST"], "MIRROR": "default"},
+        }
+        cls.databases = cls.databases | {"replica"}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        cls.databases = cls.databases - {"replica"}
+        cls.carpeta.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        question_pool.invalidate()
+
+    def replicar(self):
+        connections["replica"].close()
+        connection.ensure_connection()
+        destino = sqlite3.connect(self.path)
+        with destino:
+            connection.connection.backup(destino)
+        destino.close()
+
+    def jugar(self, client, name, document):
+        client.post(reverse("home"), {"name": name, "document": document})
+        correcta = AttemptQuestion.objects.get(
+            attempt=GameAttempt.objects.latest("id"), question_number=1, is_spare=False
+        ).question.correct_option
+        incorrecta = next(o for o in "ABCD" if o != correcta)
+        return client.post(reverse("responder"), {"option": incorrecta, "question_number": 1})
+
+    def ranking(self, client):
+        cache.clear()  # la primera página del ranking se cachea
+        return client.get(reverse("ranking")).content.decode()
+
+    def test_ranking_y_admin_leen_de_la_replica(self):
+        self.jugar(self.client_class(), "Replicado", "1")
+        self.replicar()
+        jugador = self.client_class()
+        response = self.jugar(jugador, "Reciente", "2")
+        self.assertIn(db_router.PRIMARY_COOKIE, response.cookies)
+
+        # Sin la cookie: réplica, que todavía no tiene el intento nuevo
+        otro = self.client_class()
+        html = self.ranking(otro)
+        self.assertIn("Replicado", html)
+        self.assertNotIn("Reciente", html)
+        # Quien acaba de jugar lee de la primaria (read-your-writes)
+        self.assertIn("Reciente", self.ranking(jugador))
+
+        # Iniciar sesión escribe la sesión y el usuario, pero no manda a la primaria
+        User.objects.create_superuser("admin", "a@a.co", "x")
+        admin = self.client_class()
+        response = admin.post(reverse("admin:login"), {"username": "admin", "password": "x"})
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertNotIn(db_router.PRIMARY_COOKIE, response.cookies)
+        response = admin.get(reverse("admin:juego_gameattempt_changelist"))
+        self.assertContains(response, "Replicado")
+        self.assertNotContains(response, "Reciente")
+
+        self.replicar()
+        self.assertIn("Reciente", self.ranking(otro))
+
+
+class StaticAssetsTests(JuegoTestCase):
+
+    def test_collectstatic_con_hash_gzip_y_cache_de_un_anio(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            STATIC_ROOT=root,
+            STORAGES={**STORAGES_SIN_MANIFEST, "staticfiles": {
+                "BACKEND": "juego.storage.CompressedManifestStaticFilesStorage",
+            }},
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            storage._nombres_hashed.cache_clear()
+            self.addCleanup(storage._nombres_hashed.cache_clear)
+
+            html = self.client.get(reverse("home")).content.decode()
+            url = re.search(r'href="(/static/juego/css/home\.[0-9a-f]{12}\.css)"', html).group(1)
+            self.assertTrue(Path(root, url[len("/static/"):] + ".gz").exists())
+
+            response = self.client.get(url, headers={"accept-encoding": "gzip, deflate"})
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(response["Cache-Control"], storage.CACHE_HASHED)
+            self.assertIn("Accept-Encoding", response["Vary"])
+            self.assertIn(b"#02071f", gzip.decompress(b"".join(response.streaming_content)))
+
+            # Cada versión tiene su ETag: el del .gz no valida la copia sin comprimir
+            sin_gzip = self.client.get(url, headers={"if-none-match": response["ETag"]})
+            self.assertEqual(sin_gzip.status_code, 200)
+            self.assertFalse(sin_gzip.has_header("Content-Encoding"))
+            self.assertNotEqual(sin_gzip["ETag"], response["ETag"])
+            revalidar = self.client.get(url, headers={
+                "accept-encoding": "gzip, deflate", "if-none-match": response["ETag"],
+            })
+            self.assertEqual(revalidar.status_code, 304)
+
+            # El nombre sin hash se sirve, pero sin caché larga
+            self.assertEqual(self.client.get("/static/juego/css/home.css")["Cache-Control"], storage.CACHE_SIN_HASH)
+
+    def test_sin_collectstatic_usa_nombres_sin_hash(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            STATIC_ROOT=root,
+            STORAGES={**STORAGES_SIN_MANIFEST, "staticfiles": {
+                "BACKEND": "juego.storage.CompressedManifestStaticFilesStorage",
+            }},
+        ), self.assertLogs("juego.storage", "WARNING"):
+            self.assertContains(self.client.get(reverse("home")), 'href="/static/juego/css/home.css"')
+
+
+class ImportQuestionsTests(JuegoTestCase):
+
+    def importar(self, filas, sufijo=".jsonl"):
+        with tempfile.NamedTemporaryFile("w", suffix=sufijo, encoding="utf-8", delete=False) as f:
+            for fila in filas:
+                f.write(json.dumps(fila, ensure_ascii=False) + "\n")
+        salida, errores = StringIO(), StringIO()
+        call_command("import_questions", f.name, batch_size=2, stdout=salida, stderr=errores)
+        return salida.getvalue(), errores.getvalue()
+
+    def test_importa_valida_y_deduplica(self):
+        base = {"option_a": "a", "option_b": "b", "option_c": "c", "option_d": "d"}
+        antes = Question.objects.count()
+        salida, errores = self.importar([
+            {**base, "text": "¿Nueva 1?", "correct_option": "b", "difficulty": "Media"},
+            {**base, "text": "  ¿nueva   1? ", "correct_option": "B", "difficulty": "MEDIUM"},
+            {**base, "text": "¿Nueva 2?", "correct_option": "E", "difficulty": "EASY"},
+            {**base, "text": "¿Nueva 3?", "correct_option": "A", "difficulty": "EXTREMA"},
+            {**base, "text": "¿Cuál es el océano más grande del mundo?", "option_a": "Atlántico",
+             "option_b": "Índico", "option_c": "Pacífico", "option_d": "Ártico",
+             "correct_option": "C", "difficulty": "EASY"},
+        ])
+
+        self.assertEqual(Question.objects.count(), antes + 1)
+        nueva = Question.objects.get(text="¿Nueva 1?")
+        self.assertEqual((nueva.correct_option, nueva.difficulty), ("B", Difficulty.MEDIUM))
+        self.assertIn("insertadas: 1, duplicadas: 2, inválidas: 2", salida)
+        self.assertIn("correct_option inválida", errores)
+        self.assertIn("difficulty inválida", errores)
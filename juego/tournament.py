@@ -0,0 +1,319 @@
+# juego/tournament.py
+"""
+Torneo en vivo: todos los jugadores de la sala reciben la misma pregunta
+al mismo tiempo y los que fallan quedan eliminados.
+
+En el juego individual (juego/game.py) cada intento sortea su propia
+escalera al crearse. En un torneo la pregunta la pone el presentador
+(acciones del admin):
+
+- ``abrir_pregunta`` elige la pregunta de la ronda, la guarda en el
+  ``Tournament`` y la publica una sola vez en la caché (``ronda``). Los
+  jugadores la leen de ahí: no hay sorteo ni consultas por jugador.
+- ``responder`` no toca la base. Valida contra la ronda publicada y guarda
+  la respuesta del jugador en la caché con ``cache.add`` (vale la primera),
+  junto con su tiempo de respuesta, y suma uno al contador de la opción
+  (``cache.incr``). Nada queda en la memoria del proceso.
+- ``cerrar_pregunta`` lee de la caché, en lotes de ``BATCH_SIZE``, las
+  respuestas de todos los jugadores de la ronda; las escribe con
+  ``bulk_create`` de ``AttemptQuestion`` y elimina con dos UPDATE: los que
+  acertaron pasan a la pregunta siguiente y el resto termina (``LOSE`` si
+  respondió mal, ``TIME`` si no respondió). Los eliminados pasan al ranking
+  en bloque.
+- ``porcentajes`` es lo que respondió la sala, desde los contadores. Los
+  eliminados siguen votando como público, pero ya no cuentan para la
+  eliminación.
+
+La caché es el lugar compartido entre workers: con más de un proceso tiene
+que ser Redis (``REDIS_URL``); con ``LocMemCache`` cada worker vería solo
+sus propias respuestas.
+"""
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from . import game, leaderboard, question_pool, telemetry
+from .game import PREMIOS
+from .models import AttemptQuestion, GameAttempt, Tournament
+
+OPCIONES = ["A", "B", "C", "D"]
+
+BATCH_SIZE = 500
+# Después del plazo (y su gracia) se espera a las requests que ya pasaron
+# la validación y todavía no guardaron la respuesta
+CIERRE_MARGEN = game.PLAZO_GRACIA + timedelta(seconds=1)
+RONDA_TIMEOUT = 6 * 60 * 60
+
+RONDA_KEY = "juego:torneo:{}:ronda"
+RESPUESTA_KEY = "juego:torneo:{}:{}:respuesta:{}"   # torneo, número, intento
+CONTADOR_KEY = "juego:torneo:{}:{}:opcion:{}"       # torneo, número, letra
+
+# Resultado de responder() (además de los de juego/game.py)
+RESPUESTA_REGISTRADA = "registrada"
+
+
+# ----------------------------------------------------------------------
+# Ronda publicada
+# ----------------------------------------------------------------------
+
+def _datos_ronda(tournament, question=None, **extra):
+    datos = {
+        "torneo": tournament.id,
+        "nombre": tournament.name,
+        "estado": tournament.status,
+        "numero": tournament.current_question_number,
+        "deadline": tournament.question_deadline,
+        "question_id": None,
+    }
+    if question is not None:
+        datos.update({
+            "question_id": question.id,
+            "text": question.text,
+            "options": {
+                "A": question.option_a,
+                "B": question.option_b,
+                "C": question.option_c,
+                "D": question.option_d,
+            },
+            "correct_option": question.correct_option,
+        })
+    datos.update(extra)
+    return datos
+
+
+def _publicar(datos):
+    cache.set(RONDA_KEY.format(datos["torneo"]), datos, RONDA_TIMEOUT)
+
+
+def ronda(tournament_id):
+    """
+    La ronda actual del torneo, desde la caché. Si no está (reinicio,
+    desalojo) se vuelve a armar desde la base. None si el torneo no existe.
+    """
+    datos = cache.get(RONDA_KEY.format(tournament_id))
+    if datos is None:
+        tournament = Tournament.objects.select_related("question").filter(id=tournament_id).first()
+        if tournament is None:
+            return None
+        datos = _datos_ronda(tournament, tournament.question)
+        _publicar(datos)
+    return datos
+
+
+def ronda_publica(datos):
+    """Copia de la ronda sin la opción correcta mientras la pregunta sigue abierta."""
+    abierta = datos["estado"] == Tournament.Status.OPEN
+    return {k: v for k, v in datos.items() if not (abierta and k == "correct_option")}
+
+
+# ----------------------------------------------------------------------
+# Presentador
+# ----------------------------------------------------------------------
+
+def crear(name):
+    """Crea el torneo (esperando jugadores) y publica su ronda vacía."""
+    with transaction.atomic():
+        tournament = Tournament.objects.create(name=name)
+        datos = _datos_ronda(tournament)
+        transaction.on_commit(lambda: _publicar(datos))
+    return tournament
+
+
+def inscribir(tournament_id, name, document):
+    """Intento del jugador en el torneo, o None si el torneo ya empezó."""
+    if not Tournament.objects.filter(id=tournament_id, status=Tournament.Status.WAITING).exists():
+        return None
+    return GameAttempt.objects.create(
+        tournament_id=tournament_id,
+        name=name,
+        document=document,
+        current_question_number=1,
+        max_reached_question=0,
+        current_prize=0,
+    )
+
+
+def abrir_pregunta(tournament_id):
+    """
+    Abre la pregunta siguiente para todos los jugadores en juego y la
+    publica. Lanza ``ValueError`` si hay una pregunta abierta, si el torneo
+    terminó o si no quedan preguntas de la dificultad.
+    """
+    with transaction.atomic():
+        tournament = Tournament.objects.select_for_update().get(id=tournament_id)
+        if tournament.status == Tournament.Status.FINISHED:
+            raise ValueError("El torneo ya terminó.")
+        if tournament.status == Tournament.Status.OPEN:
+            raise ValueError("Primero hay que cerrar la pregunta abierta.")
+
+        numero = tournament.current_question_number + 1
+        question = question_pool.pick(
+            GameAttempt.difficulty_for(numero), exclude=tournament.used_question_ids
+        )
+        if question is None:
+            raise ValueError("No quedan preguntas de esta dificultad.")
+
+        tournament.status = Tournament.Status.OPEN
+        tournament.current_question_number = numero
+        tournament.question = question
+        tournament.question_deadline = game.nuevo_plazo()
+        tournament.used_question_ids = [*tournament.used_question_ids, question.id]
+        tournament.save()
+        jugadores = tournament.attempts.filter(finished__in=[False], current_question_number=numero).count()
+
+        datos = _datos_ronda(tournament, question, abierta_en=time.time(), jugadores=jugadores)
+        transaction.on_commit(lambda: _publicar(datos))
+    return datos
+
+
+def cerrar_pregunta(tournament_id, now=None):
+    """
+    Cierra la pregunta abierta: escribe las respuestas de la ronda y elimina
+    a quienes no acertaron, con dos UPDATE sobre todos los jugadores de la
+    ronda. Devuelve ``(pasan, eliminados)``. Lanza ``ValueError`` si no hay
+    pregunta abierta o si todavía pueden llegar respuestas
+    (``CIERRE_MARGEN``).
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        tournament = Tournament.objects.select_for_update().get(id=tournament_id)
+        if tournament.status != Tournament.Status.OPEN:
+            raise ValueError("No hay una pregunta abierta.")
+        if now < tournament.question_deadline + CIERRE_MARGEN:
+            raise ValueError("Todavía pueden llegar respuestas; espera a que venza el plazo.")
+
+        numero = tournament.current_question_number
+        # finished__in: ver leaderboard.live_queryset
+        en_ronda = tournament.attempts.filter(finished__in=[False], current_question_number=numero)
+        respondieron, acertaron = _escribir_respuestas(
+            tournament, list(en_ronda.values_list("id", flat=True))
+        )
+
+        ultima = numero >= len(PREMIOS)
+        cambios = {
+            "max_reached_question": numero,
+            "current_prize": PREMIOS[numero - 1],
+            "current_question_number": F("current_question_number") + 1,
+        }
+        if ultima:
+            cambios.update(finished=True, finished_reason="WIN")
+        pasan = en_ronda.filter(id__in=acertaron).update(**cambios) if acertaron else 0
+        # Los que quedan en la ronda son los que no acertaron
+        eliminados = en_ronda.update(
+            finished=True,
+            max_reached_question=numero,
+            finished_reason=Case(
+                When(id__in=respondieron, then=Value("LOSE")),
+                default=Value("TIME"),
+            ),
+        )
+        leaderboard.record_finished_many(list(
+            tournament.attempts.filter(finished__in=[True], max_reached_question=numero)
+        ))
+
+        tournament.status = Tournament.Status.FINISHED if ultima or not pasan else Tournament.Status.CLOSED
+        tournament.save(update_fields=["status"])
+        datos = _datos_ronda(
+            tournament, tournament.question,
+            jugadores=pasan, eliminados=eliminados, publico=porcentajes(tournament.id, numero),
+        )
+        transaction.on_commit(lambda: _publicar(datos))
+    return pasan, eliminados
+
+
+def _escribir_respuestas(tournament, attempt_ids):
+    """
+    Lee de la caché las respuestas de ``attempt_ids`` a la pregunta actual y
+    las escribe en lotes. Devuelve ``(ids que respondieron, ids que
+    acertaron)``.
+    """
+    numero = tournament.current_question_number
+    correcta = tournament.question.correct_option
+    respondieron, acertaron = [], []
+    for inicio in range(0, len(attempt_ids), BATCH_SIZE):
+        lote = attempt_ids[inicio:inicio + BATCH_SIZE]
+        keys = {_respuesta_key(tournament.id, numero, attempt_id): attempt_id for attempt_id in lote}
+        filas = []
+        for key, (letra, response_ms) in cache.get_many(list(keys)).items():
+            attempt_id = keys[key]
+            respondieron.append(attempt_id)
+            if letra == correcta:
+                acertaron.append(attempt_id)
+            filas.append(AttemptQuestion(
+                attempt_id=attempt_id,
+                question_id=tournament.question_id,
+                question_number=numero,
+                selected_option=letra,
+                is_correct=letra == correcta,
+                response_ms=response_ms,
+            ))
+        AttemptQuestion.objects.bulk_create(filas, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return respondieron, acertaron
+
+
+# ----------------------------------------------------------------------
+# Jugadores
+# ----------------------------------------------------------------------
+
+def _respuesta_key(tournament_id, numero, attempt_id):
+    return RESPUESTA_KEY.format(tournament_id, numero, attempt_id)
+
+
+def respuesta(tournament_id, numero, attempt_id):
+    """Letra que respondió el jugador en la ronda, o None."""
+    guardada = cache.get(_respuesta_key(tournament_id, numero, attempt_id))
+    return guardada[0] if guardada else None
+
+
+def responder(tournament_id, attempt_id, numero, selected):
+    """
+    Registra la respuesta del jugador a la pregunta ``numero`` del torneo,
+    sin consultas. Devuelve ``RESPUESTA_REGISTRADA``, o
+    ``game.RESPUESTA_INVALIDA`` / ``RESPUESTA_REPETIDA`` (pregunta vieja o
+    ya respondida) / ``RESPUESTA_TIEMPO`` (fuera de plazo).
+    """
+    datos = ronda(tournament_id)
+    if datos is None or selected not in OPCIONES:
+        return game.RESPUESTA_INVALIDA
+    if datos["numero"] != numero or datos["estado"] != Tournament.Status.OPEN:
+        return game.RESPUESTA_REPETIDA
+    if game.vencido(datos["deadline"]):
+        return game.RESPUESTA_TIEMPO
+    guardada = (selected, telemetry.response_ms(datos.get("abierta_en")))
+    if not cache.add(_respuesta_key(tournament_id, numero, attempt_id), guardada, RONDA_TIMEOUT):
+        return game.RESPUESTA_REPETIDA
+    _sumar(CONTADOR_KEY.format(tournament_id, numero, selected))
+    return RESPUESTA_REGISTRADA
+
+
+def _sumar(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Primera respuesta de la opción; add por si otro worker se adelantó
+        cache.add(key, 0, RONDA_TIMEOUT)
+        cache.incr(key)
+
+
+def porcentajes(tournament_id, numero):
+    """
+    Lo que respondió la sala en la ronda: ``{"total": n, "porcentajes":
+    [A, B, C, D]}`` (suman 100 si hubo respuestas).
+    """
+    keys = [CONTADOR_KEY.format(tournament_id, numero, letra) for letra in OPCIONES]
+    guardados = cache.get_many(keys)
+    conteos = [guardados.get(key, 0) for key in keys]
+    total = sum(conteos)
+    if not total:
+        return {"total": 0, "porcentajes": [0, 0, 0, 0]}
+    # Mayor resto: los porcentajes enteros suman exactamente 100
+    exactos = [c * 100 / total for c in conteos]
+    enteros = [int(e) for e in exactos]
+    orden = sorted(range(len(OPCIONES)), key=lambda i: enteros[i] - exactos[i])
+    for i in orden[:100 - sum(enteros)]:
+        enteros[i] += 1
+    return {"total": total, "porcentajes": enteros}
@@ -1,15 +1,41 @@
+from django.conf import settings
 from django.urls import path
-from . import views
-
-urlpatterns = [
-    path("", views.home, name="home"),          # formulario inicial
-    path("jugar/", views.jugar, name="jugar"),  # vista del juego
-    path("responder/", views.responder, name="responder"),  # procesa la respuesta
-    path("ranking/", views.ranking, name="ranking"),  # ← NUEVO
-
-    # NUEVAS rutas para ayudas
-    path("ayuda/5050/", views.ayuda_5050, name="ayuda_5050"),
-    path("ayuda/publico/", views.ayuda_publico, name="ayuda_publico"),
-    path("ayuda/amigo/", views.ayuda_amigo, name="ayuda_amigo"),
-    path("ayuda/cambiar/", views.ayuda_cambiar, name="ayuda_cambiar"),
-]
\ No newline at end of file
+from . import api, views, views_async
+
+
+def patrones(async_views=False):
+    """
+    Rutas del juego. Con ``async_views`` las vistas HTML y el ranking salen
+    de juego/views_async.py (mismas URLs y nombres) y se agrega el ranking
+    en vivo (``ranking/stream/``).
+    """
+    v = views_async if async_views else views
+    rutas = [
+        path("", v.home, name="home"),          # formulario inicial
+        path("jugar/", v.jugar, name="jugar"),  # vista del juego
+        path("responder/", v.responder, name="responder"),  # procesa la respuesta
+        path("ranking/", v.ranking, name="ranking"),  # ← NUEVO
+        path("ranking/api/", v.ranking_api, name="ranking_api"),  # ranking en JSON (kioscos)
+        path("ranking/cache/", views.ranking_cache_stats, name="ranking_cache_stats"),
+
+        # Ayudas: 5050, publico, amigo, cambiar (juego/lifelines.py)
+        path("ayuda/<str:nombre>/", v.ayuda, name="ayuda"),
+
+        # API JSON: cada acción devuelve el estado nuevo en la misma respuesta
+        path("api/iniciar/", api.iniciar, name="api_iniciar"),
+        path("api/estado/", api.estado, name="api_estado"),
+        path("api/responder/", api.responder, name="api_responder"),
+        path("api/ayuda/<str:nombre>/", api.ayuda, name="api_ayuda"),
+
+        # Torneo en vivo (juego/tournament.py): la misma pregunta para toda la sala
+        path("torneo/<int:torneo_id>/", views.torneo, name="torneo"),
+        path("api/torneo/<int:torneo_id>/estado/", api.torneo_estado, name="api_torneo_estado"),
+        path("api/torneo/<int:torneo_id>/responder/", api.torneo_responder, name="api_torneo_responder"),
+    ]
+    if async_views:
+        # Flujo SSE que no termina: bajo WSGI ocuparía un worker para siempre
+        rutas.append(path("ranking/stream/", views_async.ranking_stream, name="ranking_stream"))
+    return rutas
+
+
+urlpatterns = patrones(settings.JUEGO_ASYNC_VIEWS)
@@ -1,10 +1,9 @@
 # juego/views.py
-import random
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import GameAttempt, Question, AttemptQuestion
-
-SESSION_ATTEMPT_KEY = "current_attempt_id"
-PREMIOS = [100, 200, 300, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 125000, 250000, 500000, 1000000 ]
+from .models import GameAttempt
+from . import fragments, game, game_state, leaderboard, lifelines, tournament
+from .game import PREMIOS
 
 
 def home(request):
@@ -17,125 +16,54 @@ def home(request):
                 "error": "El nombre y el documento son obligatorios."
             })
 
-        attempt = GameAttempt.objects.create(
-            name=name,
-            document=document,
-            current_question_number=1,
-            max_reached_question=0,
-            current_prize=0,
-        )
-        request.session[SESSION_ATTEMPT_KEY] = attempt.id
-
-        # limpiamos cualquier rastro de pregunta/ayudas previas
-        for key in ["current_question_id", "ayuda_publico_data",
-                    "ayuda_amigo_letra", "mensaje_info"]:
-            request.session.pop(key, None)
+        attempt = game.iniciar_intento(name, document)
 
-        return redirect("jugar")
+        # El intento nuevo tiene su propio estado transitorio en la caché,
+        # así que no hay rastros de ayudas previas que limpiar.
+        return game_state.set_attempt_cookie(redirect("jugar"), attempt.id)
 
     return render(request, "juego/home.html")
 
 
 def get_current_attempt(request):
-    attempt_id = request.session.get(SESSION_ATTEMPT_KEY)
+    attempt_id = game_state.get_attempt_id(request)
     if not attempt_id:
         return None
     return get_object_or_404(GameAttempt, id=attempt_id)
 
 
-def _build_escalera(attempt):
-    escalera = []
-    total = len(PREMIOS)
-    nivel_actual_index = attempt.current_question_number - 1  # 0-based
-
-    for i, premio in enumerate(reversed(PREMIOS)):
-        nivel_real = total - 1 - i  # índice real 0-based
-        escalera.append({
-            "numero": nivel_real + 1,
-            "premio": premio,
-            "es_actual": (nivel_real == nivel_actual_index),
-        })
-    return escalera
-
-
 def jugar(request):
     attempt = get_current_attempt(request)
     if not attempt:
         return redirect("home")
 
-    if attempt.finished:
+    # El plazo de la pregunta se revisa con el intento ya leído
+    if game.expirar_si_vencido(attempt):
         return render(request, "juego/resultado.html", {"attempt": attempt})
 
-    # 1) Intentamos reutilizar la pregunta actual de la sesión
-    current_q_id = request.session.get("current_question_id")
-    question = None
-    if current_q_id:
-        question = Question.objects.filter(
-            id=current_q_id,
-            is_active=True
-        ).first()
-
-    # 2) Si no hay pregunta en sesión o la pregunta ya no existe, escogemos una nueva
-    if question is None:
-        difficulty = attempt.get_current_difficulty()
-
-        # IDs de preguntas que ya se mostraron en este intento
-        used_ids = AttemptQuestion.objects.filter(
-            attempt=attempt
-        ).values_list('question_id', flat=True)
-
-        # Preguntas activas de la dificultad actual que NO se han usado
-        qs = Question.objects.filter(
-            difficulty=difficulty,
-            is_active=True
-        ).exclude(id__in=used_ids)
-
-        question = qs.order_by('?').first()
-
-        if not question:
-            # No quedan más preguntas disponibles para esta dificultad
-            attempt.finished = True
-            attempt.finished_reason = "WIN"
-            attempt.save()
-            return render(request, "juego/resultado.html", {"attempt": attempt})
-
-        # Guardar en sesión la nueva pregunta
-        request.session["current_question_id"] = question.id
-
-        # Registrar que esta pregunta se mostró en este intento
-        AttemptQuestion.objects.get_or_create(
-            attempt=attempt,
-            question=question,
-            defaults={"question_number": attempt.current_question_number}
-        )
-
-        # Reset de 50:50
-        attempt.fifty_disabled_options = None
-        attempt.save()
-
-    idx = attempt.current_question_number - 1
-    premio_nivel = 0
-    if 0 <= idx < len(PREMIOS):
-        premio_nivel = PREMIOS[idx]
-
-    ayuda_publico_data = request.session.pop("ayuda_publico_data", None)
-    ayuda_amigo_letra = request.session.pop("ayuda_amigo_letra", None)
-    mensaje_info = request.session.pop("mensaje_info", None)
-
-    disabled_letters = []
-    if attempt.fifty_disabled_options:
-        disabled_letters = [l for l in attempt.fifty_disabled_options.split(",") if l]
+    # La pregunta ya se sorteó al crear el intento
+    question_id = game.cargar_pregunta_id(attempt)
+    if question_id is None:
+        # No alcanzaron las preguntas de esta dificultad al sortear
+        return render(request, "juego/resultado.html", {"attempt": attempt})
+
+    estado = game_state.pop_flash(attempt.id)
+    game_state.mark_shown(attempt.id, attempt.current_question_number, question_id)
+    disabled = game.disabled_letters(attempt)
+    # Texto y opciones desde la caché de fragmentos (sin leer la Question)
+    bloque = fragments.question_block(question_id, disabled)
+    ayudas = lifelines.resultados(attempt, question_id, bloque["correct_option"])
 
     contexto = {
         "attempt": attempt,
-        "question": question,
-        "premio_nivel": premio_nivel,
+        "bloque_pregunta": bloque,
+        "premio_nivel": game.premio_nivel(attempt),
         "total_preguntas": len(PREMIOS),
-        "escalera": _build_escalera(attempt),
-        "ayuda_publico_data": ayuda_publico_data,
-        "ayuda_amigo_letra": ayuda_amigo_letra,
-        "mensaje_info": mensaje_info,
-        "disabled_letters": disabled_letters,
+        "escalera": fragments.escalera(attempt.current_question_number),
+        "ayuda_publico_data": ayudas.get("ayuda_publico_data"),
+        "ayuda_amigo_letra": ayudas.get("ayuda_amigo_letra"),
+        "mensaje_info": estado.get("mensaje_info"),
+        "disabled_letters": disabled,
     }
     return render(request, "juego/jugar.html", contexto)
 
@@ -144,226 +72,142 @@ def responder(request):
     if request.method != "POST":
         return redirect("jugar")
 
-    attempt = get_current_attempt(request)
-    if not attempt:
+    attempt_id = game_state.get_attempt_id(request)
+    if not attempt_id:
         return redirect("home")
 
-    if attempt.finished:
-        return render(request, "juego/resultado.html", {"attempt": attempt})
-
-    question_id = request.session.get("current_question_id")
-    question = get_object_or_404(Question, id=question_id)
+    # El formulario envía el número de la pregunta que se está respondiendo;
+    # el UPDATE condicional lo compara con el estado real del intento, así
+    # que no hace falta leer el intento antes.
+    try:
+        numero = int(request.POST.get("question_number", ""))
+    except ValueError:
+        return redirect("jugar")
 
     selected = request.POST.get("option")  # 'A', 'B', 'C', 'D'
+    resultado, attempt = game.responder(attempt_id, numero, selected)
 
-    if attempt.current_question_number > attempt.max_reached_question:
-        attempt.max_reached_question = attempt.current_question_number
-
-    # Esta pregunta ya no se usará más; borramos el ID para que en la siguiente
-    # se seleccione una nueva.
-    request.session.pop("current_question_id", None)
-    attempt.fifty_disabled_options = None
-
-    if selected == question.correct_option:
-        idx = attempt.current_question_number - 1
-        if 0 <= idx < len(PREMIOS):
-            attempt.current_prize = PREMIOS[idx]
-
-        attempt.current_question_number += 1
-
-        if attempt.current_question_number > len(PREMIOS):
-            attempt.finished = True
-            attempt.finished_reason = "WIN"
-
-        attempt.save()
-        return redirect("jugar")
-    else:
-        attempt.finished = True
-        attempt.finished_reason = "LOSE"
-        attempt.save()
+    if resultado in (game.RESPUESTA_INCORRECTA, game.RESPUESTA_TIEMPO):
         return render(request, "juego/resultado.html", {"attempt": attempt})
+    # Correcta (o repetida/vieja, en cuyo caso nada cambió): jugar muestra
+    # la siguiente pregunta o el resultado final
+    return redirect("jugar")
 
 
 # ======================
 #        AYUDAS
 # ======================
 
-def ayuda_5050(request):
-    attempt = get_current_attempt(request)
-    if not attempt:
-        return redirect("home")
-    if attempt.finished:
-        return redirect("jugar")
-
-    if attempt.used_5050:
-        request.session["mensaje_info"] = "Ya utilizaste la ayuda 50:50."
-        return redirect("jugar")
-
-    question_id = request.session.get("current_question_id")
-    if not question_id:
-        request.session["mensaje_info"] = "No hay pregunta activa para aplicar 50:50."
+def ayuda(request, nombre):
+    """
+    Una sola vista para las cuatro ayudas (juego/lifelines.py). No hace falta
+    leer el intento: la ayuda se consume con un UPDATE condicional y los
+    resultados del público y del amigo los recalcula ``jugar``.
+    """
+    if nombre not in lifelines.AYUDAS:
+        raise Http404("Ayuda desconocida")
+    if request.method != "POST":
         return redirect("jugar")
 
-    question = get_object_or_404(Question, id=question_id)
-
-    correcta = question.correct_option  # 'A'..'D'
-    todas = ['A', 'B', 'C', 'D']
-    restantes = [o for o in todas if o != correcta]
-    deshabilitar = random.sample(restantes, 2)  # SIEMPRE SOLO INCORRECTAS
-    attempt.fifty_disabled_options = ",".join(deshabilitar)
-    attempt.used_5050 = True
-    attempt.save()
-
-    return redirect("jugar")
-
-
-def ayuda_publico(request):
-    attempt = get_current_attempt(request)
-    if not attempt:
+    attempt_id = game_state.get_attempt_id(request)
+    if not attempt_id:
         return redirect("home")
-    if attempt.finished:
-        return redirect("jugar")
-
-    if attempt.used_public:
-        request.session["mensaje_info"] = "Ya usaste la ayuda 'Preguntar al público'."
-        return redirect("jugar")
-
-    question_id = request.session.get("current_question_id")
-    if not question_id:
-        request.session["mensaje_info"] = "No hay pregunta activa para preguntar al público."
-        return redirect("jugar")
-
-    question = get_object_or_404(Question, id=question_id)
-
-    correcta_map = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
-    idx_correcta = correcta_map[question.correct_option]
-
-    porcentajes = [0, 0, 0, 0]
-    base_correcta = random.randint(40, 70)
-    restante = 100 - base_correcta
-    indices = [0, 1, 2, 3]
-    indices.remove(idx_correcta)
-
-    for i in indices[:-1]:
-        val = random.randint(0, restante)
-        porcentajes[i] = val
-        restante -= val
-    porcentajes[indices[-1]] = restante
-    porcentajes[idx_correcta] = base_correcta
-
-    request.session["ayuda_publico_data"] = porcentajes
-    attempt.used_public = True
-    attempt.save()
 
+    resultado = lifelines.usar(nombre, attempt_id)
+    if "mensaje_info" in resultado:
+        game_state.flash(attempt_id, mensaje_info=resultado["mensaje_info"])
     return redirect("jugar")
 
 
-def ayuda_amigo(request):
-    attempt = get_current_attempt(request)
-    if not attempt:
-        return redirect("home")
-    if attempt.finished:
-        return redirect("jugar")
-
-    if attempt.used_friend:
-        request.session["mensaje_info"] = "Ya usaste la ayuda 'Llamar a un amigo'."
-        return redirect("jugar")
-
-    question_id = request.session.get("current_question_id")
-    if not question_id:
-        request.session["mensaje_info"] = "No hay pregunta activa para llamar al amigo."
-        return redirect("jugar")
-
-    question = get_object_or_404(Question, id=question_id)
+MODO_INTENTOS = "intentos"
+MODO_JUGADORES = "jugadores"
 
-    # Si quieres que SIEMPRE acierte, pon directamente:
-    # sugerida = question.correct_option
-    # Si quieres mantener probabilidad de error, deja esto:
-    correcta = question.correct_option
-    opciones = ['A', 'B', 'C', 'D']
-    if random.random() < 0.8:
-        sugerida = correcta
-    else:
-        restantes = [o for o in opciones if o != correcta]
-        sugerida = random.choice(restantes)
 
-    request.session["ayuda_amigo_letra"] = sugerida
-    attempt.used_friend = True
-    attempt.save()
+def ranking(request):
+    """
+    Ranking tipo podio:
+    - Top 3 en formato podio (solo en la primera página).
+    - Resto de jugadores en tabla, paginada con un cursor keyset.
+    Ordenado por:
+      1) pregunta máxima alcanzada (desc)
+      2) premio actual (desc)
+      3) fecha de creación (asc)
+    Solo considera juegos finalizados; se lee del ranking materializado
+    (ver juego.leaderboard). La primera página sale de la caché.
 
-    return redirect("jugar")
+    Con ``?modo=jugadores`` muestra el mejor resultado de cada documento,
+    leído directamente de PlayerStats.
+    """
+    modo = MODO_JUGADORES if request.GET.get("modo") == MODO_JUGADORES else MODO_INTENTOS
+    pagina, primera = leaderboard.page, leaderboard.first_page
+    if modo == MODO_JUGADORES:
+        pagina, primera = leaderboard.player_page, leaderboard.first_player_page
+
+    cursor = request.GET.get("cursor")
+    context = None
+    if cursor:
+        try:
+            others, siguiente = pagina(cursor)
+            context = {"top3": [], "others": others, "siguiente_cursor": siguiente}
+        except ValueError:
+            cursor = None
+    if not cursor:
+        context = dict(primera())
+
+    context["es_primera_pagina"] = not cursor
+    context["modo"] = modo
+    return render(request, "juego/ranking.html", context)
 
 
-def ayuda_cambiar(request):
-    attempt = get_current_attempt(request)
-    if not attempt:
-        return redirect("home")
-    if attempt.finished:
-        return redirect("jugar")
-
-    if attempt.used_switch:
-        request.session["mensaje_info"] = "Ya usaste la ayuda 'Cambiar de pregunta'."
-        return redirect("jugar")
+def ranking_api(request):
+    """
+    Misma paginación que ``ranking`` pero en JSON (para los kioscos):
+    ``?cursor=<next>&limite=<n>[&modo=jugadores]``. La primera página empieza
+    en el puesto 1.
+    """
+    pagina, como_dict = leaderboard.page, leaderboard.as_dict
+    if request.GET.get("modo") == MODO_JUGADORES:
+        pagina, como_dict = leaderboard.player_page, leaderboard.as_player_dict
+    try:
+        limite = int(request.GET.get("limite", leaderboard.PAGE_SIZE))
+        entradas, siguiente = pagina(request.GET.get("cursor"), limite)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
 
-    current_q_id = request.session.get("current_question_id")
-    difficulty = attempt.get_current_difficulty()
-
-    # IDs de preguntas ya usadas en este intento
-    used_ids = list(
-        AttemptQuestion.objects.filter(attempt=attempt).values_list('question_id', flat=True)
-    )
-    # También evitamos repetir la actual explícitamente
-    if current_q_id:
-        used_ids.append(current_q_id)
-
-    # Buscar una nueva pregunta NO usada
-    qs = Question.objects.filter(
-        difficulty=difficulty,
-        is_active=True
-    ).exclude(id__in=used_ids)
-
-    nueva = qs.order_by('?').first()
-    if not nueva:
-        request.session["mensaje_info"] = "No hay más preguntas disponibles para cambiar en esta dificultad."
-        return redirect("jugar")
+    return JsonResponse({
+        "results": [como_dict(e) for e in entradas],
+        "next": siguiente,
+    })
 
-    # Cambiamos de pregunta
-    request.session["current_question_id"] = nueva.id
-    attempt.used_switch = True
-    attempt.fifty_disabled_options = None
-    attempt.save()
 
-    # Registrar la nueva pregunta como usada en este intento
-    AttemptQuestion.objects.get_or_create(
-        attempt=attempt,
-        question=nueva,
-        defaults={"question_number": attempt.current_question_number}
-    )
+def ranking_cache_stats(request):
+    """Contadores de la caché de la primera página del ranking."""
+    return JsonResponse(leaderboard.stats())
 
-    return redirect("jugar")
 
-def ranking(request):
+def torneo(request, torneo_id):
     """
-    Ranking tipo podio:
-    - Top 3 en formato podio.
-    - Resto de jugadores en tabla.
-    Ordenado por:
-      1) pregunta máxima alcanzada (desc)
-      2) premio actual (desc)
-      3) fecha de creación (asc)
-    Solo considera juegos finalizados.
+    Página del jugador en un torneo en vivo (juego/tournament.py). Sin la
+    cookie del torneo muestra el formulario de inscripción; con ella, la
+    ronda actual, que el navegador va actualizando con ``api_torneo_estado``.
     """
-    attempts = GameAttempt.objects.filter(finished=True).order_by(
-        "-max_reached_question",
-        "-current_prize",
-        "created_at"
-    )
-
-    top3 = list(attempts[:3])
-    others = attempts[3:]
-
-    context = {
-        "top3": top3,
-        "others": others,
-    }
-    return render(request, "juego/ranking.html", context)
+    ronda = tournament.ronda(torneo_id)
+    if ronda is None:
+        raise Http404("Torneo desconocido")
+
+    if request.method == "POST":
+        name = request.POST.get("name", "").strip()
+        document = request.POST.get("document", "").strip()
+        if not name or not document:
+            return render(request, "juego/torneo.html", {
+                "ronda": ronda, "error": "El nombre y el documento son obligatorios."
+            })
+        attempt = tournament.inscribir(torneo_id, name, document)
+        if attempt is None:
+            return render(request, "juego/torneo.html", {
+                "ronda": ronda, "error": "El torneo ya empezó."
+            })
+        return game_state.set_tournament_cookie(redirect("torneo", torneo_id), torneo_id, attempt.id)
+
+    inscrito = game_state.get_tournament_attempt_id(request, torneo_id) is not None
+    return render(request, "juego/torneo.html", {"ronda": ronda, "inscrito": inscrito})
@@ -0,0 +1,166 @@
+# juego/views_async.py
+"""
+Versiones async de las vistas de juego/views.py, con el ORM async de Django
+(``aget``, ``afirst``, ``aupdate``, ``asave``, iteración con ``async for``).
+
+Bajo ASGI (uvicorn, ver millonario_project/asgi.py) una vista sync pasa por
+``sync_to_async`` en un único hilo compartido por todas las requests; estas
+corren directamente en el event loop. Las URLs y los nombres son los mismos,
+así que los templates y los presupuestos de consultas no cambian. Se eligen
+con ``JUEGO_ASYNC_VIEWS`` (ver juego/urls.py).
+"""
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from . import fragments, game, game_state, leaderboard, lifelines, ranking_live
+from .game import PREMIOS
+from .models import GameAttempt
+from .views import MODO_INTENTOS, MODO_JUGADORES
+
+
+async def home(request):
+    if request.method == "POST":
+        name = request.POST.get("name", "").strip()
+        document = request.POST.get("document", "").strip()
+
+        if not name or not document:
+            return render(request, "juego/home.html", {
+                "error": "El nombre y el documento son obligatorios."
+            })
+
+        attempt = await game.ainiciar_intento(name, document)
+        return game_state.set_attempt_cookie(redirect("jugar"), attempt.id)
+
+    return render(request, "juego/home.html")
+
+
+async def get_current_attempt(request):
+    attempt_id = game_state.get_attempt_id(request)
+    if not attempt_id:
+        return None
+    return await aget_object_or_404(GameAttempt, id=attempt_id)
+
+
+async def jugar(request):
+    attempt = await get_current_attempt(request)
+    if not attempt:
+        return redirect("home")
+
+    # El plazo de la pregunta se revisa con el intento ya leído
+    if await game.aexpirar_si_vencido(attempt):
+        return render(request, "juego/resultado.html", {"attempt": attempt})
+
+    question_id = await game.acargar_pregunta_id(attempt)
+    if question_id is None:
+        return render(request, "juego/resultado.html", {"attempt": attempt})
+
+    estado = await game_state.apop_flash(attempt.id)
+    await game_state.amark_shown(attempt.id, attempt.current_question_number, question_id)
+    disabled = game.disabled_letters(attempt)
+    bloque = await fragments.aquestion_block(question_id, disabled)
+    ayudas = lifelines.resultados(attempt, question_id, bloque["correct_option"])
+
+    contexto = {
+        "attempt": attempt,
+        "bloque_pregunta": bloque,
+        "premio_nivel": game.premio_nivel(attempt),
+        "total_preguntas": len(PREMIOS),
+        "escalera": fragments.escalera(attempt.current_question_number),
+        "ayuda_publico_data": ayudas.get("ayuda_publico_data"),
+        "ayuda_amigo_letra": ayudas.get("ayuda_amigo_letra"),
+        "mensaje_info": estado.get("mensaje_info"),
+        "disabled_letters": disabled,
+    }
+    return render(request, "juego/jugar.html", contexto)
+
+
+async def responder(request):
+    if request.method != "POST":
+        return redirect("jugar")
+
+    attempt_id = game_state.get_attempt_id(request)
+    if not attempt_id:
+        return redirect("home")
+
+    try:
+        numero = int(request.POST.get("question_number", ""))
+    except ValueError:
+        return redirect("jugar")
+
+    selected = request.POST.get("option")  # 'A', 'B', 'C', 'D'
+    resultado, attempt = await game.aresponder(attempt_id, numero, selected)
+
+    if resultado in (game.RESPUESTA_INCORRECTA, game.RESPUESTA_TIEMPO):
+        return render(request, "juego/resultado.html", {"attempt": attempt})
+    return redirect("jugar")
+
+
+# ======================
+#        AYUDAS
+# ======================
+
+async def ayuda(request, nombre):
+    if nombre not in lifelines.AYUDAS:
+        raise Http404("Ayuda desconocida")
+    if request.method != "POST":
+        return redirect("jugar")
+
+    attempt_id = game_state.get_attempt_id(request)
+    if not attempt_id:
+        return redirect("home")
+
+    resultado = await lifelines.ausar(nombre, attempt_id)
+    if "mensaje_info" in resultado:
+        await game_state.aflash(attempt_id, mensaje_info=resultado["mensaje_info"])
+    return redirect("jugar")
+
+
+async def ranking(request):
+    """Igual que ``views.ranking``; la primera página sale de la caché."""
+    modo = MODO_JUGADORES if request.GET.get("modo") == MODO_JUGADORES else MODO_INTENTOS
+    pagina, primera = leaderboard.apage, leaderboard.afirst_page
+    if modo == MODO_JUGADORES:
+        pagina, primera = leaderboard.aplayer_page, leaderboard.afirst_player_page
+
+    cursor = request.GET.get("cursor")
+    context = None
+    if cursor:
+        try:
+            others, siguiente = await pagina(cursor)
+            context = {"top3": [], "others": others, "siguiente_cursor": siguiente}
+        except ValueError:
+            cursor = None
+    if not cursor:
+        context = dict(await primera())
+
+    context["es_primera_pagina"] = not cursor
+    context["modo"] = modo
+    return render(request, "juego/ranking.html", context)
+
+
+async def ranking_api(request):
+    pagina, como_dict = leaderboard.apage, leaderboard.as_dict
+    if request.GET.get("modo") == MODO_JUGADORES:
+        pagina, como_dict = leaderboard.aplayer_page, leaderboard.as_player_dict
+    try:
+        limite = int(request.GET.get("limite", leaderboard.PAGE_SIZE))
+        entradas, siguiente = await pagina(request.GET.get("cursor"), limite)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse({
+        "results": [como_dict(e) for e in entradas],
+        "next": siguiente,
+    })
+
+
+async def ranking_stream(request):
+    """
+    Ranking en vivo por Server-Sent Events para las pantallas del evento:
+    un evento ``ranking`` con el podio y la primera página y después eventos
+    ``cambios`` (ver juego/ranking_live.py). Solo bajo ASGI.
+    """
+    response = StreamingHttpResponse(ranking_live.eventos(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # que nginx no junte los eventos
+    return response
@@ -5,6 +5,18 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+Bajo ASGI se sirven las vistas async del juego (JUEGO_ASYNC_VIEWS):
+
+    uvicorn millonario_project.asgi:application
+
+Con más de un worker (``--workers 4``) hace falta ``REDIS_URL``: la caché
+por defecto es ``LocMemCache``, una por proceso, y el estado compartido (los
+mensajes entre requests, la hora en que se mostró cada pregunta, la caché y
+el lock del ranking, los eventos del ranking en vivo y las respuestas y
+contadores de los torneos) quedaría partido entre workers sin dar error:
+
+    REDIS_URL=redis://127.0.0.1:6379/0 uvicorn millonario_project.asgi:application --workers 4
 """
 
 import os
@@ -12,5 +24,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'millonario_project.settings')
+os.environ.setdefault('JUEGO_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
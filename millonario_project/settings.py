@@ -29,7 +29,19 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv("DEBUG", "False") == "True"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [h for h in os.getenv("ALLOWED_HOSTS", "").split(",") if h]
+
+# Vistas async del juego (juego/views_async.py). asgi.py las activa por
+# defecto; bajo WSGI se usan las vistas sync de juego/views.py.
+JUEGO_ASYNC_VIEWS = os.getenv("JUEGO_ASYNC_VIEWS", "False") == "True"
+
+# Segundos para responder cada pregunta; al vencer, el intento termina por
+# tiempo (juego/game.py y el comando expire_attempts).
+JUEGO_ANSWER_SECONDS = int(os.getenv("JUEGO_ANSWER_SECONDS", "60"))
+
+# Admin de intentos para tablas grandes (juego/admin.py): conteo estimado,
+# paginación keyset y búsqueda por prefijo del documento.
+JUEGO_ADMIN_SCALABLE = os.getenv("JUEGO_ADMIN_SCALABLE", "True") == "True"
 
 
 # Application definition
@@ -46,6 +58,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'juego.storage.StaticFilesMiddleware',
+    'juego.middleware.ReadReplicaMiddleware',
+    'juego.middleware.QueryStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,8 +75,17 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
+        # Los loaders van explícitos (y por eso APP_DIRS en False) para usar
+        # el loader cacheado también con DEBUG: cada plantilla se compila una
+        # vez por proceso. En desarrollo el autoreload lo vacía al editarlas.
+        'APP_DIRS': False,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -78,6 +102,9 @@ WSGI_APPLICATION = 'millonario_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Con DB_ENGINE=sqlite se usa un archivo SQLite local (pruebas de carga,
+# desarrollo sin MySQL). Por defecto, MySQL.
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.mysql',
@@ -92,6 +119,65 @@ DATABASES = {
     }
 }
 
+if os.getenv("DB_ENGINE") == "sqlite":
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv("DB_NAME") or BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Con varios hilos escribiendo (manage.py loadtest): esperar el
+            # lock en lugar de fallar, tomarlo al inicio de cada transacción
+            # y dejar que las lecturas no bloqueen a la escritura.
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL;',
+        },
+    }
+
+# Réplica de lectura para el ranking, el admin y los reportes
+# (juego/db_router.py): DB_REPLICA_HOST con MySQL, o DB_REPLICA_NAME con
+# SQLite (una copia del archivo principal, para probar en local). En los
+# tests la réplica es un espejo de la primaria.
+if os.getenv("DB_REPLICA_HOST") and DATABASES['default']['ENGINE'].endswith("mysql"):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv("DB_REPLICA_HOST"),
+        'PORT': os.getenv("DB_REPLICA_PORT", DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif os.getenv("DB_REPLICA_NAME") and DATABASES['default']['ENGINE'].endswith("sqlite3"):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv("DB_REPLICA_NAME"),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['juego.db_router.ReplicaRouter']
+JUEGO_READ_REPLICA = 'replica' if 'replica' in DATABASES else None
+# Segundos que un cliente lee de la primaria después de escribir
+JUEGO_REPLICA_LAG_SECONDS = int(os.getenv("JUEGO_REPLICA_LAG_SECONDS", "5"))
+
+
+# Cache
+# El estado transitorio del juego (juego/game_state.py), el pool de preguntas
+# y los contadores de versión viven aquí. Con más de un worker hace falta una
+# caché compartida (REDIS_URL): LocMemCache es una por proceso y el estado
+# del juego, del ranking en vivo y de los torneos quedaría partido.
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'millonario',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -128,6 +214,19 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic deja los CSS/JS con hash en el nombre y sus versiones .gz/.br
+# (juego/storage.py); sin DEBUG hay que correrlo antes de levantar el server
+# (si falta el manifest, los templates usan los nombres sin hash).
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'juego.storage.CompressedManifestStaticFilesStorage'},
+}
+
+# Sin nginx delante, Django sirve STATIC_ROOT con caché de un año para los
+# archivos con hash (juego.storage.StaticFilesMiddleware).
+JUEGO_SERVE_STATIC = os.getenv("JUEGO_SERVE_STATIC", "True") == "True"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field